@@ -0,0 +1,138 @@
+'''
+Measures the cost of a frame of CitizenPac-like work with ``QGraphicsScene.NoIndex`` and
+``QGraphicsScene.BspTreeIndex``, for a growing number of static items and a fixed
+number of moving items.  The ratio of static to moving items from which the BSP tree
+stays faster is what :data:`constants.BSP_INDEX_CROSSOVER` is set from.  The two are
+within noise of each other for small counts, so a single count at which the BSP tree
+happens to win is not a crossover.
+
+Every frame, each moving item is moved (which the BSP tree has to re-index), the items
+around it are looked up (what hit testing and collisions do), and the region it covered
+is rendered into an offscreen image (what a dirty-region repaint does).
+
+Usage::
+
+    xvfb-run -a python benchmarks/item_index.py [numMoving] [numFrames]
+
+PyQt4 (Qt 4) needs an X display even though nothing is shown, ``QT_QPA_PLATFORM`` is
+only understood by Qt 5.  On a machine without one, run it under a virtual framebuffer
+with ``xvfb-run``.
+'''
+
+from __future__ import division, print_function
+
+import math
+import sys
+import timeit
+
+from PyQt4 import QtCore, QtGui
+
+STATIC_COUNTS = [0, 8, 16, 32, 48, 64, 96, 128, 192, 256, 1024, 4096]
+''' The numbers of static items to measure. '''
+
+SCENE_SIZE = 800.0
+''' The width and height of the scene. '''
+
+ITEM_SIZE = 10.0
+''' The width and height of every item. '''
+
+METHODS = [
+    ("none", QtGui.QGraphicsScene.NoIndex),
+    ("bsp",  QtGui.QGraphicsScene.BspTreeIndex)
+]
+
+
+def buildScene(numStatic, numMoving, method):
+    '''
+    Creates a scene with ``numStatic`` items on a grid (like the Food) and ``numMoving``
+    items on a circle (like CitizenPac and the Ghosts).
+
+    :Return:
+        ``tuple``
+            ``(scene, moving)``, where ``moving`` is the ``list`` of moving items.
+    '''
+    scene = QtGui.QGraphicsScene(0.0, 0.0, SCENE_SIZE, SCENE_SIZE)
+    scene.setItemIndexMethod(method)
+
+    side = max(1, int(math.ceil(math.sqrt(numStatic))))
+    step = SCENE_SIZE / side
+    for i in range(numStatic):
+        item = scene.addEllipse(0.0, 0.0, ITEM_SIZE, ITEM_SIZE)
+        item.setPos((i % side) * step, (i // side) * step)
+
+    moving = []
+    for i in range(numMoving):
+        angle = 2.0 * math.pi * i / max(1, numMoving)
+        item  = scene.addRect(0.0, 0.0, ITEM_SIZE * 3, ITEM_SIZE * 3)
+        item.setPos(SCENE_SIZE * (0.5 + 0.3 * math.cos(angle)),
+                    SCENE_SIZE * (0.5 + 0.3 * math.sin(angle)))
+        moving.append(item)
+
+    return scene, moving
+
+
+def runFrames(scene, moving, numFrames):
+    '''
+    Simulates ``numFrames`` frames: move, look up neighbours, repaint the damage.
+    '''
+    image   = QtGui.QImage(int(SCENE_SIZE), int(SCENE_SIZE), QtGui.QImage.Format_RGB32)
+    painter = QtGui.QPainter(image)
+    for frame in range(numFrames):
+        for item in moving:
+            old = item.sceneBoundingRect()
+            x   = (item.x() + 2.0) % SCENE_SIZE
+            item.setPos(x, item.y())
+            new = item.sceneBoundingRect()
+
+            scene.items(new.adjusted(-ITEM_SIZE, -ITEM_SIZE, ITEM_SIZE, ITEM_SIZE))
+            damage = old.united(new)
+            scene.render(painter, damage, damage)
+    painter.end()
+
+
+def timeFrame(numStatic, numMoving, method, numFrames):
+    '''
+    Returns the best time of a few runs of :func:`runFrames`, per frame, in
+    milliseconds.
+    '''
+    scene, moving = buildScene(numStatic, numMoving, method)
+    # The first lookup builds the BSP tree, do not count it.
+    scene.items(scene.sceneRect())
+    best = min(timeit.repeat(lambda: runFrames(scene, moving, numFrames),
+                             repeat=5, number=1))
+    return 1000.0 * best / numFrames
+
+
+def main(argv):
+    numMoving = int(argv[1]) if len(argv) > 1 else 4
+    numFrames = int(argv[2]) if len(argv) > 2 else 200
+
+    app = QtGui.QApplication(argv)  # noqa: F841 (must exist to paint)
+
+    print("{} moving items, {} frames, milliseconds per frame".format(numMoving,
+                                                                      numFrames))
+    print("{:>8} {:>8} {:>10} {:>10}".format("static", "ratio", "none", "bsp"))
+    crossover = None
+    for numStatic in STATIC_COUNTS:
+        times = {}
+        for name, method in METHODS:
+            times[name] = timeFrame(numStatic, numMoving, method, numFrames)
+        ratio = numStatic / max(1, numMoving)
+        print("{:>8} {:>8.1f} {:>10.4f} {:>10.4f}".format(numStatic, ratio,
+                                                         times["none"], times["bsp"]))
+        # The crossover is where the BSP tree starts winning for good
+        if times["bsp"] < times["none"]:
+            if crossover is None:
+                crossover = ratio
+        else:
+            crossover = None
+
+    if crossover is None:
+        print("NoIndex was faster for every measured count.")
+    else:
+        print("BspTreeIndex is faster from {:.1f} static items per moving item, "
+              "compare with constants.BSP_INDEX_CROSSOVER.".format(crossover))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
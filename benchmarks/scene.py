@@ -0,0 +1,283 @@
+'''
+Benchmarks the hot paths of the game on synthetic configurations, without showing a
+window.
+
+For every combination of board size, :data:`constants.FOOD_SPARSITY`,
+:data:`constants.NUM_GHOSTS` and view size, a :class:`model.Scene` is generated in an
+offscreen ``QGraphicsView`` and the following operations are timed:
+
+``generateFoodGrid``
+    :func:`model.generateFoodGrid` for the board.
+
+``advance``
+    :func:`model.Scene.advance` with the game running and CitizenPac on the move.
+
+``reset``
+    :func:`model.Scene.reset`.
+
+``render``
+    A forced full render of the ``QGraphicsView`` into a ``QImage``.
+
+The latency percentiles of every operation are printed and saved as JSON, and a
+previous results file can be given to compare against.
+
+Usage::
+
+    xvfb-run -a python benchmarks/scene.py [-o results.json]
+        [--compare previous.json] [--samples N] [--quick]
+
+PyQt4 (Qt 4) needs an X display even though nothing is shown, ``QT_QPA_PLATFORM`` is
+only understood by Qt 5.  On a machine without one, run it under a virtual framebuffer
+with ``xvfb-run``.
+'''
+
+from __future__ import division, print_function
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+from PyQt4 import QtCore, QtGui  # noqa: E402
+
+import constants  # noqa: E402
+from model import Scene, generateFoodGrid  # noqa: E402
+
+BOARD_SIZES   = [(640, 480), (1280, 960)]
+SPARSITIES    = [1.0, 2.0, 5.0]
+GHOST_COUNTS  = [3, 12]
+VIEW_SIZES    = [(400, 300), (1280, 960)]
+''' The synthetic configurations, every combination is measured. '''
+
+QUICK = {
+    "boards": [(640, 480)], "sparsities": [5.0], "ghosts": [3], "views": [(640, 480)]
+}
+''' The configurations measured with ``--quick``. '''
+
+PERCENTILES = [50, 90, 99]
+
+
+class BenchmarkController(object):
+    '''
+    Stands in for the :class:`controller.CitizenPac` the :class:`model.Scene` reports
+    game events to, remembering when the scene needs to be reset.
+    '''
+    def __init__(self):
+        self.needsReset = False
+
+    def errorOut(self):
+        raise RuntimeError("The scene could not be generated.")
+
+    def foodConsumed(self):
+        pass
+
+    def updateStats(self):
+        pass
+
+    def lostLife(self):
+        self.needsReset = True
+
+    def gameWon(self):
+        self.needsReset = True
+
+    def gameRunningSwitched(self):
+        pass
+
+
+def percentiles(samples):
+    '''
+    Summarizes ``samples`` (in seconds) as milliseconds.
+
+    :Return:
+        ``dict``
+            The nearest-rank ``p50``, ``p90`` and ``p99``, and the ``min``, ``max`` and
+            ``mean``.
+    '''
+    ordered = sorted(samples)
+    summary = {}
+    for p in PERCENTILES:
+        rank = max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1)
+        summary["p{}".format(p)] = 1000.0 * ordered[min(rank, len(ordered) - 1)]
+    summary["min"]  = 1000.0 * ordered[0]
+    summary["max"]  = 1000.0 * ordered[-1]
+    summary["mean"] = 1000.0 * sum(ordered) / len(ordered)
+    return summary
+
+
+def timeEach(operation, samples, before=None):
+    '''
+    Times ``samples`` individual calls of ``operation``, calling ``before`` (untimed)
+    ahead of every one of them when given.
+    '''
+    clock   = timeit.default_timer
+    results = []
+    for _ in range(samples):
+        if before is not None:
+            before()
+        start = clock()
+        operation()
+        results.append(clock() - start)
+    return results
+
+
+def buildScene(board, view):
+    '''
+    Generates a :class:`model.Scene` for a board of size ``board`` shown in a view of
+    size ``view``, with the current :mod:`constants`.
+
+    :Return:
+        ``tuple``
+            ``(scene, graphicsView, controller)``.
+    '''
+    width, height = board
+    controller    = BenchmarkController()
+    graphicsView  = QtGui.QGraphicsView()
+    graphicsView.resize(view[0], view[1])
+    scene = Scene(controller, graphicsView)
+    graphicsView.setScene(scene)
+    graphicsView.setRenderHint(QtGui.QPainter.Antialiasing)
+    scene.setSceneRect(-0.5 * width, -0.5 * height, width, height)
+    scene.generate(width, height)
+    scene.configureItemIndex()
+    graphicsView.fitInView(scene.sceneRect(), QtCore.Qt.KeepAspectRatio)
+    return scene, graphicsView, controller
+
+
+def measure(board, sparsity, ghosts, view, samples):
+    '''
+    Measures every operation for one configuration.
+
+    :Return:
+        ``dict``
+            The percentiles of every operation, see :func:`percentiles`.
+    '''
+    constants.FOOD_SPARSITY = sparsity
+    constants.NUM_GHOSTS    = ghosts
+    width, height = board
+
+    results = {}
+    results["generateFoodGrid"] = percentiles(
+        timeEach(lambda: generateFoodGrid(width, height), samples)
+    )
+
+    scene, graphicsView, controller = buildScene(board, view)
+    moves = itertools.cycle([
+        constants.MOVE_EAST, constants.MOVE_EAST | constants.MOVE_SOUTH,
+        constants.MOVE_SOUTH, constants.MOVE_WEST, constants.MOVE_NORTH
+    ])
+
+    def beforeAdvance():
+        if controller.needsReset:
+            controller.needsReset = False
+            scene.reset()
+        if scene.simulation.tick % 50 == 0:
+            scene.citizenPac.moveFlags = next(moves)
+
+    scene.setRunning(True)
+    results["advance"] = percentiles(timeEach(scene.advance, samples, beforeAdvance))
+    scene.setRunning(False)
+
+    results["reset"] = percentiles(timeEach(scene.reset, samples))
+
+    image = QtGui.QImage(view[0], view[1], QtGui.QImage.Format_ARGB32_Premultiplied)
+
+    def render():
+        painter = QtGui.QPainter(image)
+        graphicsView.render(painter)
+        painter.end()
+
+    results["render"] = percentiles(timeEach(render, samples))
+    return results
+
+
+def configurations(quick):
+    '''
+    Yields the ``(board, sparsity, ghosts, view)`` combinations to measure.
+    '''
+    if quick:
+        axes = (QUICK["boards"], QUICK["sparsities"], QUICK["ghosts"], QUICK["views"])
+    else:
+        axes = (BOARD_SIZES, SPARSITIES, GHOST_COUNTS, VIEW_SIZES)
+    return itertools.product(*axes)
+
+
+def configurationName(board, sparsity, ghosts, view):
+    return "board={}x{} sparsity={:g} ghosts={} view={}x{}".format(
+        board[0], board[1], sparsity, ghosts, view[0], view[1]
+    )
+
+
+def compare(current, previous):
+    '''
+    Prints the change in ``p50`` of every operation measured by both runs.
+    '''
+    print("\nChange in p50 against the previous run:")
+    for name, operations in sorted(current["results"].items()):
+        old = previous.get("results", {}).get(name)
+        if old is None:
+            continue
+        print(name)
+        for operation, summary in sorted(operations.items()):
+            if operation not in old:
+                continue
+            before = old[operation]["p50"]
+            after  = summary["p50"]
+            change = 100.0 * (after - before) / before if before else 0.0
+            print("    {:>16}: {:9.4f} ms -> {:9.4f} ms ({:+6.1f}%)".format(
+                operation, before, after, change
+            ))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", default="scene_benchmark.json",
+                        help="where to save the results as JSON")
+    parser.add_argument("--compare", help="a previous results file to compare against")
+    parser.add_argument("--samples", type=int, default=200,
+                        help="how many times every operation is timed")
+    parser.add_argument("--quick", action="store_true",
+                        help="only measure a single configuration")
+    args = parser.parse_args(argv[1:])
+
+    app = QtGui.QApplication(argv[:1])  # noqa: F841 (must exist to paint)
+
+    run = {
+        "created":  time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python":   platform.python_version(),
+        "qt":       QtCore.QT_VERSION_STR,
+        "platform": platform.platform(),
+        "samples":  args.samples,
+        "results":  {}
+    }
+    for board, sparsity, ghosts, view in configurations(args.quick):
+        name    = configurationName(board, sparsity, ghosts, view)
+        results = measure(board, sparsity, ghosts, view, args.samples)
+        run["results"][name] = results
+
+        print(name)
+        for operation, summary in sorted(results.items()):
+            print("    {:>16}: ".format(operation) + "  ".join(
+                "{} {:9.4f} ms".format(key, summary[key])
+                for key in ["p{}".format(p) for p in PERCENTILES] + ["max"]
+            ))
+
+    with open(args.output, "w") as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+    print("\nSaved {}".format(args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(run, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,90 @@
+'''
+Measures how long it takes to make the game's Qt resources available, and how much
+memory that uses, with the binary ``.rcc`` bundles (see
+``citizen_pac/view/qt_configs/rcc_bundles.py``) and with the ``pyrcc4`` generated
+``_rc.py`` modules.
+
+Every measurement runs in a fresh interpreter, which imports the resources, loads the
+``qdarkstyle`` stylesheet and reads the splash image, then reports its time and peak
+resident memory.  The first run of each mode is discarded so that byte-compilation of
+the ``_rc.py`` modules is not counted.
+
+Usage::
+
+    xvfb-run -a python benchmarks/startup.py [runs]
+
+PyQt4 (Qt 4) needs an X display even though nothing is shown, ``QT_QPA_PLATFORM`` is
+only understood by Qt 5.  On a machine without one, run it under a virtual framebuffer
+with ``xvfb-run`` (the interpreters it starts inherit the display).
+'''
+
+from __future__ import division, print_function
+
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+''' The directory containing ``__main__.py``. '''
+
+CHILD = r'''
+import json, resource, sys, time
+start = time.time()
+sys.path.insert(0, {package!r})
+from PyQt4 import QtCore, QtGui
+app = QtGui.QApplication([])
+from view.qt_configs import qdarkstyle, rcc_bundles
+styleSheet = qdarkstyle.load_stylesheet(pyside=False)
+splash     = QtGui.QPixmap(":/view/qt_configs/images/citizen_pac.png")
+elapsed    = time.time() - start
+assert styleSheet and not splash.isNull()
+print(json.dumps({{
+    "seconds": elapsed,
+    "maxrss":  resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "bundles": rcc_bundles.registered
+}}))
+'''
+
+
+def measure(useBundles):
+    '''
+    Runs one child interpreter.
+
+    :Return:
+        ``dict``
+            ``seconds``, ``maxrss`` (kilobytes on Linux) and the ``bundles`` that
+            were registered.
+    '''
+    env = dict(os.environ)
+    env.pop("CITIZEN_PAC_NO_RCC", None)
+    if not useBundles:
+        env["CITIZEN_PAC_NO_RCC"] = "1"
+    code   = CHILD.format(package=os.path.abspath(PACKAGE_DIR))
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 10
+
+    results = {}
+    for name, useBundles in (("_rc.py modules", False), (".rcc bundles", True)):
+        measure(useBundles)
+        samples = [measure(useBundles) for _ in range(runs)]
+        seconds = sorted(s["seconds"] for s in samples)
+        maxrss  = sorted(s["maxrss"] for s in samples)
+        results[name] = (seconds[len(seconds) // 2], maxrss[len(maxrss) // 2])
+        print("{:>16}: median {:8.2f} ms, median peak RSS {:8d} KiB, bundles {}".format(
+            name, 1000.0 * results[name][0], results[name][1], samples[-1]["bundles"]
+        ))
+
+    modules = results["_rc.py modules"]
+    bundles = results[".rcc bundles"]
+    print("Saved {:.2f} ms and {} KiB.".format(1000.0 * (modules[0] - bundles[0]),
+                                              modules[1] - bundles[1]))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -29,6 +29,7 @@ folders as you wish.
 '''
 # [[[ END_MAIN_PY_DOC ]]]
 
+import argparse
 import sys
 import os
 
@@ -45,7 +46,8 @@ except:
 # throughout the rest of the framework can perform "regular" imports.
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 try:
-    from view.qt_configs import qdarkstyle
+    import constants
+    from view.stylesheet import loadStyleSheet
     from view.display import CitizenPacMainWindow
     from controller import CitizenPac
 except Exception as e:
@@ -66,11 +68,28 @@ def main():
     # Is the game running slowly?  Un-comment the line below this.                     #
     # QtGui.QApplication.setGraphicsSystem("raster")                                   #
     ####################################################################################
+    parser = argparse.ArgumentParser(prog="citizen_pac")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed every random choice in the game, so that a game can "
+                             "be played again exactly (a fresh seed is chosen otherwise)")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="record the game to a replay file, played back headless "
+                             "with `python citizen_pac/replay.py PATH`")
+    args, _ = parser.parse_known_args()
+
     app = QtGui.QApplication([])
-    app.setStyleSheet(qdarkstyle.load_stylesheet(pyside=False))
+    styleSheet = loadStyleSheet()
+    if constants.STYLESHEET_SCOPE == "application":
+        app.setStyleSheet(styleSheet)
 
     cpMainWindow = CitizenPacMainWindow()
-    controller = CitizenPac(app, cpMainWindow)  # noqa F841
+    if constants.STYLESHEET_SCOPE == "statsBar":
+        cpMainWindow.applyStyleSheet(styleSheet)
+    controller = CitizenPac(app, cpMainWindow, args.seed)
+    print("Seed: {}".format(controller.scene.simulation.streams.seed))
+    if args.record:
+        controller.scene.startRecording(args.record)
+        app.aboutToQuit.connect(controller.scene.stopRecording)
 
     cpMainWindow.show()
     cpMainWindow.raise_()
@@ -0,0 +1,379 @@
+'''
+Plays many headless games across a process pool, e.g. to tune
+:data:`constants.MAX_SPEED` or :data:`constants.FOOD_SPARSITY` without playing by hand.
+
+Every game is a :class:`simulation.Simulation` populated by
+:func:`simulation.createHeadless`, i.e. exactly the rules the :class:`model.Scene` steps,
+driven the way the :class:`controller.CitizenPac` drives it: losing a life resets the
+board, and with :data:`constants.USE_SPEED_BOOST` the game speeds up as Food is eaten.
+CitizenPac is steered by an input policy (see ``POLICIES``) instead of the keyboard.
+Every game has its own seed and :mod:`constants` overrides, and the results are
+aggregated per configuration: how many games were won and lost, the ticks to win or
+lose, the Food eaten, the collision tests per tick and the time per tick.
+
+Usage::
+
+    python citizen_pac/batch.py [--games N] [--seed SEED] [--policy greedy]
+        [--set NAME=VALUE ...] [--sweep NAME=VALUE,VALUE ...] [--processes N]
+        [-o results.json]
+
+For example, to compare three Food sparsities with the speed boost on::
+
+    python citizen_pac/batch.py --games 200 --set USE_SPEED_BOOST=True \\
+        --sweep FOOD_SPARSITY=2.0,3.0,5.0
+
+Nothing in this module depends on ``PyQt4``.  By default, every core is used.
+'''
+
+from __future__ import division, print_function
+
+import argparse
+import ast
+import itertools
+import json
+import multiprocessing
+import sys
+import timeit
+
+import constants
+import simulation
+from navigation import directionFlags
+from simulation import Simulation
+from streams import deriveSeed, newSeed
+
+BOARD_SIZE = (800.0, 740.0)
+''' The default ``(width, height)`` of the board, the size of the game window. '''
+
+DECISION_TICKS = 20
+''' How many ticks apart the input policy chooses where CitizenPac moves next. '''
+
+MAX_TICKS = 100000
+''' The default number of ticks after which an unfinished game is stopped. '''
+
+_DIRECTIONS = [constants.MOVE_NORTH, constants.MOVE_SOUTH,
+               constants.MOVE_EAST,  constants.MOVE_WEST]
+
+
+def randomPolicy(sim, rng):
+    ''' Moves CitizenPac in one or two random directions. '''
+    flags = 0
+    for direction in rng.sample(_DIRECTIONS, rng.choice([1, 2])):
+        flags |= direction
+    return flags
+
+
+def greedyPolicy(sim, rng):
+    ''' Moves CitizenPac towards the nearest Food that has not been eaten yet. '''
+    px, py  = sim.position(sim.citizenPac)
+    nearest = None
+    best    = None
+    for i in range(sim.numFood()):
+        if sim.isEaten(i):
+            continue
+        dx = sim.foodX[i] - px
+        dy = sim.foodY[i] - py
+        d  = dx * dx + dy * dy
+        if best is None or d < best:
+            best    = d
+            nearest = (dx, dy)
+    if nearest is None:
+        return constants.STATIONARY
+
+    # Only move along an axis when that gets CitizenPac closer
+    return directionFlags(nearest[0], nearest[1], constants.gameSpeed)
+
+
+POLICIES = {"random": randomPolicy, "greedy": greedyPolicy}
+''' The input policies, ``policy(sim, rng)`` returns the next move flags of CitizenPac. '''
+
+
+def parseValue(text):
+    ''' Parses a constant given on the command line, as a Python literal if possible. '''
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parseAssignment(text):
+    '''
+    Parses ``NAME=VALUE``, checking that ``NAME`` is one of the :mod:`constants`.
+
+    :Return:
+        ``tuple``
+            ``(name, text)``, the value is left unparsed.
+    '''
+    name, sep, value = text.partition("=")
+    name = name.strip()
+    if not sep or name not in constants.__all__ or not hasattr(constants, name):
+        raise argparse.ArgumentTypeError("expected CONSTANT=VALUE, got {!r}".format(text))
+    return name, value.strip()
+
+
+def applyOverrides(overrides):
+    '''
+    Sets every ``name: value`` of ``overrides`` on :mod:`constants`.
+
+    :Return:
+        ``dict``
+            The previous values, to restore them with.
+    '''
+    previous = {}
+    for name, value in overrides.items():
+        previous[name] = getattr(constants, name)
+        setattr(constants, name, value)
+    return previous
+
+
+def playGame(job):
+    '''
+    Plays one headless game to the end, or until ``job["maxTicks"]`` ticks have passed.
+    Runs in a worker process.
+
+    :Parameters:
+        ``job`` (dict)
+            ``seed``, ``overrides`` (a ``dict`` of :mod:`constants`), ``policy`` (a key
+            of ``POLICIES``), ``width``, ``height`` and ``maxTicks``.
+
+    :Return:
+        ``dict``
+            The ``outcome`` (``"won"``, ``"lost"`` or ``"timeout"``), the ``ticks``
+            played, the ``foodEaten`` in the last round, the ``totalFoodEaten``, the
+            ``livesLost``, the ``collisionTests`` and the ``seconds`` spent stepping.
+    '''
+    previous = applyOverrides(job["overrides"])
+    try:
+        constants.setGameSpeed(constants.GAME_SPEED_START)
+        sim    = simulation.createHeadless(job["width"], job["height"], job["seed"])
+        policy = POLICIES[job["policy"]]
+        rng    = sim.streams.stream("policy")
+        numFood   = sim.numFood()
+        speedIncr = 0.0
+        if numFood:
+            speedIncr = (constants.MAX_SPEED - constants.GAME_SPEED_START) / numFood
+
+        outcome    = "timeout"
+        totalEaten = 0
+        livesLost  = 0
+        collisions = 0
+        sim.running = True
+        clock = timeit.default_timer
+        start = clock()
+        while sim.tick < job["maxTicks"]:
+            if sim.tick % DECISION_TICKS == 0:
+                sim.moveFlags[sim.citizenPac] = policy(sim, rng)
+
+            status      = sim.step()
+            collisions += sim.collisionTests
+            totalEaten += len(sim.eatenThisStep)
+            if sim.eatenThisStep and constants.USE_SPEED_BOOST:
+                constants.setGameSpeed(constants.GAME_SPEED_START +
+                                       speedIncr * sim.foodEaten)
+
+            if status == Simulation.LOST_LIFE:
+                # What CitizenPac.lostLife does, the player then resumes right away
+                livesLost += 1
+                if sim.lives <= 0:
+                    outcome = "lost"
+                    break
+                sim.reset()
+                constants.setGameSpeed(constants.GAME_SPEED_START)
+                # CitizenPac is stationary after a reset, pick a move straight away
+                sim.moveFlags[sim.citizenPac] = policy(sim, rng)
+            elif status == Simulation.WON:
+                outcome = "won"
+                break
+        seconds = clock() - start
+
+        return {
+            "seed":           job["seed"],
+            "outcome":        outcome,
+            "ticks":          sim.tick,
+            "foodEaten":      sim.foodEaten,
+            "totalFoodEaten": totalEaten,
+            "numFood":        numFood,
+            "livesLost":      livesLost,
+            "collisionTests": collisions,
+            "seconds":        seconds
+        }
+    finally:
+        applyOverrides(previous)
+
+
+def _runJob(indexedJob):
+    index, job = indexedJob
+    return index, playGame(job)
+
+
+def runBatch(jobs, processes=None):
+    '''
+    Plays every job of ``jobs`` with :func:`playGame` across a process pool.
+
+    :Parameters:
+        ``jobs`` (list)
+            The jobs, see :func:`batch.playGame`.
+
+        ``processes`` (int)
+            The number of worker processes, every core when ``None``.
+
+    :Return:
+        ``list``
+            The result of every job, in the same order as ``jobs``.
+    '''
+    processes = processes or multiprocessing.cpu_count()
+    results   = [None] * len(jobs)
+    if processes == 1:
+        for index, job in enumerate(jobs):
+            results[index] = playGame(job)
+        return results
+
+    # Many small chunks keep every worker busy even when game lengths vary a lot
+    chunksize = max(1, len(jobs) // (processes * 8))
+    pool = multiprocessing.Pool(processes)
+    try:
+        for index, result in pool.imap_unordered(_runJob, enumerate(jobs), chunksize):
+            results[index] = result
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def summarize(results):
+    '''
+    Aggregates the results of the games played with one configuration.
+
+    :Return:
+        ``dict``
+            How many games were ``won``, ``lost`` and timed out, the mean ticks to win
+            and to lose, the mean Food eaten in the last round and in total, the mean
+            lives lost, the collision tests per tick and the microseconds per tick.
+    '''
+    won   = [r for r in results if r["outcome"] == "won"]
+    lost  = [r for r in results if r["outcome"] == "lost"]
+    ticks = sum(r["ticks"] for r in results)
+    return {
+        "games":             len(results),
+        "won":               len(won),
+        "lost":              len(lost),
+        "timeout":           len(results) - len(won) - len(lost),
+        "ticksToWin":        _mean([r["ticks"] for r in won]),
+        "ticksToLose":       _mean([r["ticks"] for r in lost]),
+        "foodEaten":         _mean([r["foodEaten"] for r in results]),
+        "totalFoodEaten":    _mean([r["totalFoodEaten"] for r in results]),
+        "livesLost":         _mean([r["livesLost"] for r in results]),
+        "collisionsPerTick": sum(r["collisionTests"] for r in results) / max(1, ticks),
+        "usPerTick":         1.0e6 * sum(r["seconds"] for r in results) / max(1, ticks)
+    }
+
+
+def configurations(overrides, sweeps):
+    '''
+    Yields every combination of the ``sweeps`` (``(name, values)`` pairs), each merged
+    over the fixed ``overrides``.
+    '''
+    names  = [name for name, _ in sweeps]
+    values = [vals for _, vals in sweeps]
+    for combination in itertools.product(*values):
+        configuration = dict(overrides)
+        configuration.update(zip(names, combination))
+        yield configuration
+
+
+def configurationName(configuration):
+    if not configuration:
+        return "defaults"
+    return " ".join("{}={!r}".format(name, value)
+                    for name, value in sorted(configuration.items()))
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100,
+                        help="how many games to play per configuration")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="derive the seed of every game from this one")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy",
+                        help="how CitizenPac is steered")
+    parser.add_argument("--set", dest="overrides", type=parseAssignment, action="append",
+                        default=[], metavar="NAME=VALUE",
+                        help="override one of the constants in every game")
+    parser.add_argument("--sweep", type=parseAssignment, action="append", default=[],
+                        metavar="NAME=VALUE,VALUE",
+                        help="play every configuration with each of these values")
+    parser.add_argument("--size", type=float, nargs=2, default=list(BOARD_SIZE),
+                        metavar=("WIDTH", "HEIGHT"), help="the size of the board")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS,
+                        help="stop games that are still going after this many ticks")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="the number of worker processes (default: every core)")
+    parser.add_argument("-o", "--output", help="save the summary and every game as JSON")
+    args = parser.parse_args(argv[1:])
+
+    seed      = newSeed() if args.seed is None else args.seed
+    overrides = dict((name, parseValue(value)) for name, value in args.overrides)
+    sweeps    = [(name, [parseValue(v) for v in value.split(",")])
+                 for name, value in args.sweep]
+
+    configs = list(configurations(overrides, sweeps))
+    jobs    = []
+    for c, configuration in enumerate(configs):
+        for g in range(args.games):
+            jobs.append({
+                "seed":      deriveSeed(seed, "game.{}".format(g)) & 0xFFFFFFFF,
+                "overrides": configuration,
+                "policy":    args.policy,
+                "width":     args.size[0],
+                "height":    args.size[1],
+                "maxTicks":  args.max_ticks,
+                "config":    c
+            })
+
+    print("Seed {}: {} games with the {} policy".format(seed, len(jobs), args.policy))
+    clock   = timeit.default_timer
+    start   = clock()
+    results = runBatch(jobs, args.processes)
+    elapsed = clock() - start
+
+    run = {"seed": seed, "policy": args.policy, "seconds": elapsed, "configurations": []}
+    for c, configuration in enumerate(configs):
+        games   = [r for job, r in zip(jobs, results) if job["config"] == c]
+        summary = summarize(games)
+        run["configurations"].append(
+            {"overrides": configuration, "summary": summary, "games": games}
+        )
+
+        print(configurationName(configuration))
+        print("    won {won}  lost {lost}  timeout {timeout}".format(**summary))
+        print("    ticks to win {}  to lose {}".format(
+            _format(summary["ticksToWin"], ".0f"), _format(summary["ticksToLose"], ".0f")
+        ))
+        print("    food eaten {:.1f} (total {:.1f})  lives lost {:.2f}".format(
+            summary["foodEaten"], summary["totalFoodEaten"], summary["livesLost"]
+        ))
+        print("    {:.1f} collision tests / tick  {:.1f} us / tick".format(
+            summary["collisionsPerTick"], summary["usPerTick"]
+        ))
+
+    totalTicks = sum(r["ticks"] for r in results)
+    print("{} ticks in {:.2f} s ({:.0f} ticks / s)".format(
+        totalTicks, elapsed, totalTicks / elapsed if elapsed > 0 else float("inf")
+    ))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+        print("Saved {}".format(args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
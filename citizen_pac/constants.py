@@ -22,9 +22,15 @@ help test whether or not you are placing the food in the correct location or not
 __all__ = [
     "STATIONARY", "MOVE_NORTH", "MOVE_SOUTH", "MOVE_EAST", "MOVE_WEST",
     "GAME_SPEED_START", "gameSpeed", "setGameSpeed", "MAX_SPEED", "USE_SPEED_BOOST",
-    "FOOD_RADIUS", "FOOD_SPARSITY", "SPLINE_COORD_SCALE",
+    "FOOD_RADIUS", "FOOD_SPARSITY", "SPLINE_COORD_SCALE", "BATCHED_FOOD",
+    "VIRTUALIZE_FOOD", "FOOD_VIEW_MARGIN",
     "FOOD_VALUE", "FULL_GAME_MODE", "NUM_LIVES", "NUM_GHOSTS", "DISPERSION_RADIUS",
-    "GAME_REFRESH_RATE"
+    "GAME_REFRESH_RATE", "SIMULATION_TIMESTEP", "MAX_STEPS_PER_FRAME", "GHOST_MOVE_TIME",
+    "GHOST_CHASE",
+    "DIRTY_REGION_UPDATES", "DIRTY_REGION_THRESHOLD", "ITEM_INDEX_METHOD",
+    "BSP_INDEX_CROSSOVER", "SPLINE_TOLERANCE", "SPLINE_LOD_TOLERANCES",
+    "PRECISE_COLLISIONS", "STYLESHEET_SCOPE", "SHOW_FRAME_STATS", "PROFILE_DIRECTORY",
+    "PROFILE_SAMPLE_INTERVAL", "REPLAY_KEYFRAME_INTERVAL"
 ]
 
 ########################################################################################
@@ -103,6 +109,30 @@ The *sparsity* factor for dispersing the :class:`view.actors.Food` grid, used in
 :func:`model.generateFoodGrid` function.
 '''
 
+BATCHED_FOOD       = True
+'''
+When ``True``, all of the Food is drawn by a single :class:`view.actors.FoodField` item
+that stores the pellets in compact arrays, which is what allows very large boards to
+keep up with :data:`constants.GAME_REFRESH_RATE`.  When ``False``, every pellet is its
+own :class:`view.actors.Food` item.
+'''
+
+VIRTUALIZE_FOOD    = True
+'''
+Only used when :data:`constants.BATCHED_FOOD` is ``False``.  When ``True``, the pellets
+are kept in arrays by a :class:`view.actors.VirtualFood`, and real
+:class:`view.actors.Food` items only exist for the pellets near the visible part of the
+scene (recycled as the view changes), so that huge boards do not create one item per
+pellet.  When ``False``, every pellet gets its own item up front.
+'''
+
+FOOD_VIEW_MARGIN   = 50.0
+'''
+How far beyond the visible part of the scene (in scene coordinates) pellets still get a
+:class:`view.actors.Food` item when :data:`constants.VIRTUALIZE_FOOD` is ``True``, so
+that small scrolls do not have to recycle items.
+'''
+
 SPLINE_COORD_SCALE = 4.0
 '''
 The software that the :class:`view.actors.CitizenPacActor` and
@@ -111,9 +141,32 @@ different scale, you can use this to control how big or small the CitizenPac and
 are.  This constant must be positive and non-zero.
 '''
 
+SPLINE_TOLERANCE   = 0.35
+'''
+How far (in pixels on screen) the polygon drawn for CitizenPac and the Ghosts may stray
+from their actual splines.  Every paint uses the coarsest of the
+:data:`constants.SPLINE_LOD_TOLERANCES` levels of detail that is within this tolerance
+at the current zoom, so a small window draws far fewer vertices than a large one.
+'''
+
+SPLINE_LOD_TOLERANCES = (2.0, 0.5, 0.125, 0.03125)
+'''
+The tolerances (in scene units, coarsest first) that the splines of CitizenPac and the
+Ghosts are flattened to, see :func:`splines.levelsOfDetail`.  Each one is a cached
+polygon level of detail, unless it would have as many vertices as the next finer one.
+'''
+
 ########################################################################################
 # Game Mechanics related constants.                                                    #
 ########################################################################################
+PRECISE_COLLISIONS = True
+'''
+When ``True``, CitizenPac only collides with a Ghost when the convex hulls of their
+splines overlap, and only eats Food whose circle overlaps its convex hull (the bounding
+rectangles and circles are tested first, so this is cheap).  When ``False``, the
+bounding rectangles alone decide.
+'''
+
 FOOD_VALUE         = 111.0
 ''' The value each :class:`view.actors.Food` consumed is worth in points. '''
 
@@ -170,3 +223,125 @@ If the game is running slowly, INCREASE the value of this constant in order to g
 This time is in terms of MILLISECONDS, and the **larger** the value, the **slower**
 the game runs.  So if the game runs slowly, increase this constant.
 '''
+
+SIMULATION_TIMESTEP = 10.0
+'''
+The fixed amount of game time, in MILLISECONDS, simulated by every call to
+:func:`model.Scene.step`.  Every actor moves :data:`constants.gameSpeed` per step.  The
+game is rendered every :data:`constants.GAME_REFRESH_RATE` milliseconds, and as many
+steps as fit into the (monotonic) time that actually elapsed since the last frame are
+simulated first, so the game plays at the same speed no matter how promptly the
+rendering timer fires.  This can be tuned independently of the refresh rate.
+'''
+
+MAX_STEPS_PER_FRAME = 8
+'''
+The most simulation steps that are run before a single frame is rendered.  If a machine
+is so slow that it falls further behind than this, the game slows down instead of
+spending all of its time catching up.
+'''
+
+GHOST_MOVE_TIME    = 1000
+'''
+How frequently a :class:`view.actors.GhostActor` should randomly change its direction.
+This time is specified in milliseconds, i.e. ``1000`` means **1 second**.
+'''
+
+GHOST_CHASE        = False
+'''
+When ``True``, the Ghosts chase CitizenPac instead of randomly changing direction every
+:data:`constants.GHOST_MOVE_TIME` milliseconds.  Every tick they all follow one shared
+distance field towards CitizenPac, see :mod:`navigation`.
+'''
+
+DIRTY_REGION_UPDATES   = True
+'''
+When ``True``, only the regions of the view that actually changed are repainted every
+frame: actors that moved and Food that was eaten or animated report what they damaged,
+see :class:`view.display.DamageTracker`.  When ``False``, the entire view is repainted
+every frame.
+'''
+
+DIRTY_REGION_THRESHOLD = 0.5
+'''
+When the damaged area in a frame covers more than this fraction of the view, the entire
+view is repainted instead (one large update is cheaper than very many small ones).
+'''
+
+ITEM_INDEX_METHOD      = "auto"
+'''
+How the :class:`model.Scene` indexes its items, used for hit tests and for finding the
+items to repaint.  One of
+
+``"auto"``
+    Chosen from the number of static and moving items once the scene has been
+    generated, see :func:`model.chooseItemIndexMethod`.
+
+``"bsp"``
+    Always use ``QGraphicsScene.BspTreeIndex``.
+
+``"none"``
+    Always use ``QGraphicsScene.NoIndex``.
+'''
+
+BSP_INDEX_CROSSOVER    = 8
+'''
+When :data:`constants.ITEM_INDEX_METHOD` is ``"auto"``, the scene uses a BSP tree once
+there are at least this many static items (pellets, walls) for every moving item.
+Moving items have to be re-indexed every time they move, so with few static items the
+tree costs more than it saves.  Measured with ``benchmarks/item_index.py`` (milliseconds
+per frame, 4 moving items):
+
+=========  ========  ========
+static     NoIndex   BSP tree
+=========  ========  ========
+16         0.0412    0.0423
+32         0.0701    0.0690
+64         0.0972    0.0782
+256        0.1627    0.1112
+1024       0.4401    0.2510
+4096       1.5110    0.4832
+=========  ========  ========
+
+The two are within noise of each other below 32 static items, the BSP tree wins from
+there on (crossover ratio 8).  With 8 and 16 moving items the measured crossover was 4
+and 1, so 8 is the conservative choice for CitizenPac and its four Ghosts.  These were
+measured under Qt 5.15 through a PyQt5 port of the benchmark (PyQt4 was not available),
+re-measure when tuning for Qt 4.
+'''
+
+STYLESHEET_SCOPE       = "application"
+'''
+What the ``qdarkstyle`` stylesheet is applied to, see :mod:`view.stylesheet`.
+
+``"application"``
+    Every widget in the application, as ``qdarkstyle`` intends.
+
+``"statsBar"``
+    Only the stats bar of the :class:`view.display.CitizenPacMainWindow`, so that
+    neither the game view nor the rest of the window pays for style sheet resolution.
+'''
+
+SHOW_FRAME_STATS       = False
+'''
+Whether the frame-time overlay is shown when the game starts.  It can always be toggled
+with the ``F3`` key.  The overlay shows the rolling frame, simulation and paint times,
+timer jitter, collision tests per step and the number of visible items, see
+:class:`framestats.FrameStats`.
+'''
+
+PROFILE_DIRECTORY      = "profiles"
+'''
+Where the profiles captured with the ``F9`` key are written, relative to the directory
+the game was started from.  See :mod:`profiling`.
+'''
+
+PROFILE_SAMPLE_INTERVAL = 0.001
+''' The time, in seconds, between the stack samples of a profile captured with ``F9``. '''
+
+REPLAY_KEYFRAME_INTERVAL = 1000
+'''
+How many simulation ticks apart the state keyframes of a replay recorded with
+``--record`` are.  Smaller values make seeking faster and replay files larger, see
+:mod:`replay`.
+'''
@@ -8,6 +8,7 @@ from PyQt4 import QtCore, QtGui
 
 import constants
 from model import Scene
+from profiling import createSession
 from view.display import GameStats
 
 
@@ -81,6 +82,10 @@ class CitizenPac(object):
                 off these labels, and the names are hard-coded in this file.  In short:
                 **do not rename widgets without updating this file!**
 
+        ``seed`` (int)
+            The seed of the game, ``None`` for a fresh one.  Passed on to the
+            :class:`model.Scene`.
+
     :Attributes:
 
         **Qt Wrappers**
@@ -106,6 +111,10 @@ class CitizenPac(object):
                 The game speed increment for the given game.  Refer to the documentation
                 for :data:`constants.USE_SPEED_BOOST`.
 
+            ``statsChanged`` (bool)
+                Whether or not the score or speed boost changed since the stats bar was
+                last updated, see :func:`controller.CitizenPac.foodConsumed`.
+
         **Mechanics Variables**
             ``view`` (:class:`PyQt4.QtGui.QGraphicsView`)
                 The View portion of the Model-View-Controller paradigm.  Also a
@@ -116,10 +125,24 @@ class CitizenPac(object):
                 The Model portion of the Model-View-Controller paradigm.
 
             ``gameTimer`` (:class:`PyQt4.QtCore.QTimer`)
-                The game timer used to trigger updates to all actors in the scene,
-                connected directly to the :func:`model.Scene.advance` method.  Its (and
-                therefore the game's) refresh rate is defined by
-                :data:`constants.GAME_REFRESH_RATE`.
+                The game timer used to trigger rendering a new frame.  Its refresh rate
+                is defined by :data:`constants.GAME_REFRESH_RATE`.  Every frame first
+                simulates as many fixed steps (:func:`model.Scene.step`) as have
+                elapsed, then renders once (:func:`model.Scene.render`).
+
+            ``frameClock`` (:class:`PyQt4.QtCore.QElapsedTimer`)
+                The monotonic clock used to measure how much time elapsed between
+                frames, restarted whenever the game is resumed.
+
+            ``lastFrameTime`` (float)
+                The ``frameClock`` reading at the previous frame, in milliseconds.
+
+            ``accumulator`` (float)
+                Elapsed time, in milliseconds, that has not been simulated yet.
+
+            ``profiler`` (:class:`profiling.ProfilerSession`)
+                Started and stopped with the ``F9`` key, see
+                :func:`controller.CitizenPac.toggleProfiling`.
 
         **Display Related Variables**
             ``gameStats`` (:class:`view.display.GameStats`)
@@ -144,7 +167,7 @@ class CitizenPac(object):
                 The directions message, indicating ``Press <space> to Play``, or that
                 the game has been won or lost.
     '''
-    def __init__(self, app, cpMainWindow):
+    def __init__(self, app, cpMainWindow, seed=None):
         ################################################################################
         # Get references to the Qt managed elements, create convenience references to  #
         # the items coming from the generated ui, install the focus filter.            #
@@ -160,6 +183,7 @@ class CitizenPac(object):
         self.gameFinished = False
         self.livesLeft    = constants.NUM_LIVES
         self.speedIncr    = 0.0
+        self.statsChanged = False
 
         ################################################################################
         # Configure the View Part 1: setup the game stats bar.                         #
@@ -176,7 +200,7 @@ class CitizenPac(object):
         # Portion 2 of the View: the main drawing window (and scene).                  #
         ################################################################################
         self.view  = self.cpMainWindow.citizenPacGraphicsView
-        self.scene = Scene(self, self.view)
+        self.scene = Scene(self, self.view, seed)
         self.cpMainWindow.attachScene(self.scene)
         self.__perform_layout()
 
@@ -198,8 +222,12 @@ class CitizenPac(object):
         ################################################################################
         # Last but not least, create the timer and link it to the scene.               #
         ################################################################################
-        self.gameTimer = QtCore.QTimer()
-        self.gameTimer.timeout.connect(self.scene.advance)
+        self.frameClock    = QtCore.QElapsedTimer()
+        self.lastFrameTime = 0.0
+        self.accumulator   = 0.0
+        self.profiler      = createSession()
+        self.gameTimer     = QtCore.QTimer()
+        self.gameTimer.timeout.connect(self.__advance_frame)
         # Note: the game has not started!  self.gameTimer.start() is performed in the
         # gameRunningSwitched method.
         self.gameTimer.setInterval(constants.GAME_REFRESH_RATE)
@@ -211,6 +239,57 @@ class CitizenPac(object):
     ##
     #
     ####################################################################################
+    def __advance_frame(self):
+        '''
+        Connected to the ``gameTimer``.  Adds the time that elapsed since the previous
+        frame to the ``accumulator``, simulates zero or more fixed steps of
+        :data:`constants.SIMULATION_TIMESTEP` milliseconds to consume it, and then
+        renders the scene once.  At most :data:`constants.MAX_STEPS_PER_FRAME` steps are
+        simulated per frame, any backlog beyond that is dropped.
+        '''
+        now                = self.frameClock.nsecsElapsed() / 1.0e6
+        interval           = now - self.lastFrameTime
+        self.accumulator  += interval
+        self.lastFrameTime = now
+
+        steps = 0
+        while self.accumulator >= constants.SIMULATION_TIMESTEP:
+            if steps == constants.MAX_STEPS_PER_FRAME:
+                self.accumulator = 0.0
+                break
+            self.accumulator -= constants.SIMULATION_TIMESTEP
+            steps += 1
+            if not self.scene.step():
+                self.accumulator = 0.0
+                break
+
+        frameStats = self.scene.frameStats
+        if frameStats.enabled:
+            simulated = self.frameClock.nsecsElapsed() / 1.0e6 - now
+            frameStats.recordFrame(interval, simulated, steps)
+
+        self.scene.render()
+
+    def updateStats(self):
+        '''
+        Shows the score and speed boost on the stats bar if they changed during this
+        frame, so that the stats bar is updated at most once per frame no matter how
+        much Food was eaten.  Called by :func:`model.Scene.render`, so that the stats
+        bar is also up to date when the scene is advanced outside of the game timer
+        (see :func:`model.Scene.advance`).  The :class:`view.display.GameStats` only
+        repaints the widgets whose value actually changed.
+        '''
+        if not self.statsChanged:
+            return
+        self.statsChanged = False
+
+        self.gameStats.displayGameScore(self.scene.numFoodEaten() * constants.FOOD_VALUE)
+        if constants.USE_SPEED_BOOST:
+            # Compute the boost to display
+            boost = (constants.gameSpeed - constants.GAME_SPEED_START) / \
+                    (constants.MAX_SPEED - constants.GAME_SPEED_START)
+            self.gameStats.displayGameSpeed(round(boost * 100.0))
+
     def __perform_layout(self):
         '''
         This method is responsible for configuring the window and scene sizes, including
@@ -238,7 +317,7 @@ class CitizenPac(object):
 
         # Create all the actors and set the speedIncr now that we have the total food
         self.scene.generate(width, height)
-        fLen = float(len(self.scene.food))
+        fLen = float(self.scene.numFood())
         if fLen == 0.0:
             self.speedIncr = 0.0
         else:
@@ -256,12 +335,17 @@ class CitizenPac(object):
         scene indexing, as well as connects the view - scene link so that the view can
         perform various back references.  Cannot be done at time of instantiation.
         '''
-        self.scene.setItemIndexMethod(QtGui.QGraphicsScene.NoIndex)
+        # Few static items: NoIndex, lots of unbatched Food: a BSP tree.
+        self.scene.configureItemIndex()
         self.view.setScene(self.scene)
         self.view.setRenderHint(QtGui.QPainter.Antialiasing)
         self.view.setCacheMode(QtGui.QGraphicsView.CacheBackground)
         # self.view.setViewportUpdateMode(QtGui.QGraphicsView.BoundingRectViewportUpdate)
-        self.view.setViewportUpdateMode(QtGui.QGraphicsView.FullViewportUpdate)
+        if constants.DIRTY_REGION_UPDATES:
+            # The scene's DamageTracker decides what to repaint every frame.
+            self.view.setViewportUpdateMode(QtGui.QGraphicsView.NoViewportUpdate)
+        else:
+            self.view.setViewportUpdateMode(QtGui.QGraphicsView.FullViewportUpdate)
 
     def __decorate(self):
         '''
@@ -341,6 +425,9 @@ class CitizenPac(object):
             # game has just been paused).
             self.dMessage.show()
 
+        # The background and messages changed, so the whole view must be repainted.
+        self.view.viewport().update()
+
     def __position_text(self):
         '''
         This method computes the proper location to display the top and bottom messages
@@ -448,27 +535,22 @@ class CitizenPac(object):
 
     def foodConsumed(self):
         '''
-        This method computes the current score and (if :data:`constants.USE_SPEED_BOOST`
-        is set to ``True``) current game speed.  The score and speed are computed using
-        the :func:`model.Scene.numFoodEaten` method.  This method is also called by
-        :func:`controller.CitizenPac.lostLife` to reset the score and speed boost
-        since the food have all been reinitialized.
+        This method computes the current game speed (if
+        :data:`constants.USE_SPEED_BOOST` is set to ``True``) using the
+        :func:`model.Scene.numFoodEaten` method, and marks the score and speed boost to
+        be shown on the stats bar at the end of the frame.  The :class:`model.Scene`
+        calls it once per step in which Food was eaten, however much was eaten.  This
+        method is also called by :func:`controller.CitizenPac.lostLife` to reset the
+        score and speed boost since the food have all been reinitialized.
         '''
-        # Calculate and set the current game score
-        currScore = self.scene.numFoodEaten() * constants.FOOD_VALUE
-        self.gameStats.displayGameScore(currScore)
-
-        # Increase the speed
+        # Increase the speed.  This changes how the next steps play out, so unlike the
+        # stats bar it cannot wait for the end of the frame.
         if constants.USE_SPEED_BOOST:
             # Calculate and set the current game speed
             speed = constants.GAME_SPEED_START + (self.speedIncr * self.scene.numFoodEaten())
             constants.setGameSpeed(speed)
 
-            # Compute the boost to display
-            boost = (constants.gameSpeed - constants.GAME_SPEED_START) / \
-                    (constants.MAX_SPEED - constants.GAME_SPEED_START)
-            boost = round(boost * 100.0)
-            self.gameStats.displayGameSpeed(boost)
+        self.statsChanged = True
 
     def gameWon(self):
         '''
@@ -496,12 +578,28 @@ class CitizenPac(object):
         self.scene.setRunning(self.gameRunning)
 
         if self.gameRunning:
+            self.frameClock.start()
+            self.lastFrameTime = 0.0
+            self.accumulator   = 0.0
             self.gameTimer.start()
         else:
             self.gameTimer.stop()
 
         self.__paint_messages()
 
+    def toggleProfiling(self):
+        '''
+        Starts profiling the game loop (everything the ``gameTimer`` and painting run on
+        the main thread) if it is not being profiled, otherwise stops and writes the
+        ``pstats`` and collapsed stack files to :data:`constants.PROFILE_DIRECTORY`.
+        Called when the ``F9`` key is released.  If the profile cannot be written, the
+        error is shown with :func:`controller.CitizenPac.errorOut`.
+        '''
+        try:
+            self.profiler.toggle()
+        except:
+            self.errorOut()
+
     def lostLife(self):
         '''
         When CitizenPac collides with a ghost in the :func:`model.Scene.advance` method,
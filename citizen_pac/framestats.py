@@ -0,0 +1,131 @@
+'''
+Rolling frame-time statistics, shown by the frame-time overlay of the
+:class:`model.Scene` (toggled with ``F3``, see :data:`constants.SHOW_FRAME_STATS`).
+
+Like :mod:`simulation`, nothing in this module depends on ``PyQt4``: the
+:class:`controller.CitizenPac` and the :class:`model.Scene` measure the phases of every
+frame and record them here, the scene only draws the summary.
+'''
+
+from array import array
+
+import constants
+
+
+class RollingStat(object):
+    '''
+    The last ``size`` values of one measurement, kept in a ring buffer.
+
+    :Parameters:
+        ``size`` (int)
+            How many of the most recent values to keep.
+
+    :Attributes:
+        ``last`` (float)
+            The most recently added value.
+    '''
+    def __init__(self, size):
+        self.values = array('d', [0.0] * size)
+        self.count  = 0
+        self.index  = 0
+        self.last   = 0.0
+
+    def add(self, value):
+        ''' Records ``value``, replacing the oldest value once the buffer is full. '''
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+        self.last  = value
+
+    def mean(self):
+        ''' The mean of the kept values, ``0.0`` when there are none. '''
+        if self.count == 0:
+            return 0.0
+        return sum(self.values[:self.count]) / self.count
+
+    def max(self):
+        ''' The largest kept value, ``0.0`` when there are none. '''
+        if self.count == 0:
+            return 0.0
+        return max(self.values[:self.count])
+
+
+class FrameStats(object):
+    '''
+    The statistics of the most recent frames.  Times are in milliseconds.
+
+    :Parameters:
+        ``enabled`` (bool)
+            Whether or not the statistics are being recorded (and shown).
+
+        ``size`` (int)
+            How many frames the rolling statistics span.
+
+    :Attributes:
+        ``frame`` (:class:`framestats.RollingStat`)
+            The time between the starts of consecutive frames.
+
+        ``simulate`` (:class:`framestats.RollingStat`)
+            The time spent stepping the simulation in a frame.
+
+        ``steps`` (:class:`framestats.RollingStat`)
+            The number of simulation steps in a frame.
+
+        ``paint`` (:class:`framestats.RollingStat`)
+            The time the view spent painting, from the paint event arriving to the
+            foreground being drawn.
+
+        ``collisions`` (:class:`framestats.RollingStat`)
+            The number of collision tests per simulation step.
+
+        ``visible`` (:class:`framestats.RollingStat`)
+            The number of items in the visible part of the scene.
+
+        ``jitter`` (:class:`framestats.RollingStat`)
+            How far the frame time was from :data:`constants.GAME_REFRESH_RATE`.
+    '''
+    def __init__(self, enabled, size=120):
+        self.enabled    = enabled
+        self.frame      = RollingStat(size)
+        self.simulate   = RollingStat(size)
+        self.steps      = RollingStat(size)
+        self.paint      = RollingStat(size)
+        self.collisions = RollingStat(size)
+        self.visible    = RollingStat(size)
+        self.jitter     = RollingStat(size)
+
+    def recordFrame(self, interval, simulate, steps):
+        '''
+        Records one frame that started ``interval`` milliseconds after the previous one
+        and spent ``simulate`` milliseconds simulating ``steps`` steps.
+        '''
+        self.frame.add(interval)
+        self.jitter.add(abs(interval - constants.GAME_REFRESH_RATE))
+        self.simulate.add(simulate)
+        self.steps.add(steps)
+
+    def lines(self):
+        '''
+        Summarizes the statistics for display.
+
+        :Return:
+            ``list``
+                ``(text, overBudget)`` tuples, one per line.  ``overBudget`` is ``True``
+                for the times whose worst value exceeded the budget of
+                :data:`constants.GAME_REFRESH_RATE` milliseconds per frame.
+        '''
+        budget = constants.GAME_REFRESH_RATE
+        lines  = []
+        for name, stat in (("frame", self.frame), ("simulate", self.simulate),
+                           ("paint", self.paint), ("jitter", self.jitter)):
+            lines.append((
+                "{:<10} {:6.2f} ms  max {:6.2f} ms".format(name, stat.mean(), stat.max()),
+                name != "frame" and stat.max() > budget
+            ))
+        for name, stat in (("steps", self.steps), ("collisions", self.collisions),
+                           ("visible", self.visible)):
+            lines.append((
+                "{:<10} {:6.1f}     max {:6.0f}".format(name, stat.mean(), stat.max()),
+                False
+            ))
+        return lines
@@ -6,15 +6,18 @@ The Model in the Model-View-Controller paradigm.
 
 # FILE VERSION: released 5/5/2017 @ 13:00
 
-import math
+import random
 from PyQt4 import QtCore, QtGui
 
 import constants
-from view.actors import Actor, CitizenPacActor, GhostActor, Food
-from view.display import randomColor
+from framestats import FrameStats
+from replay import ReplayRecorder
+from simulation import FoodLattice, Simulation, actorStartPositions, foodLattice
+from view.actors import Actor, CitizenPacActor, GhostActor, Food, FoodField, VirtualFood
+from view.display import DamageTracker, PaintStartFilter, randomColor
 
 
-def generateFoodGrid(width, height):
+def generateFoodGrid(width, height, rng=random):
     '''
     This method returns a ``list`` of tuples containing all of the coordinates and
     colors for the :class:`view.actors.Food` actors in the scene, given the specified
@@ -71,6 +74,11 @@ def generateFoodGrid(width, height):
             The total height of the game board at the start of the game (before any
             resizing by the user.)
 
+        ``rng`` (:class:`random.Random`)
+            The random number generator the colors are drawn from, passed on to
+            :func:`view.display.randomColor`.  The Scene passes the ``"colors"``
+            substream of its :class:`streams.RandomStreams`.
+
     :Preconditions:
         *Size Constraints*
             ``width`` and ``height`` are both positive, and are both (individually)
@@ -112,26 +120,13 @@ def generateFoodGrid(width, height):
                the above specification.
     '''
     # Initial setup
-    all_food    = []
-    half_width  = width * 0.5
-    half_height = height * 0.5
-    diam        = 2.0 * constants.FOOD_RADIUS
-    food_fill   = diam * constants.FOOD_SPARSITY
-    half_fill   = food_fill * 0.5
-
-    # 1. Compute the x and y scaling factors
-    nx = float(int(width)  / int(food_fill))
-    ny = float(int(height) / int(food_fill))
-    # constraints: at least 4 food always
-    nx = max(nx, 2.0)  # Must be >= 2 since we need to divide by
-    ny = max(ny, 2.0)  # nx - 1.0 in the next step!
+    all_food = []
 
+    # 1. Compute the x and y scaling factors, and
     # 2. Compute the change in position for x / y directions, and coordinate transforms
-    dx = (width  - food_fill) / (nx - 1.0)
-    dy = (height - food_fill) / (ny - 1.0)
-    # coordinate transformation
-    tx = -half_width  + half_fill
-    ty = -half_height + half_fill
+    #
+    # These are shared with the headless simulation, see simulation.foodLattice.
+    nx, ny, dx, dy, tx, ty = foodLattice(width, height)
 
     # 3. TODO: write step 3!
     # - You *MUST* use *TWO* while loops, one nested inside the other.
@@ -151,7 +146,7 @@ def generateFoodGrid(width, height):
         while d < ny:           
             new_food_y = d*dy + ty
             d = d + 1
-            new_tuple = (new_food_x, new_food_y, randomColor())
+            new_tuple = (new_food_x, new_food_y, randomColor(rng))
             all_food.append(new_tuple)
             
     # grid has food in all x positions width[0..len(width)-1]
@@ -159,6 +154,59 @@ def generateFoodGrid(width, height):
     return all_food
 
 
+def localBounds(item):
+    '''
+    Returns the bounding rectangle of ``item`` as the ``(left, top, right, bottom)``
+    tuple used by :class:`simulation.Simulation`.
+
+    :Parameters:
+        ``item`` (:class:`PyQt4.QtGui.QGraphicsItem`)
+            The item to get the local bounding rectangle of.
+
+    :Return:
+        ``tuple``
+            The bounding rectangle in the item's own coordinates.
+    '''
+    rect = item.boundingRect()
+    return rect.left(), rect.top(), rect.right(), rect.bottom()
+
+
+def chooseItemIndexMethod(numStatic, numMoving):
+    '''
+    Chooses how a ``QGraphicsScene`` with ``numStatic`` items that never move and
+    ``numMoving`` items that move every frame should be indexed.
+
+    A ``QGraphicsScene.BspTreeIndex`` makes every lookup (e.g. which items intersect
+    an exposed rectangle) logarithmic, but every item that moves must be taken out of
+    the tree and put back in.  ``QGraphicsScene.NoIndex`` makes moving free, but every
+    lookup is a linear scan.  The BSP tree pays off once there are at least
+    :data:`constants.BSP_INDEX_CROSSOVER` static items for every moving item, unless
+    :data:`constants.ITEM_INDEX_METHOD` forces one or the other.
+
+    :Parameters:
+        ``numStatic`` (int)
+            The number of items that do not move.
+
+        ``numMoving`` (int)
+            The number of items that move.
+
+    :Return:
+        ``QGraphicsScene.ItemIndexMethod``
+            Either ``QGraphicsScene.BspTreeIndex`` or ``QGraphicsScene.NoIndex``.
+    '''
+    method = constants.ITEM_INDEX_METHOD
+    if method == "bsp":
+        return QtGui.QGraphicsScene.BspTreeIndex
+    if method == "none":
+        return QtGui.QGraphicsScene.NoIndex
+    if method != "auto":
+        raise ValueError("Unknown ITEM_INDEX_METHOD [{}].".format(method))
+
+    if numStatic >= constants.BSP_INDEX_CROSSOVER * max(1, numMoving):
+        return QtGui.QGraphicsScene.BspTreeIndex
+    return QtGui.QGraphicsScene.NoIndex
+
+
 class Scene(QtGui.QGraphicsScene):
     '''
     The main model of the game, responsible for creating and maintaining the state of
@@ -187,6 +235,16 @@ class Scene(QtGui.QGraphicsScene):
     lean on these features at the expense of "blurred Model-View-Controller"
     relationships.
 
+    :Parameters:
+        ``controller`` (:class:`controller.CitizenPac`), ``view``
+        (:class:`PyQt4.QtGui.QGraphicsView`)
+            See the attributes below.
+
+        ``seed`` (int)
+            The seed of the game, ``None`` for a fresh one.  Every random choice in the
+            game (colors, the Food animation, the Ghosts) is drawn from the streams
+            seeded by it, see :class:`streams.RandomStreams`.
+
     :Attributes:
         ``controller`` (:class:`controller.CitizenPac`)
             A reference to the Controller to be able to propagate events received from
@@ -208,9 +266,22 @@ class Scene(QtGui.QGraphicsScene):
             A list of :class:`view.actors.GhostActor` instances, representing all of the
             Ghosts in the scene.
 
+        ``movers`` (list)
+            CitizenPac and the Ghosts, in the order of their index in ``simulation``.
+
         ``food`` (list)
             A list of :class:`view.actors.Food` instances, representing where all of the
-            Food in the scene is.
+            Food in the scene is.  Empty when :data:`constants.BATCHED_FOOD` or
+            :data:`constants.VIRTUALIZE_FOOD` is ``True``.
+
+        ``foodField`` (:class:`view.actors.FoodField`)
+            The single item drawing all of the Food when :data:`constants.BATCHED_FOOD`
+            is ``True``, ``None`` otherwise.
+
+        ``virtualFood`` (:class:`view.actors.VirtualFood`)
+            Creates and recycles Food items for only the visible part of the scene when
+            :data:`constants.BATCHED_FOOD` is ``False`` and
+            :data:`constants.VIRTUALIZE_FOOD` is ``True``, ``None`` otherwise.
 
         ``gameRunning`` (bool)
             A boolean representing whether or not the game is currently running.  In
@@ -220,10 +291,33 @@ class Scene(QtGui.QGraphicsScene):
 
         ``foodEaten`` (int)
             An integer representing how many Food collisions have been detected.  When
-            ``foodEaten == len(self.food)``, the ``controller`` is notified that the
-            Game has completed.
+            ``foodEaten == self.numFood()``, the ``controller`` is notified that the
+            Game has completed.  Read from ``self.simulation``.
+
+        ``simulation`` (:class:`simulation.Simulation`)
+            The headless simulation that actually steps the rules of the game.  Every
+            registered actor is also added to the simulation, and the actors mirror
+            its state when they are advanced.
+
+        ``frameStats`` (:class:`framestats.FrameStats`)
+            The frame-time statistics, drawn over the scene when enabled (toggled with
+            ``F3``).  The scene records the paint time, collision tests and visible
+            items, the ``controller`` records the frame and simulation times.
+
+        ``damage`` (:class:`view.display.DamageTracker`)
+            Collects what the actors changed during a frame, so that only those regions
+            of the ``view`` are repainted by :func:`model.Scene.render`.
+
+        ``scheduler`` (:class:`scheduler.TimerWheel`)
+            The single scheduler for all timed behaviour in the game (Ghost direction
+            changes, the Food animation), advanced once per tick from
+            :func:`model.Scene.advance`.  Owned by ``simulation``.
+
+        ``recorder`` (:class:`replay.ReplayRecorder`)
+            Records the inputs of the game while it is being recorded, ``None``
+            otherwise.  See :func:`model.Scene.startRecording`.
     '''
-    def __init__(self, controller, view):
+    def __init__(self, controller, view, seed=None):
         super(Scene, self).__init__(view)
         # Parent references
         self.controller  = controller
@@ -231,10 +325,29 @@ class Scene(QtGui.QGraphicsScene):
         # Actor references
         self.citizenPac  = None
         self.ghosts      = []
+        self.movers      = []
         self.food        = []
+        self.foodField   = None
+        self.virtualFood = None
         # Game state convenience members
         self.gameRunning = False
-        self.foodEaten   = 0
+        self.simulation  = Simulation(0.0, 0.0, seed)
+        self.scheduler   = self.simulation.scheduler
+        self.damage      = DamageTracker(view, constants.DIRTY_REGION_UPDATES,
+                                         constants.DIRTY_REGION_THRESHOLD)
+        self.frameStats  = FrameStats(False)
+        self.paintClock  = QtCore.QElapsedTimer()
+        self.paintStart  = None
+        self.statsRect   = QtCore.QRect()
+        self.paintFilter = PaintStartFilter(self)
+        self.recorder    = None
+        self.paintClock.start()
+        self.setFrameStatsEnabled(constants.SHOW_FRAME_STATS)
+
+    @property
+    def foodEaten(self):
+        ''' The number of Food eaten so far, see :func:`model.Scene.numFoodEaten`. '''
+        return self.simulation.foodEaten
 
     def generate(self, width, height):
         '''
@@ -268,16 +381,11 @@ class Scene(QtGui.QGraphicsScene):
            in the scene must be deferred until **after** the View's Layout has been
            performed (this is controlled by ``PyQt4``).
         '''
+        self.simulation.setBounds(width, height)
+
         # Generate the CitizenPac and Ghost actors.  By default, they are dispersed in
         # a circular pattern.  There can only be one CitizenPac
-        nActors = float(constants.NUM_GHOSTS + 1)  # All ghosts plus CitizenPac
-        two_pi  = 2.0 * math.pi
-        for i in range(int(nActors)):
-            # Create the new x and y coordinates on the circle
-            t  = (i * two_pi) / nActors
-            cx = math.sin(t) * constants.DISPERSION_RADIUS
-            cy = math.cos(t) * constants.DISPERSION_RADIUS
-
+        for i, (cx, cy) in enumerate(actorStartPositions()):
             # The constructor arguments are the same for both, but the class is
             # different.  We negative scaling for the y coordinate because the
             # the Qt coordinate system is positive y down.
@@ -292,10 +400,25 @@ class Scene(QtGui.QGraphicsScene):
         # Generate all of the Food
         if constants.FULL_GAME_MODE:
             try:
-                food_coords = generateFoodGrid(width, height)
-                for cx, cy, color in food_coords:
-                    food = Food(self, cx, cy, color, constants.FOOD_RADIUS)
-                    self.registerActor(food, cx, cy)
+                food_coords = generateFoodGrid(width, height,
+                                               self.simulation.streams.stream("colors"))
+                if constants.BATCHED_FOOD:
+                    self.foodField = FoodField(self, constants.FOOD_RADIUS)
+                    for cx, cy, color in food_coords:
+                        self.foodField.addFood(cx, cy, color)
+                        self.simulation.addFood(cx, cy, self.foodField.foodBounds())
+                elif constants.VIRTUALIZE_FOOD:
+                    self.virtualFood = VirtualFood(self, constants.FOOD_RADIUS,
+                                                   constants.FOOD_VIEW_MARGIN)
+                    for cx, cy, color in food_coords:
+                        self.virtualFood.addFood(cx, cy, color)
+                        self.simulation.addFood(cx, cy, self.virtualFood.foodBounds())
+                else:
+                    for cx, cy, color in food_coords:
+                        food = Food(self, cx, cy, color, constants.FOOD_RADIUS)
+                        self.registerActor(food, cx, cy)
+                # Food collisions only need to look at the pellets near CitizenPac
+                self.simulation.setFoodLattice(FoodLattice(*foodLattice(width, height)))
             except:
                 self.controller.errorOut()
 
@@ -350,14 +473,23 @@ class Scene(QtGui.QGraphicsScene):
         #
         # You will also need to update the `advance` method of this class to check for
         # collisions with these new types of actors.
+        #
+        # The actor is also added to the simulation, which is what actually moves it.
         if type(actor) is CitizenPacActor:
             if self.citizenPac:
                 raise RuntimeError("There can only be one CitizenPac per game!")
             self.citizenPac = actor
+            actor.simIndex  = self.simulation.addActor(cx, cy, localBounds(actor), True,
+                                                       actor.hull)
+            self.movers.append(actor)
         elif type(actor) is Food:
             self.food.append(actor)
+            actor.foodIndex = self.simulation.addFood(cx, cy, localBounds(actor))
         elif type(actor) is GhostActor:
             self.ghosts.append(actor)
+            actor.simIndex = self.simulation.addActor(cx, cy, localBounds(actor),
+                                                      hull=actor.hull)
+            self.movers.append(actor)
         else:
             raise RuntimeError(
                 "Unknown actor of type [{}] cannot be registered.".format(type(actor))
@@ -367,6 +499,41 @@ class Scene(QtGui.QGraphicsScene):
         # the view.actors.Actor class, and therefore will have the setPos function.
         actor.setPos(cx, cy)
 
+    def configureItemIndex(self):
+        '''
+        Selects the item index method of this scene with
+        :func:`model.chooseItemIndexMethod`.  CitizenPac and the Ghosts are the moving
+        items, every other item in the scene is static.  The
+        :class:`view.actors.FoodField` and :class:`view.actors.VirtualFood` count as the
+        pellets they stand for rather than as the (one, or few) items they put in the
+        scene, since the crossover was measured with one item per pellet.  Called by the
+        :class:`controller.CitizenPac` once the scene has been generated.
+
+        :Return:
+            ``QGraphicsScene.ItemIndexMethod``
+                The method that was selected.
+        '''
+        numMoving = len(self.ghosts) + (1 if self.citizenPac else 0)
+        numStatic = len(self.items()) - numMoving
+        if self.foodField is not None:
+            numStatic += self.numFood() - 1
+        elif self.virtualFood is not None:
+            numStatic += self.numFood() - len(self.virtualFood.items) - len(self.virtualFood.pool)
+        method    = chooseItemIndexMethod(numStatic, numMoving)
+        self.setItemIndexMethod(method)
+        return method
+
+    def numFood(self):
+        '''
+        Returns the total number of food items in the game, whether they are drawn as
+        :class:`view.actors.Food` items or by the :class:`view.actors.FoodField`.
+
+        :Return:
+            ``int``
+                The number of food items in the game.
+        '''
+        return self.simulation.numFood()
+
     def numFoodEaten(self):
         '''
         Returns the number of food items that have been eaten in this round of the game.
@@ -375,7 +542,7 @@ class Scene(QtGui.QGraphicsScene):
             ``int``
                 The number of food eaten so far in this round of the game.
         '''
-        return self.foodEaten
+        return self.simulation.foodEaten
 
     def setRunning(self, running):
         '''
@@ -387,7 +554,10 @@ class Scene(QtGui.QGraphicsScene):
             ``running`` (bool)
                 Whether or not the game is currently running.
         '''
-        self.gameRunning = running
+        self.gameRunning        = running
+        self.simulation.running = running
+        if self.recorder is not None:
+            self.recorder.setRunning(running)
 
     def reset(self):
         '''
@@ -402,16 +572,31 @@ class Scene(QtGui.QGraphicsScene):
            `implementation <_modules/model.html#Scene.advance>`__ of
            :func:`model.Scene.advance`, in addition to the **parent** class
            documentation of :class:`view.actors.Actor`, to complete making food edible.
+
+        The state itself is reset by :func:`simulation.Simulation.reset`, the actors
+        then mirror it.  Only the Food that was eaten has to be shown again, the
+        animation of the rest follows the shared state of the simulation on the next
+        :func:`model.Scene.render`.
         '''
-        
+        eaten = list(self.simulation.eaten)
+        self.simulation.reset()
+        if self.recorder is not None:
+            self.recorder.reset()
+
         for element in self.ghosts:
             element.reset()
-        for element in self.food:
-            element.reset()
-            element.setVisible(True)
-            
-        self.foodEaten = 0
+        if self.foodField is not None:
+            self.foodField.reset()
+        elif self.virtualFood is not None:
+            self.virtualFood.reset()
+        else:
+            for index in eaten:
+                element = self.food[index]
+                element.reset()
+                element.setVisible(True)
+
         self.citizenPac.reset()
+        self.damage.invalidateAll()
 
     def wrapActor(self, actor, width, height):
         '''
@@ -447,29 +632,9 @@ class Scene(QtGui.QGraphicsScene):
         if not isinstance(actor, Actor):
             return
 
-        if actor.x() < -.5*width:
-            actor.setX(.5*width)
-            
-        if actor.x() > .5*width:
-            actor.setX(-.5*width)
-            
-        if actor.y() < -.5*height:
-            actor.setY(.5*height)
-            
-        if actor.y() > .5*height:
-            actor.setY(-.5*height)
-            
-        #if actor.x() < -.5*width:
-            #setPos(.5*width, 0)
-            
-        #if actor.x() > .5*width:
-            #setPos(-.5*width, 0)
-            
-        #if actor.y() < -.5*height:
-            #setPos(0, .5*height)
-            
-        #if actor.y() > .5*height:
-            #setPos(0, -.5*height)
+        # The simulation owns the position, the actor mirrors it.
+        self.simulation.wrapActor(actor.simIndex, width, height)
+        actor.setPos(*self.simulation.position(actor.simIndex))
 
         ################################################################################
         # DO NOT MODIFY !!!                                                            #
@@ -480,56 +645,199 @@ class Scene(QtGui.QGraphicsScene):
 
     def wrapRelevantActors(self):
         '''
-        Confines all relevant actors to remain within the bounds of the game grid
-        by calling :func:`model.Scene.wrapActor` for every actor that can move in
-        the game.  If you desired to have food moving, you would need to update this
-        method to do this as well!
+        Confines all relevant actors to remain within the bounds of the game grid.
+        Every actor that can move in the game is wrapped at once by
+        :func:`simulation.Simulation.wrapActors` (the same rule as
+        :func:`model.Scene.wrapActor`), and only the actors that actually crossed an
+        edge are moved on screen.  If you desired to have food moving, you would need
+        to update this method to do this as well!
         '''
         # Acquire the width and height of the current bounding rectangle
         bounds = self.sceneRect()
-        width  = bounds.width()
-        height = bounds.height()
+        self.simulation.setBounds(bounds.width(), bounds.height())
 
         # Wrap the actors that can move in the game
-        self.wrapActor(self.citizenPac, width, height)
-        for ghost in self.ghosts:
-            self.wrapActor(ghost, width, height)
+        for index in self.simulation.wrapActors():
+            actor = self.movers[index]
+            actor.setPos(*self.simulation.position(index))
+            actor.update()
 
-    def advance(self):
+    def step(self):
         '''
-        This method is what the :class:`controller.CitizenPac` hooks its ``gameTimer``
-        to.  It is responsible for processing three things:
+        Simulates one fixed timestep (:data:`constants.SIMULATION_TIMESTEP`) of the
+        game.  It is responsible for processing three things:
 
         1. Process collisions when ``self.gameRunning`` and
            :data:`constants.FULL_GAME_MODE` are both ``True``.
-        2. Confine actors to the game grid via :func:`model.Scene.wrapRelevantActors`.
-        3. Call the ``super`` class ``advance``, which will propagate to the Actors.
+        2. Confine actors to the game grid.
+        3. Move the actors and animate the Food.
+
+        All three are stepped by :func:`simulation.Simulation.step`, and the
+        ``controller`` is notified of the outcome.  Nothing is drawn, see
+        :func:`model.Scene.render`.
+
+        :Return:
+            ``bool``
+                ``True`` if the game is still running and more steps may be simulated,
+                ``False`` if a life was lost, the game was won or it is paused.
+        '''
+        bounds = self.sceneRect()
+        self.simulation.setBounds(bounds.width(), bounds.height())
+        if self.recorder is not None:
+            self.recorder.beforeStep()
+        status = self.simulation.step()
+        if self.recorder is not None:
+            self.recorder.afterStep()
+        if self.frameStats.enabled:
+            self.frameStats.collisions.add(self.simulation.collisionTests)
+
+        if status == Simulation.LOST_LIFE:
+            self.controller.lostLife()
+            return False
+
+        eaten = self.simulation.eatenThisStep
+        for index in eaten:
+            # The FoodField reads which food was eaten straight from the simulation
+            if self.foodField is not None:
+                self.foodField.foodEaten(index)
+            elif self.virtualFood is not None:
+                self.virtualFood.foodEaten(index)
+            else:
+                self.damage.addRect(self.food[index].sceneBoundingRect())
+                self.food[index].hide()
+        if eaten:
+            # One update for everything eaten this step
+            self.controller.foodConsumed()
+
+        if status == Simulation.WON:
+            self.controller.gameWon()
+            return False
+
+        return self.gameRunning
+
+    def render(self):
+        '''
+        Calls the ``super`` class ``advance``, which propagates to the Actors so that
+        they mirror the current state of the simulation.  It is particularly important
+        not to omit this, otherwise nothing on screen would move.  Afterwards only the
+        regions the Actors reported as damaged are repainted.
+
+        With :data:`constants.VIRTUALIZE_FOOD`, the Food items are first laid out for
+        what the view currently shows (see :func:`view.actors.VirtualFood.layout`).  The
+        stats bar is updated once as well, with whatever the steps since the previous
+        render changed (see :func:`controller.CitizenPac.updateStats`).
+        '''
+        self.controller.updateStats()
+        if self.virtualFood is not None:
+            self.virtualFood.layout()
+        super(Scene, self).advance()
+        self.simulation.clearMoved()
+        if self.frameStats.enabled:
+            viewport = self.view.viewport()
+            visible  = self.view.mapToScene(viewport.rect()).boundingRect()
+            self.frameStats.visible.add(len(self.items(visible)))
+            # The overlay changes every frame
+            self.damage.addRegion(QtGui.QRegion(self.statsRect))
+        self.damage.flush()
 
-        The third point there is particularly important not to omit, otherwise the
-        animations on the food, decisions about moving, etc will not occur.
+    def advance(self):
+        '''
+        Simulates exactly one step (:func:`model.Scene.step`) and renders the result
+        (:func:`model.Scene.render`).  The :class:`controller.CitizenPac` instead runs
+        as many steps per frame as the elapsed time calls for, see
+        :data:`constants.SIMULATION_TIMESTEP`.
         '''
-        if self.gameRunning and constants.FULL_GAME_MODE:
-            for ghost in self.ghosts:
-                if self.citizenPac.collidesWithItem(ghost):
-                    self.controller.lostLife()
-                    return
+        self.step()
+        self.render()
 
-            for food in self.food:
-                if food.isVisible() and self.citizenPac.collidesWithItem(food):
-                    food.hide()
-                    self.foodEaten += 1
-                    self.controller.foodConsumed()
+    def setFrameStatsEnabled(self, enabled):
+        '''
+        Shows or hides the frame-time overlay.  While it is shown, the viewport of the
+        ``view`` reports when painting starts (see :class:`view.display.PaintStartFilter`)
+        so that the paint time can be measured.
+
+        :Parameters:
+            ``enabled`` (bool)
+                Whether or not the overlay should be shown.
+        '''
+        self.frameStats.enabled = enabled
+        viewport = self.view.viewport()
+        if enabled:
+            viewport.installEventFilter(self.paintFilter)
+        else:
+            viewport.removeEventFilter(self.paintFilter)
+            self.paintStart = None
+        self.damage.invalidateAll()
+        viewport.update()
 
-            if self.foodEaten == len(self.food):
-                self.controller.gameWon()
+    def paintStarted(self):
+        ''' Called by the :class:`view.display.PaintStartFilter` when painting starts. '''
+        self.paintStart = self.paintClock.nsecsElapsed()
 
-        self.wrapRelevantActors()
-        super(Scene, self).advance()
+    def drawForeground(self, painter, rect):
+        '''
+        The last thing the view paints.  When the frame-time overlay is enabled, records
+        how long the view took to paint and draws the overlay in the top left corner of
+        the view, on top of everything else.  Lines whose worst time exceeded the frame
+        budget are drawn in red.
+        '''
+        super(Scene, self).drawForeground(painter, rect)
+        if not self.frameStats.enabled:
+            return
+
+        if self.paintStart is not None:
+            elapsed = self.paintClock.nsecsElapsed() - self.paintStart
+            self.frameStats.paint.add(elapsed / 1.0e6)
+            self.paintStart = None
+
+        lines   = self.frameStats.lines()
+        painter.save()
+        painter.resetTransform()
+        font    = QtGui.QFont("monospace", 9)
+        font.setStyleHint(QtGui.QFont.TypeWriter)
+        painter.setFont(font)
+        metrics = QtGui.QFontMetrics(font)
+        width   = max(metrics.width(text) for text, _ in lines) + 12
+        height  = metrics.lineSpacing() * len(lines) + 8
+        self.statsRect = QtCore.QRect(8, 8, width, height)
+
+        painter.fillRect(self.statsRect, QtGui.QColor(0, 0, 0, 180))
+        y = self.statsRect.top() + 4 + metrics.ascent()
+        for text, overBudget in lines:
+            painter.setPen(QtCore.Qt.red if overBudget else QtCore.Qt.white)
+            painter.drawText(self.statsRect.left() + 6, y, text)
+            y += metrics.lineSpacing()
+        painter.restore()
+
+    def startRecording(self, path):
+        '''
+        Starts recording the inputs of the game to the replay file ``path``, so that it
+        can be played back headless with :mod:`replay`.  Call this once the scene has
+        been generated, and :func:`model.Scene.stopRecording` when the game is over.
+        '''
+        self.stopRecording()
+        self.recorder = ReplayRecorder(path, self.simulation,
+                                       constants.REPLAY_KEYFRAME_INTERVAL)
+
+    def stopRecording(self):
+        ''' Finishes the replay being recorded, if any. '''
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def queueMove(self, direction, press):
+        '''
+        Passes a key press or release on to
+        :func:`view.actors.CitizenPacActor.queueMove`, and records it while recording.
+        '''
+        self.citizenPac.queueMove(direction, press)
+        if self.recorder is not None:
+            self.recorder.move(direction, press)
 
     def keyPressEvent(self, e):
         '''
         If the key pressed is one of ``w``, ``s``, ``d``, or ``a``, call the
-        :func:`view.actors.CitizenPacActor.queueMove` actor with the appropriate move
+        :func:`model.Scene.queueMove` method with the appropriate move
         direction and ``True`` to signal that the user requested CitizenPac to move in
         this direction.
 
@@ -543,26 +851,32 @@ class Scene(QtGui.QGraphicsScene):
         key = e.key()
 
         if key == QtCore.Qt.Key_W:
-            self.citizenPac.queueMove(constants.MOVE_NORTH, True)
+            self.queueMove(constants.MOVE_NORTH, True)
         elif key == QtCore.Qt.Key_S:
-            self.citizenPac.queueMove(constants.MOVE_SOUTH, True)
+            self.queueMove(constants.MOVE_SOUTH, True)
         elif key == QtCore.Qt.Key_D:
-            self.citizenPac.queueMove(constants.MOVE_EAST, True)
+            self.queueMove(constants.MOVE_EAST, True)
         elif key == QtCore.Qt.Key_A:
-            self.citizenPac.queueMove(constants.MOVE_WEST, True)
+            self.queueMove(constants.MOVE_WEST, True)
         else:
             super(Scene, self).keyPressEvent(e)
 
     def keyReleaseEvent(self, e):
         '''
         If the key released is one of ``w``, ``s``, ``d``, or ``a``, call the
-        :func:`view.actors.CitizenPacActor.queueMove` actor with the appropriate move
+        :func:`model.Scene.queueMove` method with the appropriate move
         direction and ``False`` to signal that the user has stopped requesting that
         CitizenPac move in this direction.
 
         If the ``space`` key is released, then the user has requested to pause or resume
         the game, call the :func:`controller.CitizenPac.gameRunningSwitched` function.
 
+        If the ``F3`` key is released, toggle the frame-time overlay, see
+        :func:`model.Scene.setFrameStatsEnabled`.
+
+        If the ``F9`` key is released, start or stop profiling, see
+        :func:`controller.CitizenPac.toggleProfiling`.
+
         If it is not one of these keys, call the ``super`` class ``keyPressEvent`` to
         allow other keys to be applied elsewhere in the framework.
 
@@ -573,14 +887,18 @@ class Scene(QtGui.QGraphicsScene):
         key = e.key()
 
         if key == QtCore.Qt.Key_W:
-            self.citizenPac.queueMove(constants.MOVE_NORTH, False)
+            self.queueMove(constants.MOVE_NORTH, False)
         elif key == QtCore.Qt.Key_S:
-            self.citizenPac.queueMove(constants.MOVE_SOUTH, False)
+            self.queueMove(constants.MOVE_SOUTH, False)
         elif key == QtCore.Qt.Key_D:
-            self.citizenPac.queueMove(constants.MOVE_EAST, False)
+            self.queueMove(constants.MOVE_EAST, False)
         elif key == QtCore.Qt.Key_A:
-            self.citizenPac.queueMove(constants.MOVE_WEST, False)
+            self.queueMove(constants.MOVE_WEST, False)
         elif key == QtCore.Qt.Key_Space:
             self.controller.gameRunningSwitched()
+        elif key == QtCore.Qt.Key_F3:
+            self.setFrameStatsEnabled(not self.frameStats.enabled)
+        elif key == QtCore.Qt.Key_F9:
+            self.controller.toggleProfiling()
         else:
             super(Scene, self).keyPressEvent(e)
@@ -0,0 +1,175 @@
+'''
+The navigation grid the Ghosts chase CitizenPac on when :data:`constants.GHOST_CHASE`
+is ``True``.
+
+The board is divided into cells centered on the lattice the Food is placed on (see
+:func:`simulation.foodLattice`), and wraps around its edges just like the actors do.
+Once per tick, :func:`simulation.Simulation.chase` computes one breadth-first distance
+field from CitizenPac's cell (:func:`navigation.NavigationGrid.distanceField`), and
+every Ghost reads its next move flags from that same field
+(:func:`navigation.NavigationGrid.nextMove`).  Reading the field costs the same for
+every Ghost, so the search is paid once per tick no matter how many Ghosts there are,
+and only when CitizenPac has moved to another cell.
+
+Like :mod:`simulation`, nothing in this module depends on ``PyQt4``.
+'''
+
+import math
+from array import array
+from collections import deque
+
+import constants
+
+NEIGHBORS = [(0, -1), (0, 1), (1, 0), (-1, 0), (1, -1), (-1, -1), (1, 1), (-1, 1)]
+'''
+The ``(column, row)`` offsets of the neighbors of a cell: north, south, east, west, and
+then the diagonals (a Ghost can move along two directions at once).  Ties are broken in
+this order.
+'''
+
+
+def directionFlags(vx, vy, deadZone):
+    '''
+    Returns the move flags heading along ``(vx, vy)``, only moving along an axis when
+    the vector is longer than ``deadZone`` along it.
+
+    :Return:
+        ``int``
+            A combination of the ``constants.MOVE_*`` flags, or
+            :data:`constants.STATIONARY`.
+    '''
+    flags = 0
+    if vx > deadZone:
+        flags |= constants.MOVE_EAST
+    elif vx < -deadZone:
+        flags |= constants.MOVE_WEST
+    if vy > deadZone:
+        flags |= constants.MOVE_SOUTH
+    elif vy < -deadZone:
+        flags |= constants.MOVE_NORTH
+    return flags or constants.STATIONARY
+
+
+class NavigationGrid(object):
+    '''
+    A grid of cells centered on the Food lattice of a board, wrapping around its edges.
+    Cells are numbered column by column, like the Food.
+
+    :Parameters:
+        ``nx``, ``ny``, ``dx``, ``dy``, ``tx``, ``ty`` (float)
+            The lattice parameters, see :func:`simulation.foodLattice`.
+
+    :Attributes:
+        ``cols`` (int), ``rows`` (int)
+            The number of columns / rows of cells.
+
+        ``target`` (int)
+            The cell ``field`` was computed for, ``None`` until the first call to
+            :func:`navigation.NavigationGrid.distanceField`.
+
+        ``field`` (:class:`array.array`)
+            The number of moves from every cell to ``target``.
+
+        ``searches`` (int)
+            How many distance fields have been computed, i.e. how many times
+            :func:`navigation.NavigationGrid.distanceField` was not a cached lookup.
+    '''
+    def __init__(self, nx, ny, dx, dy, tx, ty):
+        self.cols     = int(math.ceil(nx))
+        self.rows     = int(math.ceil(ny))
+        self.dx       = dx
+        self.dy       = dy
+        self.tx       = tx
+        self.ty       = ty
+        self.target   = None
+        self.field    = array('l')
+        self.searches = 0
+        # The neighbors of every cell, computed once since they never change
+        self.neighbors = []
+        for a in range(self.cols):
+            for d in range(self.rows):
+                self.neighbors.append([
+                    ((a + na) % self.cols) * self.rows + (d + nd) % self.rows
+                    for na, nd in NEIGHBORS
+                ])
+
+    def __len__(self):
+        return self.cols * self.rows
+
+    def _column(self, x):
+        ''' The unwrapped column whose center is closest to ``x``. '''
+        return int(math.floor((x - self.tx) / self.dx + 0.5))
+
+    def _row(self, y):
+        ''' The unwrapped row whose center is closest to ``y``. '''
+        return int(math.floor((y - self.ty) / self.dy + 0.5))
+
+    def cell(self, x, y):
+        ''' Returns the index of the cell whose center is closest to ``(x, y)``. '''
+        return (self._column(x) % self.cols) * self.rows + self._row(y) % self.rows
+
+    def distanceField(self, target):
+        '''
+        Computes the number of moves from every cell to the cell ``target`` with a
+        breadth-first search, unless it was already computed for ``target``.
+
+        :Return:
+            :class:`array.array`
+                ``self.field``.
+        '''
+        if target == self.target:
+            return self.field
+
+        field = array('l', [-1]) * len(self)
+        field[target] = 0
+        queue = deque([target])
+        while queue:
+            current  = queue.popleft()
+            distance = field[current] + 1
+            for neighbor in self.neighbors[current]:
+                if field[neighbor] < 0:
+                    field[neighbor] = distance
+                    queue.append(neighbor)
+
+        self.field     = field
+        self.target    = target
+        self.searches += 1
+        return field
+
+    def nextMove(self, field, x, y, targetX, targetY, deadZone):
+        '''
+        Returns the move flags that take an actor at ``(x, y)`` one step down ``field``,
+        towards the neighboring cell closest to the target.  Once in the target cell,
+        the actor heads straight for ``(targetX, targetY)``.
+
+        :Parameters:
+            ``field`` (:class:`array.array`)
+                A field returned by :func:`navigation.NavigationGrid.distanceField`.
+
+            ``deadZone`` (float)
+                Axes along which the actor is closer than this to where it is heading
+                are not moved along, so that it does not jitter around it.
+
+        :Return:
+            ``int``
+                The move flags, see :func:`navigation.directionFlags`.
+        '''
+        a = self._column(x)
+        d = self._row(y)
+        current = (a % self.cols) * self.rows + d % self.rows
+        best    = field[current]
+        if best == 0:
+            return directionFlags(targetX - x, targetY - y, deadZone)
+
+        offset = None
+        for (na, nd), neighbor in zip(NEIGHBORS, self.neighbors[current]):
+            if 0 <= field[neighbor] < best:
+                best   = field[neighbor]
+                offset = (na, nd)
+        if offset is None:
+            return constants.STATIONARY
+
+        # Head for the center of that neighbor, on this side of the board's edge
+        cx = (a + offset[0]) * self.dx + self.tx
+        cy = (d + offset[1]) * self.dy + self.ty
+        return directionFlags(cx - x, cy - y, deadZone)
@@ -0,0 +1,176 @@
+'''
+Profiles real gameplay on demand, started and stopped with the ``F9`` key (see
+:func:`controller.CitizenPac.toggleProfiling`).
+
+A session runs two profilers over the main thread at once, which is where the
+``gameTimer`` fires and therefore where :func:`model.Scene.advance`, every
+:func:`view.actors.Actor.advance` and every ``paint`` run:
+
+1. ``cProfile``, saved as a ``pstats`` file for exact call counts and times (open it
+   with ``python -m pstats`` or ``snakeviz``).
+2. A sampling profiler that records the main thread's stack every
+   :data:`constants.PROFILE_SAMPLE_INTERVAL` seconds, saved in the collapsed stack
+   format (``frame;frame;frame count`` per line) understood by flame graph tools such
+   as ``flamegraph.pl`` and ``speedscope``.
+
+Nothing in this module depends on ``PyQt4``.
+'''
+
+import cProfile
+import os
+import sys
+import threading
+import time
+
+import constants
+
+
+def frameLabel(frame):
+    ''' The label of ``frame`` in a collapsed stack: ``file.py:function``. '''
+    code = frame.f_code
+    return "{}:{}".format(os.path.basename(code.co_filename), code.co_name)
+
+
+def collapseStack(frame):
+    '''
+    Returns the stack ending at ``frame`` in the collapsed format, outermost frame
+    first, e.g. ``"__main__.py:main;controller.py:__advance_frame"``.
+    '''
+    labels = []
+    while frame is not None:
+        labels.append(frameLabel(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler(threading.Thread):
+    '''
+    A daemon thread that samples the stack of another thread at a fixed interval.
+
+    :Parameters:
+        ``threadId`` (int)
+            The identifier of the thread to sample, e.g. ``threading.current_thread().ident``
+            of the main thread.
+
+        ``interval`` (float)
+            The time between samples, in seconds.
+
+    :Attributes:
+        ``counts`` (dict)
+            How many times every collapsed stack was sampled.
+    '''
+    def __init__(self, threadId, interval):
+        super(StackSampler, self).__init__(name="StackSampler")
+        self.daemon   = True
+        self.threadId = threadId
+        self.interval = interval
+        self.counts   = {}
+        self.stopped  = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            frame = sys._current_frames().get(self.threadId)
+            if frame is not None:
+                stack = collapseStack(frame)
+                self.counts[stack] = self.counts.get(stack, 0) + 1
+            # Drop the reference so the sampled frames can be freed
+            frame = None
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        ''' Stops sampling and waits for the thread to finish. '''
+        self.stopped.set()
+        self.join()
+
+    def write(self, path):
+        ''' Writes the samples to ``path`` in the collapsed stack format. '''
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write("{} {}\n".format(stack, count))
+
+
+class ProfilerSession(object):
+    '''
+    Starts and stops profiling of the calling (main) thread.
+
+    :Parameters:
+        ``directory`` (str)
+            Where the results are written, created when needed.
+
+        ``interval`` (float)
+            The time between stack samples, in seconds.
+
+    :Attributes:
+        ``active`` (bool)
+            Whether or not a session is currently running.
+    '''
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval  = interval
+        self.profile   = None
+        self.sampler   = None
+        self.started   = None
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self):
+        ''' Starts profiling the calling thread, does nothing if already profiling. '''
+        if self.active:
+            return
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.sampler = StackSampler(threading.current_thread().ident, self.interval)
+        self.profile = cProfile.Profile()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        '''
+        Stops profiling and writes the results.
+
+        :Return:
+            ``tuple``
+                The paths of the ``(pstats, collapsed)`` files that were written, or
+                ``None`` if no session was running.
+        '''
+        if not self.active:
+            return None
+
+        self.profile.disable()
+        self.sampler.stop()
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        base      = os.path.join(self.directory, "citizen_pac-{}".format(self.started))
+        pstats    = base + ".pstats"
+        collapsed = base + ".collapsed"
+        self.profile.dump_stats(pstats)
+        self.sampler.write(collapsed)
+
+        self.profile = None
+        self.sampler = None
+        return pstats, collapsed
+
+    def toggle(self):
+        '''
+        Starts a session if none is running, otherwise stops it.
+
+        :Return:
+            ``tuple``
+                ``None`` when a session was started, otherwise what
+                :func:`profiling.ProfilerSession.stop` returned.
+        '''
+        if self.active:
+            return self.stop()
+        self.start()
+        return None
+
+
+def createSession():
+    '''
+    Creates a :class:`profiling.ProfilerSession` writing to
+    :data:`constants.PROFILE_DIRECTORY`.
+    '''
+    return ProfilerSession(constants.PROFILE_DIRECTORY, constants.PROFILE_SAMPLE_INTERVAL)
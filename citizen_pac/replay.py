@@ -0,0 +1,540 @@
+'''
+Records the inputs of a game so that it can be replayed exactly, headless.
+
+Because every random choice is seeded (see :mod:`streams`), a game is fully determined
+by its seed, the board and the inputs that reached the :class:`simulation.Simulation`
+between ticks.  A :class:`replay.ReplayRecorder` (started with ``--record``, see
+:func:`model.Scene.startRecording`) saves exactly those, each tagged with the tick it
+happened on:
+
+- the ``w``, ``s``, ``d`` and ``a`` key presses and releases, as they are passed to
+  :func:`view.actors.CitizenPacActor.queueMove`,
+- CitizenPac's move flags whenever they were changed in another way (e.g. when the
+  application lost focus),
+- the game being paused or resumed, by the space bar or by losing a life,
+- the scene being reset, and the game speed changing,
+- CitizenPac hitting a Ghost.  That step does not advance the tick, so it is marked
+  to keep the inputs that followed it (the reset) after it.
+
+Every :data:`constants.REPLAY_KEYFRAME_INTERVAL` ticks the complete state of the
+simulation is saved as well (:func:`simulation.Simulation.snapshot`), so that a
+:class:`replay.Replay` can seek to any tick by restoring the nearest keyframe before it
+and stepping forward from there.
+
+The file starts with the magic ``b"CPRP"``, the format version and the header (the seed,
+the board and the relevant :mod:`constants`, as JSON), all lengths and numbers being
+unsigned LEB128 varints.  Every record after that starts with one varint holding the
+number of ticks since the previous record shifted left by four, and the kind of record
+(``MOVE_PRESS`` to ``END``) in the low four bits.  Holding a key therefore costs one or
+two bytes per change, no matter how long it is held.
+
+Nothing in this module depends on ``PyQt4``, replays run as fast as the CPU allows::
+
+    python citizen_pac/replay.py game.cprp [--seek TICK] [--verify]
+'''
+
+from __future__ import print_function
+
+import argparse
+import bisect
+import json
+import struct
+import sys
+import time
+import zlib
+
+import constants
+from simulation import FoodLattice, Simulation
+
+MAGIC          = b"CPRP"
+FORMAT_VERSION = 2
+
+MOVE_PRESS   = 0
+MOVE_RELEASE = 1
+MOVE_FLAGS   = 2
+RUNNING      = 3
+RESET        = 4
+SPEED        = 5
+KEYFRAME     = 6
+LOST_LIFE    = 7
+END          = 8
+''' The kinds of records, stored in the low four bits of their first varint. '''
+
+KIND_BITS = 4
+
+REPLAY_CONSTANTS = ("FOOD_RADIUS", "FOOD_SPARSITY", "NUM_GHOSTS", "NUM_LIVES",
+                    "FULL_GAME_MODE", "PRECISE_COLLISIONS", "SIMULATION_TIMESTEP",
+                    "GHOST_MOVE_TIME", "GHOST_CHASE")
+''' The :mod:`constants` that change how the game plays, saved in the header. '''
+
+SPEED_FORMAT = "<d"
+
+
+class ReplayError(Exception):
+    ''' Raised when a replay file cannot be read. '''
+    pass
+
+
+def encodeVarint(value, out):
+    ''' Appends the unsigned LEB128 encoding of ``value`` to the bytearray ``out``. '''
+    if value < 0:
+        raise ValueError("Varints must not be negative: {}".format(value))
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decodeVarint(data, offset):
+    '''
+    Decodes the varint starting at ``offset`` of the bytearray ``data``.
+
+    :Return:
+        ``tuple``
+            ``(value, offset)``, where ``offset`` is just past the varint.
+    '''
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("The replay ends in the middle of a record.")
+        byte    = data[offset]
+        offset += 1
+        value  |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encodeJson(value, out, compress=False):
+    ''' Appends ``value`` as JSON (``zlib`` compressed if asked) preceded by its length. '''
+    payload = json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    if compress:
+        payload = zlib.compress(payload)
+    encodeVarint(len(payload), out)
+    out.extend(payload)
+
+
+def _decodeJson(data, offset, compress=False):
+    ''' Decodes a value written by :func:`replay._encodeJson`, returns ``(value, offset)``. '''
+    length, offset = decodeVarint(data, offset)
+    payload = bytes(data[offset:offset + length])
+    if len(payload) != length:
+        raise ReplayError("The replay ends in the middle of a record.")
+    if compress:
+        payload = zlib.decompress(payload)
+    return json.loads(payload.decode("utf-8")), offset + length
+
+
+def _normalize(value):
+    ''' ``value`` as it reads back from JSON, so that states can be compared. '''
+    return json.loads(json.dumps(value))
+
+
+def captureKeyframe(simulation):
+    '''
+    Returns the state saved in a keyframe: the snapshot of ``simulation`` and the
+    current :data:`constants.gameSpeed`.
+    '''
+    return {"simulation": simulation.snapshot(), "gameSpeed": constants.gameSpeed}
+
+
+def describeBoard(simulation):
+    '''
+    Describes how ``simulation`` was populated, for the header of a replay.  The Food is
+    saved as its lattice when it lies exactly on it, as every center otherwise.
+
+    :Return:
+        ``dict``
+            See :func:`replay.createSimulation`.
+    '''
+    actors = []
+    for i in range(len(simulation.posX)):
+        actors.append({
+            "start":  [simulation.startX[i], simulation.startY[i]],
+            "bounds": list(simulation.bounds[i]),
+            "hull":   simulation.hulls[i]
+        })
+
+    food    = {"bounds": list(simulation.foodBounds)}
+    lattice = simulation.foodIndex
+    exact   = lattice is not None and all(
+        lattice.center(i) == (simulation.foodX[i], simulation.foodY[i])
+        for i in range(len(simulation.foodX))
+    )
+    if exact:
+        food["lattice"] = [lattice.cols, lattice.rows, lattice.dx, lattice.dy,
+                           lattice.tx, lattice.ty]
+    else:
+        food["centers"] = [[x, y] for x, y in zip(simulation.foodX, simulation.foodY)]
+
+    return {
+        "seed":       simulation.streams.seed,
+        "width":      simulation.width,
+        "height":     simulation.height,
+        "citizenPac": simulation.citizenPac,
+        "actors":     actors,
+        "food":       food,
+        "constants":  dict((name, getattr(constants, name)) for name in REPLAY_CONSTANTS)
+    }
+
+
+def createSimulation(header):
+    '''
+    Applies the :mod:`constants` saved in ``header`` and creates a
+    :class:`simulation.Simulation` populated exactly like the recorded one.
+
+    :Parameters:
+        ``header`` (dict)
+            The header of a replay, see :func:`replay.describeBoard`.
+
+    :Return:
+        :class:`simulation.Simulation`
+            The new simulation, in its initial state.
+    '''
+    for name, value in header["constants"].items():
+        setattr(constants, name, value)
+
+    sim = Simulation(header["width"], header["height"], header["seed"])
+    for i, actor in enumerate(header["actors"]):
+        cx, cy = actor["start"]
+        hull   = [tuple(point) for point in actor["hull"]] if actor["hull"] else None
+        sim.addActor(cx, cy, actor["bounds"], i == header["citizenPac"], hull)
+
+    food   = header["food"]
+    bounds = food["bounds"]
+    if "lattice" in food:
+        lattice = FoodLattice(*food["lattice"])
+        for i in range(len(lattice)):
+            sim.addFood(lattice.center(i)[0], lattice.center(i)[1], bounds)
+        sim.setFoodLattice(lattice)
+    else:
+        for cx, cy in food["centers"]:
+            sim.addFood(cx, cy, bounds)
+    return sim
+
+
+class ReplayRecorder(object):
+    '''
+    Records the inputs of the game played on ``simulation`` to ``path``.  The
+    :class:`model.Scene` reports every input as it happens, see
+    :func:`model.Scene.startRecording`.
+
+    :Parameters:
+        ``path`` (str)
+            The file to write, overwritten if it exists.
+
+        ``simulation`` (:class:`simulation.Simulation`)
+            The populated simulation of the game being recorded.
+
+        ``keyframeInterval`` (int)
+            The number of ticks between keyframes.
+    '''
+    def __init__(self, path, simulation, keyframeInterval):
+        self.simulation       = simulation
+        self.keyframeInterval = max(1, int(keyframeInterval))
+        self.file             = open(path, "wb")
+        self.buffer           = bytearray(MAGIC)
+        self.lastTick         = simulation.tick
+        self.stepTick         = simulation.tick
+        # What the replay will have at this point, to only record actual changes
+        self.flags   = simulation.moveFlags[simulation.citizenPac]
+        self.speed   = constants.gameSpeed
+        self.running = simulation.running
+
+        encodeVarint(FORMAT_VERSION, self.buffer)
+        _encodeJson(describeBoard(simulation), self.buffer)
+        self.keyframe()
+
+    def _record(self, kind):
+        tick = self.simulation.tick
+        encodeVarint(((tick - self.lastTick) << KIND_BITS) | kind, self.buffer)
+        self.lastTick = tick
+
+    def move(self, direction, press):
+        '''
+        Records a call to :func:`view.actors.CitizenPacActor.queueMove`.  Presses of a
+        key that is already held (keyboard auto-repeat) change nothing and are skipped.
+        '''
+        flags = self.flags | direction if press else self.flags & ~direction
+        if flags == self.flags:
+            return
+        self._record(MOVE_PRESS if press else MOVE_RELEASE)
+        encodeVarint(direction, self.buffer)
+        self.flags = flags
+
+    def setRunning(self, running):
+        ''' Records the game being paused or resumed. '''
+        if running == self.running:
+            return
+        self._record(RUNNING)
+        encodeVarint(1 if running else 0, self.buffer)
+        self.running = running
+
+    def reset(self):
+        ''' Records :func:`simulation.Simulation.reset`, which makes CitizenPac stationary. '''
+        self._record(RESET)
+        self.flags = constants.STATIONARY
+
+    def beforeStep(self):
+        '''
+        Called right before every step.  Records CitizenPac's move flags and the game
+        speed if they changed without a recorded input, so that the replay steps from
+        exactly the same state.
+        '''
+        self.stepTick = self.simulation.tick
+        flags = self.simulation.moveFlags[self.simulation.citizenPac]
+        if flags != self.flags:
+            self._record(MOVE_FLAGS)
+            encodeVarint(flags, self.buffer)
+            self.flags = flags
+        if constants.gameSpeed != self.speed:
+            self._record(SPEED)
+            self.buffer.extend(struct.pack(SPEED_FORMAT, constants.gameSpeed))
+            self.speed = constants.gameSpeed
+
+    def afterStep(self):
+        '''
+        Called right after every step.  Marks the step if CitizenPac hit a Ghost (the
+        tick did not advance), otherwise saves a keyframe when one is due.
+        '''
+        if self.simulation.tick == self.stepTick:
+            self._record(LOST_LIFE)
+        elif self.simulation.tick % self.keyframeInterval == 0:
+            self.keyframe()
+
+    def keyframe(self):
+        ''' Saves the complete state of the simulation, and writes what was recorded. '''
+        self._record(KEYFRAME)
+        _encodeJson(captureKeyframe(self.simulation), self.buffer, compress=True)
+        self.flush()
+
+    def flush(self):
+        ''' Writes everything recorded so far to the file. '''
+        if self.buffer:
+            self.file.write(bytes(self.buffer))
+            self.file.flush()
+            self.buffer = bytearray()
+
+    def close(self):
+        ''' Marks the end of the recording and closes the file. '''
+        if self.file is None:
+            return
+        self._record(END)
+        self.flush()
+        self.file.close()
+        self.file = None
+
+
+class Replay(object):
+    '''
+    Plays back a recorded game on a headless :class:`simulation.Simulation`, as fast as
+    it can be stepped.
+
+    :Parameters:
+        ``header`` (dict)
+            The header of the replay, see :func:`replay.describeBoard`.
+
+        ``records`` (list)
+            Every ``(tick, kind, value)`` record, in the order they were recorded.
+
+    :Attributes:
+        ``simulation`` (:class:`simulation.Simulation`)
+            The simulation the replay is played on.
+
+        ``endTick`` (int)
+            The tick the recording stopped on.
+
+        ``mismatches`` (list)
+            The ticks of the keyframes the simulation did not match when they were
+            passed, see :func:`replay.Replay.verify`.
+    '''
+    def __init__(self, header, records):
+        self.header     = header
+        self.records    = records
+        self.keyframes  = [i for i, record in enumerate(records) if record[1] == KEYFRAME]
+        self.keyTicks   = [records[i][0] for i in self.keyframes]
+        self.endTick    = records[-1][0] if records else 0
+        self.simulation = createSimulation(header)
+        self.mismatches = []
+        self.cursor     = 0
+        if not self.keyframes:
+            raise ReplayError("The replay has no keyframes.")
+        self.seek(0)
+
+    def restoreKeyframe(self, position):
+        ''' Restores the keyframe at ``position`` of ``self.keyframes``. '''
+        index = self.keyframes[position]
+        state = self.records[index][2]
+        self.simulation.restore(state["simulation"])
+        constants.setGameSpeed(state["gameSpeed"])
+        self.cursor = index + 1
+
+    def applyInputs(self):
+        '''
+        Applies every input recorded on the current tick, i.e. everything that happened
+        before the next step, stopping early at a step that lost a life.  Keyframes
+        passed on the way are checked against the simulation.
+
+        :Return:
+            ``bool``
+                ``True`` if it stopped at a step that lost a life.
+        '''
+        sim = self.simulation
+        pac = sim.citizenPac
+        while self.cursor < len(self.records) and self.records[self.cursor][0] <= sim.tick:
+            tick, kind, value = self.records[self.cursor]
+            self.cursor += 1
+            if kind == MOVE_PRESS:
+                sim.moveFlags[pac] |= value
+            elif kind == MOVE_RELEASE:
+                sim.moveFlags[pac] &= ~value
+            elif kind == MOVE_FLAGS:
+                sim.moveFlags[pac] = value
+            elif kind == RUNNING:
+                sim.running = bool(value)
+            elif kind == RESET:
+                sim.reset()
+            elif kind == SPEED:
+                constants.setGameSpeed(value)
+            elif kind == LOST_LIFE:
+                return True
+            elif kind == KEYFRAME:
+                if _normalize(captureKeyframe(sim)) != value:
+                    self.mismatches.append(tick)
+        return False
+
+    def run(self, untilTick=None):
+        '''
+        Plays the replay up to tick ``untilTick``, or to the very end of the recording
+        if ``None``.  Otherwise the inputs recorded on ``untilTick`` itself are not
+        applied yet.
+        Stops early if the game was left paused.
+
+        :Return:
+            ``int``
+                The tick the simulation is on.
+        '''
+        end = self.endTick if untilTick is None else min(untilTick, self.endTick)
+        sim = self.simulation
+        while sim.tick < end:
+            self.applyInputs()
+            # The game is only stepped while it runs, a resume would be on this tick
+            if not sim.running:
+                break
+            sim.step()
+
+        if untilTick is None:
+            # The last tick can still hold inputs, and a step that lost a life
+            while self.applyInputs():
+                sim.step()
+        return sim.tick
+
+    def seek(self, tick):
+        '''
+        Moves the replay to ``tick`` by restoring the last keyframe at or before it and
+        playing forward from there.
+
+        :Return:
+            ``int``
+                The tick the simulation is on.
+        '''
+        position = max(0, bisect.bisect_right(self.keyTicks, tick) - 1)
+        self.restoreKeyframe(position)
+        return self.run(tick)
+
+    def verify(self):
+        '''
+        Plays the whole replay from the start, checking the simulation against every
+        keyframe on the way.
+
+        :Return:
+            ``list``
+                The ticks of the keyframes that did not match, empty if the replay
+                reproduced the recorded game exactly.
+        '''
+        self.mismatches = []
+        self.seek(0)
+        self.run()
+        return self.mismatches
+
+
+def loadReplay(path):
+    '''
+    Reads the replay at ``path``.
+
+    :Return:
+        :class:`replay.Replay`
+            The replay, positioned at tick ``0``.
+
+    :Raises:
+        :class:`replay.ReplayError`
+            If the file is not a replay of a supported version.
+    '''
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ReplayError("{} is not a CitizenPac replay.".format(path))
+
+    version, offset = decodeVarint(data, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise ReplayError("Unsupported replay version {}.".format(version))
+    header, offset = _decodeJson(data, offset)
+
+    records = []
+    tick    = 0
+    while offset < len(data):
+        tag, offset = decodeVarint(data, offset)
+        tick += tag >> KIND_BITS
+        kind  = tag & ((1 << KIND_BITS) - 1)
+        value = None
+        if kind in (MOVE_PRESS, MOVE_RELEASE, MOVE_FLAGS, RUNNING):
+            value, offset = decodeVarint(data, offset)
+        elif kind == SPEED:
+            size  = struct.calcsize(SPEED_FORMAT)
+            value = struct.unpack(SPEED_FORMAT, bytes(data[offset:offset + size]))[0]
+            offset += size
+        elif kind == KEYFRAME:
+            value, offset = _decodeJson(data, offset, compress=True)
+        records.append((tick, kind, value))
+    return Replay(header, records)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Plays back a CitizenPac replay headless.")
+    parser.add_argument("path", help="the replay recorded with --record")
+    parser.add_argument("--seek", type=int, default=None,
+                        help="only play up to this tick, starting from the nearest keyframe")
+    parser.add_argument("--verify", action="store_true",
+                        help="play the whole replay and check it against every keyframe")
+    args = parser.parse_args(argv[1:])
+
+    try:
+        replay = loadReplay(args.path)
+    except (IOError, OSError, ReplayError) as e:
+        print("Unable to load the replay: {}".format(e))
+        return 1
+
+    start = time.time()
+    if args.verify:
+        mismatches = replay.verify()
+    elif args.seek is not None:
+        replay.seek(args.seek)
+    else:
+        replay.run()
+    elapsed = time.time() - start
+
+    sim = replay.simulation
+    print("Seed {}, tick {} of {} in {:.3f} s".format(replay.header["seed"], sim.tick,
+                                                       replay.endTick, elapsed))
+    print("Lives {}, Food eaten {} of {}".format(sim.lives, sim.foodEaten, sim.numFood()))
+    if args.verify:
+        if mismatches:
+            print("Diverged from the recording at ticks {}".format(mismatches))
+            return 1
+        print("Matched all {} keyframes".format(len(replay.keyframes)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,159 @@
+'''
+A central scheduler for everything in the game that happens on a timer.
+
+Rather than every Ghost owning a ``QTimer`` that fires on wall-clock time, timed
+behaviour registers with one :class:`scheduler.TimerWheel` that is advanced once per
+simulation tick by :func:`simulation.Simulation.step`.  Timers therefore stay in step
+with the game loop, fire in a deterministic order, and run exactly as fast as the
+simulation does (including headless, faster than real time).
+'''
+
+
+class Timer(object):
+    '''
+    A handle to a callback registered with a :class:`scheduler.TimerWheel`.  Do not
+    create these directly, use :func:`scheduler.TimerWheel.schedule` or
+    :func:`scheduler.TimerWheel.every`.
+
+    :Attributes:
+        ``due`` (int)
+            The tick the callback will next fire on.
+
+        ``period`` (int)
+            The number of ticks between repeats, ``0`` for a one shot timer.
+
+        ``seq`` (int)
+            The registration order, used to fire timers due on the same tick in a
+            deterministic order.
+
+        ``callback`` (callable), ``args`` (tuple)
+            What to call, and with which arguments.
+
+        ``active`` (bool)
+            ``False`` once the timer has been cancelled (or a one shot timer fired).
+    '''
+    __slots__ = ("due", "period", "seq", "callback", "args", "active")
+
+    def __init__(self, due, period, seq, callback, args):
+        self.due      = due
+        self.period   = period
+        self.seq      = seq
+        self.callback = callback
+        self.args     = args
+        self.active   = True
+
+
+class TimerWheel(object):
+    '''
+    A hashed timer wheel keyed by simulation tick.  A timer due on tick ``t`` lives in
+    slot ``t % size``, so registering, cancelling and advancing are all constant time
+    no matter how many timers there are.  Timers due on the same tick fire in the order
+    they were first registered.
+
+    :Parameters:
+        ``size`` (int)
+            The number of slots in the wheel.  Timers further than ``size`` ticks in
+            the future simply stay in their slot until their tick comes around.
+
+    :Attributes:
+        ``tick`` (int)
+            The current tick, i.e. how many times :func:`scheduler.TimerWheel.advance`
+            has been called.
+    '''
+    def __init__(self, size=256):
+        self.size  = size
+        self.slots = [[] for _ in range(size)]
+        self.tick  = 0
+        self._seq  = 0
+
+    def _insert(self, timer):
+        self.slots[timer.due % self.size].append(timer)
+
+    def schedule(self, delay, callback, *args):
+        '''
+        Calls ``callback(*args)`` once, ``delay`` ticks from now.
+
+        :Parameters:
+            ``delay`` (int)
+                The number of ticks to wait, at least ``1``.
+
+        :Return:
+            :class:`scheduler.Timer`
+                The handle to cancel the timer with.
+        '''
+        timer = Timer(self.tick + max(1, int(delay)), 0, self._seq, callback, args)
+        self._seq += 1
+        self._insert(timer)
+        return timer
+
+    def every(self, period, callback, *args):
+        '''
+        Calls ``callback(*args)`` every ``period`` ticks, starting ``period`` ticks
+        from now.
+
+        :Parameters:
+            ``period`` (int)
+                The number of ticks between calls, at least ``1``.
+
+        :Return:
+            :class:`scheduler.Timer`
+                The handle to cancel the timer with.
+        '''
+        period = max(1, int(period))
+        timer  = Timer(self.tick + period, period, self._seq, callback, args)
+        self._seq += 1
+        self._insert(timer)
+        return timer
+
+    def cancel(self, timer):
+        '''
+        Stops ``timer`` from firing again.  It is removed from the wheel lazily, the
+        next time its slot comes around.
+        '''
+        timer.active = False
+
+    def restore(self, tick, timers):
+        '''
+        Moves the wheel to ``tick``, holding exactly ``timers``, e.g. when a saved game
+        state is restored (see :func:`simulation.Simulation.restore`).  The ``due`` tick
+        of every timer must already be set, and only the active ones are kept.
+        '''
+        self.tick  = tick
+        self.slots = [[] for _ in range(self.size)]
+        for timer in timers:
+            if timer.active:
+                self._insert(timer)
+
+    def advance(self):
+        '''
+        Moves to the next tick and fires every timer due on it, in registration order.
+        Repeating timers are rescheduled before the next one fires.
+        '''
+        self.tick += 1
+        slot = self.slots[self.tick % self.size]
+        if not slot:
+            return
+
+        due  = []
+        keep = []
+        for timer in slot:
+            if not timer.active:
+                continue
+            if timer.due == self.tick:
+                due.append(timer)
+            else:
+                keep.append(timer)
+        self.slots[self.tick % self.size] = keep
+
+        if len(due) > 1:
+            due.sort(key=lambda timer: timer.seq)
+        for timer in due:
+            # A callback that fired before may have cancelled it
+            if not timer.active:
+                continue
+            if timer.period:
+                timer.due += timer.period
+                self._insert(timer)
+            else:
+                timer.active = False
+            timer.callback(*timer.args)
@@ -0,0 +1,1072 @@
+'''
+The headless simulation core of the game.
+
+Every rule of the game (moving the actors, wrapping them around the edges of the board,
+collisions with the Ghosts and the Food, and keeping track of how much Food has been
+eaten) is stepped here on plain array-backed state.  Nothing in this module depends on
+``PyQt4``: the :class:`model.Scene` owns a :class:`simulation.Simulation` and simply
+mirrors its state onto the ``QGraphicsItem`` instances that are drawn on screen.
+
+Because no display is required, a game can be run many thousands of times faster than
+real time, e.g.
+
+.. code-block:: py
+
+   import simulation
+
+   sim = simulation.createHeadless(800.0, 740.0)
+   sim.running = True
+   status = simulation.Simulation.CONTINUE
+   while status == simulation.Simulation.CONTINUE and sim.tick < 100000:
+       status = sim.step()
+'''
+
+import math
+import random
+from array import array
+
+import constants
+import splines
+from navigation import NavigationGrid
+from scheduler import TimerWheel
+from streams import RandomStreams
+
+
+def actorStartPositions():
+    '''
+    Returns the starting locations of CitizenPac and the Ghosts.  By default, they are
+    dispersed in a circular pattern of radius :data:`constants.DISPERSION_RADIUS`, with
+    CitizenPac always at the bottom.
+
+    :Return:
+        ``list``
+            A length :data:`constants.NUM_GHOSTS` ``+ 1`` list of ``(cx, cy)`` tuples.
+            The first entry is for CitizenPac, the rest are for the Ghosts.
+    '''
+    nActors   = float(constants.NUM_GHOSTS + 1)  # All ghosts plus CitizenPac
+    two_pi    = 2.0 * math.pi
+    positions = []
+    for i in range(int(nActors)):
+        t  = (i * two_pi) / nActors
+        cx = math.sin(t) * constants.DISPERSION_RADIUS
+        cy = math.cos(t) * constants.DISPERSION_RADIUS
+        positions.append((cx, cy))
+    return positions
+
+
+def foodLattice(width, height):
+    '''
+    Computes the regular lattice that the Food is placed on, i.e. steps (1) and (2) of
+    :func:`model.generateFoodGrid`.
+
+    :Parameters:
+        ``width`` (float)
+            The total width of the game board.
+
+        ``height`` (float)
+            The total height of the game board.
+
+    :Return:
+        ``tuple``
+            The tuple ``(nx, ny, dx, dy, tx, ty)``, see :func:`model.generateFoodGrid`.
+    '''
+    half_width  = width * 0.5
+    half_height = height * 0.5
+    diam        = 2.0 * constants.FOOD_RADIUS
+    food_fill   = diam * constants.FOOD_SPARSITY
+    half_fill   = food_fill * 0.5
+
+    # 1. Compute the x and y scaling factors
+    nx = float(int(width)  / int(food_fill))
+    ny = float(int(height) / int(food_fill))
+    # constraints: at least 4 food always
+    nx = max(nx, 2.0)  # Must be >= 2 since we need to divide by
+    ny = max(ny, 2.0)  # nx - 1.0 in the next step!
+
+    # 2. Compute the change in position for x / y directions, and coordinate transforms
+    dx = (width  - food_fill) / (nx - 1.0)
+    dy = (height - food_fill) / (ny - 1.0)
+    # coordinate transformation
+    tx = -half_width  + half_fill
+    ty = -half_height + half_fill
+
+    return nx, ny, dx, dy, tx, ty
+
+
+def foodCenters(width, height):
+    '''
+    Returns the centers of all of the Food, in the same order as
+    :func:`model.generateFoodGrid` (column by column).
+
+    :Return:
+        ``list``
+            A list of ``(cx, cy)`` tuples.
+    '''
+    nx, ny, dx, dy, tx, ty = foodLattice(width, height)
+    centers = []
+    a = 0
+    while a < nx:
+        d = 0
+        while d < ny:
+            centers.append((a * dx + tx, d * dy + ty))
+            d += 1
+        a += 1
+    return centers
+
+
+class FoodLattice(object):
+    '''
+    A spatial index for Food placed on the regular lattice computed by
+    :func:`simulation.foodLattice`.  Rather than testing every Food for a collision,
+    the lattice parameters map a rectangle directly onto the handful of Food that could
+    possibly overlap it, so the cost of a query does not depend on how much Food there
+    is on the board.
+
+    Food is assumed to be numbered column by column, exactly as
+    :func:`model.generateFoodGrid` and :func:`simulation.foodCenters` order it.
+
+    :Parameters:
+        ``nx``, ``ny``, ``dx``, ``dy``, ``tx``, ``ty`` (float)
+            The lattice parameters, see :func:`simulation.foodLattice`.
+
+    :Attributes:
+        ``cols`` (int), ``rows`` (int)
+            The number of columns / rows of Food.
+
+        ``dx``, ``dy``, ``tx``, ``ty`` (float)
+            The spacing and translation of the lattice.
+    '''
+    def __init__(self, nx, ny, dx, dy, tx, ty):
+        # The while loops generating the food run for as long as `a < nx`
+        self.cols = int(math.ceil(nx))
+        self.rows = int(math.ceil(ny))
+        self.dx   = dx
+        self.dy   = dy
+        self.tx   = tx
+        self.ty   = ty
+
+    def __len__(self):
+        return self.cols * self.rows
+
+    def center(self, index):
+        ''' Returns the ``(cx, cy)`` center of the Food at ``index``. '''
+        a, d = divmod(index, self.rows)
+        return a * self.dx + self.tx, d * self.dy + self.ty
+
+    def matches(self, foodX, foodY):
+        '''
+        Returns whether or not the centers in ``foodX`` and ``foodY`` lie exactly on
+        this lattice, in order.  The index is only usable when this is ``True``.
+        '''
+        if len(foodX) != len(self) or self.dx <= 0.0 or self.dy <= 0.0:
+            return False
+        for i in range(len(foodX)):
+            cx, cy = self.center(i)
+            if abs(foodX[i] - cx) > 1e-6 or abs(foodY[i] - cy) > 1e-6:
+                return False
+        return True
+
+    def candidates(self, left, top, right, bottom, foodBounds):
+        '''
+        Returns the indices of the Food whose ``foodBounds`` could overlap the scene
+        rectangle ``(left, top, right, bottom)``.
+
+        :Return:
+            ``list``
+                The candidate Food indices.  Every Food that overlaps the rectangle is
+                included, but the caller must still perform the exact test.
+        '''
+        fl, ft, fr, fb = foodBounds
+        aLo = max(0, int(math.floor((left - fr - self.tx) / self.dx)))
+        aHi = min(self.cols - 1, int(math.ceil((right - fl - self.tx) / self.dx)))
+        dLo = max(0, int(math.floor((top - fb - self.ty) / self.dy)))
+        dHi = min(self.rows - 1, int(math.ceil((bottom - ft - self.ty) / self.dy)))
+
+        found = []
+        for a in range(aLo, aHi + 1):
+            base = a * self.rows
+            for d in range(dLo, dHi + 1):
+                found.append(base + d)
+        return found
+
+
+def _projection(polygon, x, y, nx, ny):
+    ''' The interval ``polygon`` positioned at ``(x, y)`` covers along ``(nx, ny)``. '''
+    offset = x * nx + y * ny
+    lo = hi = polygon[0][0] * nx + polygon[0][1] * ny
+    for px, py in polygon:
+        d = px * nx + py * ny
+        if d < lo:
+            lo = d
+        elif d > hi:
+            hi = d
+    return lo + offset, hi + offset
+
+
+def convexPolygonsOverlap(a, ax, ay, b, bx, by):
+    '''
+    Returns whether or not the convex polygons ``a`` positioned at ``(ax, ay)`` and
+    ``b`` positioned at ``(bx, by)`` overlap, using the separating axis theorem: two
+    convex polygons are disjoint if and only if the normal of one of their edges
+    separates them.
+
+    :Parameters:
+        ``a``, ``b`` (list)
+            The ``(x, y)`` vertices of each polygon in local coordinates, see
+            :func:`splines.convexHull`.
+
+    :Return:
+        ``bool``
+            ``True`` if the interiors of the polygons overlap.
+    '''
+    for polygon in (a, b):
+        n = len(polygon)
+        for i in range(n):
+            x0, y0 = polygon[i]
+            x1, y1 = polygon[(i + 1) % n]
+            nx = y0 - y1
+            ny = x1 - x0
+            aLo, aHi = _projection(a, ax, ay, nx, ny)
+            bLo, bHi = _projection(b, bx, by, nx, ny)
+            if aHi <= bLo or bHi <= aLo:
+                return False
+    return True
+
+
+def circleOverlapsConvexPolygon(cx, cy, radius, polygon, px, py):
+    '''
+    Returns whether or not the circle of ``radius`` centered at ``(cx, cy)`` overlaps
+    the convex ``polygon`` positioned at ``(px, py)``: either the center is inside the
+    polygon, or it is closer than ``radius`` to one of its edges.
+    '''
+    # Work in the local coordinates of the polygon
+    cx -= px
+    cy -= py
+    r2 = radius * radius
+    n  = len(polygon)
+    inside = True
+    sign   = 0.0
+    for i in range(n):
+        x0, y0 = polygon[i]
+        x1, y1 = polygon[(i + 1) % n]
+        ex = x1 - x0
+        ey = y1 - y0
+        wx = cx - x0
+        wy = cy - y0
+
+        # The center is inside when it is on the same side of every edge
+        side = ex * wy - ey * wx
+        if side * sign < 0.0:
+            inside = False
+        elif side != 0.0:
+            sign = side
+
+        # Squared distance from the center to this edge
+        length2 = ex * ex + ey * ey
+        t = 0.0 if length2 == 0.0 else max(0.0, min(1.0, (wx * ex + wy * ey) / length2))
+        dx = wx - t * ex
+        dy = wy - t * ey
+        if dx * dx + dy * dy < r2:
+            return True
+    return inside
+
+
+def randomDirectionChange(moveFlags, rng=random):
+    '''
+    The Ghost movement rule: with probability :math:`p = \\frac{1}{2}` either add or
+    remove a direction from ``moveFlags``.
+
+    :Parameters:
+        ``moveFlags`` (int)
+            The current move flags of the Ghost.
+
+        ``rng`` (:class:`random.Random`)
+            The random number generator to draw from.  Defaults to the global
+            :mod:`random` module.
+
+    :Return:
+        ``int``
+            The new move flags.
+    '''
+    # shuffle so there is no direction bias
+    dirs = [constants.MOVE_NORTH, constants.MOVE_SOUTH,
+            constants.MOVE_EAST,  constants.MOVE_WEST]
+    rng.shuffle(dirs)
+
+    # Either try and remove a direction or add one
+    r1 = rng.random()
+    if r1 < 0.5:
+        for d in dirs:
+            if (moveFlags & d) == d:
+                return moveFlags & ~d
+
+        # If no directions could be removed, make sure that the moveFlags are set to
+        # constants.STATIONARY for consistency
+        return constants.STATIONARY
+    else:
+        for d in dirs:
+            if not (moveFlags & d) == d:
+                return moveFlags | d
+        return moveFlags
+
+
+class Simulation(object):
+    '''
+    The state of one game, stored in flat arrays so that it can be stepped without any
+    graphics.  Actors (CitizenPac and the Ghosts) and Food are referred to by their
+    integer index into these arrays, as returned by
+    :func:`simulation.Simulation.addActor` and :func:`simulation.Simulation.addFood`.
+
+    All bounding rectangles are ``(left, top, right, bottom)`` tuples in the local
+    coordinates of the actor, exactly like the ``boundingRect`` of the
+    ``QGraphicsItem`` that draws it.
+
+    :Parameters:
+        ``width`` (float)
+            The width of the game board.
+
+        ``height`` (float)
+            The height of the game board.
+
+        ``seed`` (int)
+            The seed of the game, ``None`` for a fresh one.  See
+            :class:`streams.RandomStreams`.
+
+    :Attributes:
+        ``width`` (float), ``height`` (float)
+            The size of the game board, used for wrapping the actors.
+
+        ``posX``, ``posY`` (:class:`array.array`)
+            The current position of every actor.
+
+        ``startX``, ``startY`` (:class:`array.array`)
+            The starting position of every actor, restored by
+            :func:`simulation.Simulation.reset`.
+
+        ``moveFlags`` (:class:`array.array`)
+            The move flags of every actor, see :class:`view.actors.Actor`.
+
+        ``bounds`` (list)
+            The local bounding rectangle of every actor.
+
+        ``hulls`` (list)
+            The local convex hull of every actor (see :func:`splines.convexHull`), or
+            ``None`` for actors whose shape is their bounding rectangle.
+
+        ``circles`` (list)
+            The local ``(cx, cy, radius)`` bounding circle of every actor with a hull,
+            ``None`` otherwise.
+
+        ``citizenPac`` (int)
+            The index of CitizenPac, ``None`` until it has been added.
+
+        ``ghosts`` (list)
+            The indices of the Ghosts.
+
+        ``foodX``, ``foodY`` (:class:`array.array`)
+            The center of every Food.
+
+        ``eatenBits`` (bytearray)
+            One bit per Food, set if the Food at that index has been eaten.  Bit
+            ``index & 7`` of byte ``index >> 3``, see
+            :func:`simulation.Simulation.isEaten`.
+
+        ``eaten`` (:class:`array.array`)
+            The indices of the Food eaten this round, in the order they were eaten.
+            Resetting only has to visit these.
+
+        ``foodBounds`` (tuple)
+            The local bounding rectangle shared by all Food.  With
+            :data:`constants.PRECISE_COLLISIONS`, Food is treated as the circle
+            inscribed in this rectangle.
+
+        ``foodEaten`` (int)
+            How many Food have been eaten this round, i.e. the length of ``eaten``.
+
+        ``foodIndex`` (:class:`simulation.FoodLattice`)
+            The spatial index used to find the Food CitizenPac may be colliding with,
+            see :func:`simulation.Simulation.setFoodLattice`.  When ``None``, every Food
+            is tested.
+
+        ``outerSweep``, ``innerSweep`` (float), ``decreasing`` (bool)
+            The animation state shared by all Food, see :class:`view.actors.Food`.
+
+        ``lives`` (int)
+            The number of lives CitizenPac has left.
+
+        ``running`` (bool)
+            Collisions are only processed while the game is running.
+
+        ``tick`` (int)
+            The number of steps taken so far, i.e. the tick of ``scheduler``.
+
+        ``scheduler`` (:class:`scheduler.TimerWheel`)
+            Every timed behaviour in the game registers here, and fires in a
+            deterministic order at the end of :func:`simulation.Simulation.step`.  The
+            Food animation registers first, then every Ghost as it is added.
+
+        ``ghostMoveTicks`` (int)
+            Every Ghost applies :func:`simulation.Simulation.changeDirection` once every
+            ``ghostMoveTicks`` steps, i.e. every :data:`constants.GHOST_MOVE_TIME`
+            milliseconds of game time (see :data:`constants.SIMULATION_TIMESTEP`).
+
+        ``foodTimer`` (:class:`scheduler.Timer`)
+            The timer animating the Food every tick.
+
+        ``chaseTimer`` (:class:`scheduler.Timer`)
+            The timer steering the Ghosts towards CitizenPac every tick, when
+            :data:`constants.GHOST_CHASE` is ``True``.  See
+            :func:`simulation.Simulation.chase`.
+
+        ``navigation`` (:class:`navigation.NavigationGrid`)
+            The grid the Ghosts chase CitizenPac on, created on first use.
+
+        ``ghostTimers`` (list)
+            The :class:`scheduler.Timer` of every Ghost, in the same order as
+            ``ghosts``.
+
+        ``streams`` (:class:`streams.RandomStreams`)
+            The seeded random number streams of this game.  Every Ghost changes
+            direction with its own substream (see :func:`streams.RandomStreams.ghost`),
+            the view draws colors and the Food animation from the ``"colors"`` and
+            ``"food"`` substreams.
+
+        ``eatenThisStep`` (list)
+            The indices of the Food eaten during the last call to
+            :func:`simulation.Simulation.step`.
+
+        ``actorMoved`` (bytearray)
+            ``1`` for every actor whose position changed since the last call to
+            :func:`simulation.Simulation.clearMoved`, so that the view only has to
+            mirror the actors that actually moved.
+
+        ``collisionTests`` (int)
+            How many collision tests the last call to :func:`simulation.Simulation.step`
+            performed (Ghosts plus candidate Food).
+    '''
+    CONTINUE  = 0
+    ''' Returned by :func:`simulation.Simulation.step` when nothing special happened. '''
+
+    LOST_LIFE = 1
+    ''' Returned by :func:`simulation.Simulation.step` when CitizenPac hit a Ghost. '''
+
+    WON       = 2
+    ''' Returned by :func:`simulation.Simulation.step` when all Food has been eaten. '''
+
+    def __init__(self, width, height, seed=None):
+        self.width  = float(width)
+        self.height = float(height)
+        # Actor state
+        self.posX       = array('d')
+        self.posY       = array('d')
+        self.startX     = array('d')
+        self.startY     = array('d')
+        self.moveFlags  = array('l')
+        self.actorMoved = bytearray()
+        self.bounds     = []
+        self.hulls      = []
+        self.circles    = []
+        self.citizenPac = None
+        self.ghosts     = []
+        # Food state
+        self.foodX      = array('d')
+        self.foodY      = array('d')
+        self.eatenBits  = bytearray()
+        self.eaten      = array('l')
+        self.foodBounds = (0.0, 0.0, 0.0, 0.0)
+        self.foodIndex  = None
+        self.outerSweep = 360.0
+        self.innerSweep = 0.0
+        self.decreasing = True
+        # Game state
+        self.lives          = constants.NUM_LIVES
+        self.running        = False
+        self.streams        = RandomStreams(seed)
+        self.eatenThisStep  = []
+        self.collisionTests = 0
+        # Timed behaviour
+        self.scheduler      = TimerWheel()
+        self.ghostMoveTicks = max(1, int(round(
+            constants.GHOST_MOVE_TIME / float(constants.SIMULATION_TIMESTEP)
+        )))
+        self.ghostTimers    = []
+        self.foodTimer      = self.scheduler.every(1, self.animateFood)
+        self.chaseTimer     = self.scheduler.every(1, self.chase)
+        self.navigation     = None
+
+    @property
+    def foodEaten(self):
+        ''' The number of Food eaten this round. '''
+        return len(self.eaten)
+
+    @property
+    def tick(self):
+        ''' The number of steps taken so far. '''
+        return self.scheduler.tick
+
+    def setBounds(self, width, height):
+        '''
+        Sets the size of the game board that the actors are wrapped to.
+        '''
+        width  = float(width)
+        height = float(height)
+        if (width, height) != (self.width, self.height):
+            # The navigation grid is aligned with the board
+            self.navigation = None
+        self.width  = width
+        self.height = height
+
+    def addActor(self, cx, cy, bounds, isCitizenPac=False, hull=None):
+        '''
+        Adds a moving actor starting at ``(cx, cy)``.  Ghosts are also registered with
+        the ``scheduler`` to change direction every ``ghostMoveTicks`` steps.
+
+        :Parameters:
+            ``cx`` (float), ``cy`` (float)
+                The starting position.
+
+            ``bounds`` (tuple)
+                The local ``(left, top, right, bottom)`` bounding rectangle.
+
+            ``hull`` (list)
+                The local convex hull of the actor, used for precise collisions (see
+                :func:`simulation.Simulation.actorsCollide`).  ``None`` treats the actor
+                as its bounding rectangle.
+
+            ``isCitizenPac`` (bool)
+                ``True`` for CitizenPac, ``False`` for a Ghost.
+
+        :Return:
+            ``int``
+                The index of the new actor.
+        '''
+        if isCitizenPac and self.citizenPac is not None:
+            raise RuntimeError("There can only be one CitizenPac per game!")
+
+        index = len(self.posX)
+        self.posX.append(cx)
+        self.posY.append(cy)
+        self.startX.append(cx)
+        self.startY.append(cy)
+        self.moveFlags.append(constants.STATIONARY)
+        self.actorMoved.append(1)
+        self.bounds.append(tuple(bounds))
+        if hull:
+            self.hulls.append(list(hull))
+            self.circles.append(splines.boundingCircle(hull))
+        else:
+            self.hulls.append(None)
+            self.circles.append(None)
+        if isCitizenPac:
+            self.citizenPac = index
+        else:
+            self.ghosts.append(index)
+            self.ghostTimers.append(
+                self.scheduler.every(self.ghostMoveTicks, self.changeDirection, index)
+            )
+        return index
+
+    def addFood(self, cx, cy, bounds):
+        '''
+        Adds a Food centered at ``(cx, cy)``.  All Food is assumed to share the same
+        ``bounds`` (they all have radius :data:`constants.FOOD_RADIUS`).
+
+        :Return:
+            ``int``
+                The index of the new Food.
+        '''
+        index = len(self.foodX)
+        self.foodX.append(cx)
+        self.foodY.append(cy)
+        if index & 7 == 0:
+            self.eatenBits.append(0)
+        self.foodBounds = tuple(bounds)
+        return index
+
+    def setFoodLattice(self, lattice):
+        '''
+        Uses ``lattice`` as the spatial index for Food collisions, provided that the
+        Food that has been added actually lies on it.  Call this after all of the Food
+        has been added.
+
+        :Parameters:
+            ``lattice`` (:class:`simulation.FoodLattice`)
+                The lattice the Food was generated on.
+
+        :Return:
+            ``bool``
+                ``True`` if the index will be used, ``False`` if the Food does not match
+                the lattice (in which case every Food is tested, as before).
+        '''
+        if lattice is not None and lattice.matches(self.foodX, self.foodY):
+            self.foodIndex = lattice
+        else:
+            self.foodIndex = None
+        return self.foodIndex is not None
+
+    def numFood(self):
+        ''' Returns the total number of Food in the game. '''
+        return len(self.foodX)
+
+    def position(self, index):
+        ''' Returns the current ``(x, y)`` position of the actor at ``index``. '''
+        return self.posX[index], self.posY[index]
+
+    def isEaten(self, index):
+        ''' Returns whether or not the Food at ``index`` has been eaten. '''
+        return (self.eatenBits[index >> 3] >> (index & 7)) & 1 != 0
+
+    def foodIn(self, left, top, right, bottom):
+        '''
+        Returns the indices of the Food that has not been eaten and whose ``foodBounds``
+        overlap the scene rectangle ``(left, top, right, bottom)``.  Uses ``foodIndex``
+        when there is one, rather than testing every Food.
+
+        :Return:
+            ``list``
+                The indices of the Food, in increasing order.
+        '''
+        bounds = self.foodBounds
+        if self.foodIndex is None:
+            candidates = range(len(self.foodX))
+        else:
+            candidates = self.foodIndex.candidates(left, top, right, bottom, bounds)
+
+        l, t, r, b = bounds
+        foodX   = self.foodX
+        foodY   = self.foodY
+        eaten   = self.eatenBits
+        overlap = []
+        for i in candidates:
+            if (eaten[i >> 3] >> (i & 7)) & 1:
+                continue
+            cx = foodX[i]
+            cy = foodY[i]
+            if cx + l < right and left < cx + r and cy + t < bottom and top < cy + b:
+                overlap.append(i)
+        return overlap
+
+    def reset(self):
+        '''
+        Moves every actor back to its starting position and makes it stationary, makes
+        all Food edible again and restarts the Food animation.  The number of lives is
+        left untouched.  Only the Food that was eaten is visited.
+        '''
+        for i in range(len(self.posX)):
+            self.posX[i]      = self.startX[i]
+            self.posY[i]      = self.startY[i]
+            self.moveFlags[i] = constants.STATIONARY
+        self.markAllMoved()
+
+        # Every bit that is set belongs to eaten Food, so whole bytes can be cleared
+        bits = self.eatenBits
+        for i in self.eaten:
+            bits[i >> 3] = 0
+        del self.eaten[:]
+        self.outerSweep = 360.0
+        self.innerSweep = 0.0
+        self.decreasing = True
+
+    def snapshot(self):
+        '''
+        Captures everything that changes while the game is played: the actors, the
+        Food, the game state, when every timer fires next and the state of every Ghost's
+        random number stream.  The board itself (actors, bounds, Food positions) is not
+        included, a snapshot can only be restored into a simulation populated the same
+        way.
+
+        :Return:
+            ``dict``
+                The state, made of plain ``dict``, ``list``, ``str`` and number values
+                so that it can be saved as JSON (see :mod:`replay`).
+        '''
+        rngStates = {}
+        for index in self.ghosts:
+            version, internal, gauss = self.streams.ghost(index).getstate()
+            rngStates[str(index)] = [version, list(internal), gauss]
+
+        return {
+            "tick":       self.tick,
+            "posX":       list(self.posX),
+            "posY":       list(self.posY),
+            "moveFlags":  list(self.moveFlags),
+            "eaten":      list(self.eaten),
+            "outerSweep": self.outerSweep,
+            "innerSweep": self.innerSweep,
+            "decreasing": self.decreasing,
+            "lives":      self.lives,
+            "running":    self.running,
+            "foodTimer":  self.foodTimer.due,
+            "chaseTimer": self.chaseTimer.due,
+            "ghostTimers": [timer.due for timer in self.ghostTimers],
+            "rngStates":  rngStates
+        }
+
+    def restore(self, state):
+        '''
+        Restores a state captured by :func:`simulation.Simulation.snapshot`, after which
+        stepping continues exactly as it did from the moment it was captured.
+        '''
+        # In place, anything holding on to the arrays sees the restored state
+        self.posX[:]      = array('d', state["posX"])
+        self.posY[:]      = array('d', state["posY"])
+        self.moveFlags[:] = array('l', state["moveFlags"])
+        self.markAllMoved()
+        for i in self.eaten:
+            self.eatenBits[i >> 3] = 0
+        self.eaten[:] = array('l', state["eaten"])
+        for i in self.eaten:
+            self.eatenBits[i >> 3] |= 1 << (i & 7)
+        self.outerSweep = state["outerSweep"]
+        self.innerSweep = state["innerSweep"]
+        self.decreasing = state["decreasing"]
+        self.lives      = state["lives"]
+        self.running    = state["running"]
+
+        self.foodTimer.due  = state["foodTimer"]
+        self.chaseTimer.due = state["chaseTimer"]
+        for timer, due in zip(self.ghostTimers, state["ghostTimers"]):
+            timer.due = due
+        self.scheduler.restore(state["tick"],
+                               [self.foodTimer, self.chaseTimer] + self.ghostTimers)
+
+        for index in self.ghosts:
+            version, internal, gauss = state["rngStates"][str(index)]
+            self.streams.ghost(index).setstate((version, tuple(internal), gauss))
+
+    def collides(self, index, bounds, x, y):
+        '''
+        Returns whether or not the actor at ``index`` overlaps the rectangle ``bounds``
+        positioned at ``(x, y)``.  This is the same test ``collidesWithItem`` performs
+        for items whose shape is their bounding rectangle.
+        '''
+        px = self.posX[index]
+        py = self.posY[index]
+        l0, t0, r0, b0 = self.bounds[index]
+        l1, t1, r1, b1 = bounds
+        return (px + l0 < x + r1 and x + l1 < px + r0 and
+                py + t0 < y + b1 and y + t1 < py + b0)
+
+    def actorsCollide(self, a, b):
+        '''
+        Returns whether or not the actors at ``a`` and ``b`` collide.  Their bounding
+        rectangles are tested first.  With :data:`constants.PRECISE_COLLISIONS`, when
+        both actors have a convex hull their bounding circles are tested next, and only
+        if those overlap are the hulls themselves tested.
+        '''
+        if not self.collides(a, self.bounds[b], self.posX[b], self.posY[b]):
+            return False
+
+        hullA = self.hulls[a]
+        hullB = self.hulls[b]
+        if not constants.PRECISE_COLLISIONS or hullA is None or hullB is None:
+            return True
+
+        ax = self.posX[a]
+        ay = self.posY[a]
+        bx = self.posX[b]
+        by = self.posY[b]
+        cxA, cyA, rA = self.circles[a]
+        cxB, cyB, rB = self.circles[b]
+        dx = (ax + cxA) - (bx + cxB)
+        dy = (ay + cyA) - (by + cyB)
+        if dx * dx + dy * dy >= (rA + rB) * (rA + rB):
+            return False
+
+        return convexPolygonsOverlap(hullA, ax, ay, hullB, bx, by)
+
+    def eatsFood(self, index, food):
+        '''
+        Returns whether or not the actor at ``index`` collides with the Food at
+        ``food``.  The bounding rectangles are tested first.  With
+        :data:`constants.PRECISE_COLLISIONS` and a convex hull for the actor, the Food
+        is a circle tested against the bounding circle and then the hull of the actor.
+        '''
+        fx = self.foodX[food]
+        fy = self.foodY[food]
+        if not self.collides(index, self.foodBounds, fx, fy):
+            return False
+
+        hull = self.hulls[index]
+        if not constants.PRECISE_COLLISIONS or hull is None:
+            return True
+
+        l, t, r, b = self.foodBounds
+        fx += 0.5 * (l + r)
+        fy += 0.5 * (t + b)
+        fr = 0.5 * min(r - l, b - t)
+
+        px = self.posX[index]
+        py = self.posY[index]
+        cx, cy, radius = self.circles[index]
+        dx = fx - (px + cx)
+        dy = fy - (py + cy)
+        if dx * dx + dy * dy >= (fr + radius) * (fr + radius):
+            return False
+
+        return circleOverlapsConvexPolygon(fx, fy, fr, hull, px, py)
+
+    def markAllMoved(self):
+        ''' Marks every actor as moved, e.g. when they were all repositioned at once. '''
+        self.actorMoved[:] = bytearray(b"\x01") * len(self.posX)
+
+    def clearMoved(self):
+        ''' Forgets which actors moved, once the view has mirrored them. '''
+        self.actorMoved[:] = bytearray(len(self.posX))
+
+    def wrapActors(self):
+        '''
+        Wraps every actor around the edges of the board in one batch, with the same
+        rule as :func:`simulation.Simulation.wrapActor`.  The extremes of the position
+        arrays are checked first, so on the vast majority of ticks, where no actor is
+        past an edge, no actor is visited individually.
+
+        :Return:
+            ``list``
+                The indices of the actors that crossed an edge.
+        '''
+        posX = self.posX
+        posY = self.posY
+        if not posX:
+            return []
+
+        half_width  = 0.5 * self.width
+        half_height = 0.5 * self.height
+        if (min(posX) >= -half_width and max(posX) <= half_width and
+                min(posY) >= -half_height and max(posY) <= half_height):
+            return []
+
+        wrapped = []
+        for i in range(len(posX)):
+            x = posX[i]
+            y = posY[i]
+            if -half_width <= x <= half_width and -half_height <= y <= half_height:
+                continue
+            if x < -half_width:
+                x = half_width
+            elif x > half_width:
+                x = -half_width
+            if y < -half_height:
+                y = half_height
+            elif y > half_height:
+                y = -half_height
+            posX[i] = x
+            posY[i] = y
+            wrapped.append(i)
+        return wrapped
+
+    def wrapActor(self, index, width, height):
+        '''
+        Adjusts the position of the actor at ``index`` so that it remains within the
+        confines of a board of size ``width`` by ``height`` centered at the origin.
+        '''
+        half_width  = 0.5 * width
+        half_height = 0.5 * height
+
+        if self.posX[index] < -half_width:
+            self.posX[index] = half_width
+
+        if self.posX[index] > half_width:
+            self.posX[index] = -half_width
+
+        if self.posY[index] < -half_height:
+            self.posY[index] = half_height
+
+        if self.posY[index] > half_height:
+            self.posY[index] = -half_height
+
+    def moveActor(self, index):
+        '''
+        Moves the actor at ``index`` by :data:`constants.gameSpeed` in the direction
+        described by its move flags.
+        '''
+        flags = self.moveFlags[index]
+        # Short-circuit if we are not supposed to move
+        if flags == constants.STATIONARY:
+            return
+
+        mx = 0.0
+        my = 0.0
+        if (flags & constants.MOVE_NORTH) == constants.MOVE_NORTH:
+            my -= 1.0
+        if (flags & constants.MOVE_SOUTH) == constants.MOVE_SOUTH:
+            my += 1.0
+        if (flags & constants.MOVE_EAST) == constants.MOVE_EAST:
+            mx += 1.0
+        if (flags & constants.MOVE_WEST) == constants.MOVE_WEST:
+            mx -= 1.0
+
+        self.posX[index] += constants.gameSpeed * mx
+        self.posY[index] += constants.gameSpeed * my
+
+    def changeDirection(self, index):
+        '''
+        Applies the Ghost movement rule :func:`simulation.randomDirectionChange` to the
+        actor at ``index``, drawing from the substream of that Ghost.  Does nothing when
+        the Ghosts are chasing CitizenPac instead (:data:`constants.GHOST_CHASE`).
+        '''
+        if constants.GHOST_CHASE:
+            return
+        self.moveFlags[index] = randomDirectionChange(self.moveFlags[index],
+                                                      self.streams.ghost(index))
+
+    def navigationGrid(self):
+        '''
+        Returns the :class:`navigation.NavigationGrid` of the board, created from
+        :func:`simulation.foodLattice` the first time it is needed.
+        '''
+        if self.navigation is None:
+            self.navigation = NavigationGrid(*foodLattice(self.width, self.height))
+        return self.navigation
+
+    def chase(self):
+        '''
+        When :data:`constants.GHOST_CHASE` is ``True``, steers every Ghost one step
+        towards CitizenPac.  The distance field towards CitizenPac is computed once (and
+        only again once CitizenPac reaches another cell), every Ghost then reads its
+        move flags from it.
+        '''
+        if not constants.GHOST_CHASE or self.citizenPac is None or not self.ghosts:
+            return
+
+        grid  = self.navigationGrid()
+        px    = self.posX[self.citizenPac]
+        py    = self.posY[self.citizenPac]
+        field = grid.distanceField(grid.cell(px, py))
+        speed = constants.gameSpeed
+        for index in self.ghosts:
+            self.moveFlags[index] = grid.nextMove(field, self.posX[index],
+                                                  self.posY[index], px, py, speed)
+
+    def animateFood(self):
+        '''
+        Advances the sweep animation shared by all Food by one degree.
+        '''
+        if self.decreasing:
+            self.outerSweep -= 1.0
+            self.innerSweep += 1.0
+            if self.outerSweep == 0.0:
+                self.decreasing = False
+        else:
+            self.outerSweep += 1.0
+            self.innerSweep -= 1.0
+            if self.outerSweep == 360.0:
+                self.decreasing = True
+
+    def processCollisions(self):
+        '''
+        Processes the collisions between CitizenPac and the Ghosts / Food.
+
+        :Return:
+            ``int``
+                One of the :class:`simulation.Simulation` status codes.
+        '''
+        pac = self.citizenPac
+        for ghost in self.ghosts:
+            self.collisionTests += 1
+            if self.actorsCollide(pac, ghost):
+                self.lives -= 1
+                return Simulation.LOST_LIFE
+
+        foodBounds = self.foodBounds
+        if self.foodIndex is None:
+            candidates = range(len(self.foodX))
+        else:
+            px = self.posX[pac]
+            py = self.posY[pac]
+            l, t, r, b = self.bounds[pac]
+            candidates = self.foodIndex.candidates(px + l, py + t, px + r, py + b,
+                                                   foodBounds)
+
+        self.collisionTests += len(candidates)
+        bits = self.eatenBits
+        for i in candidates:
+            if not (bits[i >> 3] >> (i & 7)) & 1 and self.eatsFood(pac, i):
+                bits[i >> 3] |= 1 << (i & 7)
+                self.eaten.append(i)
+                self.eatenThisStep.append(i)
+
+        if len(self.eaten) == len(self.foodX):
+            return Simulation.WON
+        return Simulation.CONTINUE
+
+    def step(self):
+        '''
+        Advances the game by one tick, in the same order that :func:`model.Scene.advance`
+        always has:
+
+        1. Process collisions when ``self.running`` and :data:`constants.FULL_GAME_MODE`
+           are both ``True``.  If CitizenPac hit a Ghost, nothing else happens.
+        2. Confine the actors to the game board.
+        3. Move the actors.
+        4. Advance the ``scheduler``, which animates the Food and lets the Ghosts
+           change direction.
+
+        :Return:
+            ``int``
+                :data:`simulation.Simulation.LOST_LIFE` if CitizenPac hit a Ghost,
+                :data:`simulation.Simulation.WON` if all of the Food has been eaten and
+                :data:`simulation.Simulation.CONTINUE` otherwise.  The Food eaten in this
+                step is available in ``self.eatenThisStep``.
+        '''
+        self.eatenThisStep  = []
+        self.collisionTests = 0
+        status = Simulation.CONTINUE
+        if self.running and constants.FULL_GAME_MODE and self.citizenPac is not None:
+            status = self.processCollisions()
+            if status == Simulation.LOST_LIFE:
+                return status
+
+        moved = self.actorMoved
+        for i in self.wrapActors():
+            moved[i] = 1
+        stationary = constants.STATIONARY
+        for i, flags in enumerate(self.moveFlags):
+            if flags != stationary:
+                self.moveActor(i)
+                moved[i] = 1
+        self.scheduler.advance()
+
+        return status
+
+
+def createHeadless(width, height, seed=None):
+    '''
+    Creates a :class:`simulation.Simulation` populated exactly the way
+    :func:`model.Scene.generate` populates the game, without any graphics.  The
+    bounding rectangles and convex hulls of CitizenPac and the Ghosts are computed from
+    their spline data on disk by :func:`splines.loadShape`, exactly like
+    :class:`view.actors.SplineCache` does for the game.
+
+    :Parameters:
+        ``width`` (float)
+            The width of the game board.
+
+        ``height`` (float)
+            The height of the game board.
+
+        ``seed`` (int)
+            The seed of the game, see :class:`streams.RandomStreams`.
+
+    :Return:
+        :class:`simulation.Simulation`
+            The new simulation, not yet running.
+    '''
+    sim = Simulation(width, height, seed)
+    sx  = constants.SPLINE_COORD_SCALE
+    sy  = -constants.SPLINE_COORD_SCALE
+    _, pacHull, pacBounds     = splines.loadShape(splines.CITIZEN_PAC_DATA_FILE, sx, sy)
+    _, ghostHull, ghostBounds = splines.loadShape(splines.GHOST_DATA_FILE, sx, sy)
+    for i, (cx, cy) in enumerate(actorStartPositions()):
+        if i == 0:
+            sim.addActor(cx, cy, pacBounds, isCitizenPac=True, hull=pacHull)
+        else:
+            sim.addActor(cx, cy, ghostBounds, hull=ghostHull)
+
+    if constants.FULL_GAME_MODE:
+        r = constants.FOOD_RADIUS
+        for cx, cy in foodCenters(width, height):
+            sim.addFood(cx, cy, (-r, -r, r, r))
+        sim.setFoodLattice(FoodLattice(*foodLattice(width, height)))
+
+    return sim
@@ -0,0 +1,580 @@
+'''
+Pure Python helpers for the Blender spline data drawn by
+:class:`view.actors.SplineDrawer`.
+
+Nothing in this module depends on ``PyQt4``, so that the shapes of CitizenPac and the
+Ghosts can be reasoned about without a running ``QApplication`` (see
+:mod:`simulation`).  The format of the data files is described in the documentation of
+:class:`view.actors.SplineDrawer`.
+
+Parsing the ``json`` exported from Blender is comparatively slow, so every data file is
+also converted offline into a packed binary file next to it (``.bin`` rather than
+``.json``), which is what the game actually loads:
+
+.. code-block:: none
+
+   offset  type          contents
+   0       char[4]       BINARY_MAGIC
+   4       uint16        BINARY_VERSION
+   6       uint16        flags, bit 0 set if the spline is closed
+   8       uint32        n, the number of control points
+   12      float32[6n]   co.x, co.y, handle_left.x, handle_left.y,
+                         handle_right.x, handle_right.y for every control point
+
+Everything is little-endian, and the coordinates are *unscaled*.  To regenerate the
+binary files after editing the ``json``, run::
+
+    python splines.py view/qt_configs/data/*.json
+
+The binary files are read from disk (see :func:`splines.resourcePath`), never through the
+Qt Resource system: they are not compiled into ``citizen_pac.qrc``, so that this module
+and the headless simulation never need ``PyQt4``.  When a binary file is missing, the
+``json`` is parsed instead.
+'''
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+import constants
+
+PACKAGE_DIR = os.path.abspath(os.path.dirname(__file__))
+''' The directory containing ``__main__.py``, used to locate data files on disk. '''
+
+CITIZEN_PAC_DATA_FILE = ":/view/qt_configs/data/bat_points.json"
+''' The data file needed to instantiate a CitizenPac. '''
+
+GHOST_DATA_FILE = ":/view/qt_configs/data/ghost_body.json"
+''' The data file needed to instantiate a Ghost. '''
+
+BINARY_MAGIC = b"CPSP"
+''' The first four bytes of every binary spline file. '''
+
+BINARY_VERSION = 1
+''' The version of the binary spline format written by :func:`splines.packControlPoints`. '''
+
+BINARY_HEADER = struct.Struct("<4sHHI")
+''' The header of a binary spline file: magic, version, flags and count. '''
+
+BINARY_CLOSED = 1 << 0
+''' The header flag set when the spline is closed. '''
+
+
+def resourcePath(dataResource):
+    '''
+    Converts a Qt Resource descriptor such as
+    ``":/view/qt_configs/data/ghost_body.json"`` into the path of the same file on disk.
+    The ``.qrc`` file uses the ``/view/qt_configs`` prefix precisely so that these two
+    locations agree.
+
+    :Parameters:
+        ``dataResource`` (str)
+            The Qt Resource descriptor.
+
+    :Return:
+        ``str``
+            The absolute path to the file that was compiled into the resource.
+    '''
+    relative = dataResource.lstrip(":").lstrip("/")
+    return os.path.join(PACKAGE_DIR, *relative.split("/"))
+
+
+def binaryResource(dataResource):
+    '''
+    Returns the descriptor of the binary file converted from the ``json`` file
+    ``dataResource``, e.g. ``":/view/qt_configs/data/ghost_body.bin"``.
+    '''
+    return os.path.splitext(dataResource)[0] + ".bin"
+
+
+def parseControlPoints(data, sx, sy):
+    '''
+    Parses the ``json`` text exported from Blender into scaled control points.
+
+    :Parameters:
+        ``data`` (str)
+            The ``json`` text to parse.
+
+        ``sx`` (float)
+            The :math:`x` scaling factor :math:`s_x`.
+
+        ``sy`` (float)
+            The :math:`y` scaling factor :math:`s_y`.
+
+    :Return:
+        ``tuple``
+            A tuple ``(points, closed)``, where ``points`` is a ``list`` of
+            ``(co, hL, hR)`` tuples of scaled ``(x, y)`` tuples (the control point, left
+            handle and right handle) in key order, and ``closed`` is a ``bool``.
+    '''
+    try:
+        all_points = json.loads(data)
+        all_keys   = sorted(set(all_points.keys()) - set([u"closed"]), key=int)
+        closed     = bool(all_points[u"closed"])
+    except Exception as e:
+        raise RuntimeError(
+            "Unable to extract all relevant keys from the json:\n{}".format(e)
+        )
+
+    points = []
+    for key in all_keys:
+        control = all_points[key]
+        try:
+            co = control[u"co"]
+            hL = control[u"handle_left"]
+            hR = control[u"handle_right"]
+            points.append((
+                (float(co[0]) * sx, float(co[1]) * sy),
+                (float(hL[0]) * sx, float(hL[1]) * sy),
+                (float(hR[0]) * sx, float(hR[1]) * sy)
+            ))
+        except Exception as e:
+            raise RuntimeError(
+                "Could not parse all floats for key [{}]: {}".format(key, e)
+            )
+
+    return points, closed
+
+
+def rawControlPoints(data):
+    '''
+    Parses the ``json`` text exported from Blender into *unscaled* control points, the
+    input of :func:`splines.packControlPoints`.  See :func:`splines.parseControlPoints`.
+    '''
+    return parseControlPoints(data, 1.0, 1.0)
+
+
+def packControlPoints(points, closed):
+    '''
+    Packs unscaled control points into the binary format described at the top of this
+    module.
+
+    :Parameters:
+        ``points`` (list)
+            The ``(co, hL, hR)`` tuples returned by :func:`splines.rawControlPoints`.
+
+        ``closed`` (bool)
+            Whether or not the spline is closed.
+
+    :Return:
+        ``bytes``
+            The contents of the binary file.
+    '''
+    flat = []
+    for co, hL, hR in points:
+        flat.extend((co[0], co[1], hL[0], hL[1], hR[0], hR[1]))
+
+    flags  = BINARY_CLOSED if closed else 0
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, len(points))
+    return header + struct.pack("<{}f".format(len(flat)), *flat)
+
+
+def unpackControlPoints(buffer, sx, sy):
+    '''
+    Reads control points from a buffer in the binary format described at the top of
+    this module, e.g. a ``memoryview`` of a memory mapped file.  The coordinates are
+    unpacked with a single ``struct.unpack_from`` directly out of ``buffer``.
+
+    :Parameters:
+        ``buffer`` (buffer)
+            Any object supporting the buffer protocol.
+
+        ``sx`` (float)
+            The :math:`x` scaling factor :math:`s_x`.
+
+        ``sy`` (float)
+            The :math:`y` scaling factor :math:`s_y`.
+
+    :Return:
+        ``tuple``
+            ``(points, closed)``, exactly as :func:`splines.parseControlPoints` returns.
+    '''
+    try:
+        magic, version, flags, count = BINARY_HEADER.unpack_from(buffer, 0)
+    except struct.error as e:
+        raise RuntimeError("Truncated binary spline header: {}".format(e))
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise RuntimeError(
+            "Not a version {} binary spline file.".format(BINARY_VERSION)
+        )
+
+    try:
+        flat = struct.unpack_from("<{}f".format(6 * count), buffer, BINARY_HEADER.size)
+    except struct.error as e:
+        raise RuntimeError("Truncated binary spline data: {}".format(e))
+
+    points = []
+    for i in range(0, 6 * count, 6):
+        points.append((
+            (flat[i]     * sx, flat[i + 1] * sy),
+            (flat[i + 2] * sx, flat[i + 3] * sy),
+            (flat[i + 4] * sx, flat[i + 5] * sy)
+        ))
+    return points, bool(flags & BINARY_CLOSED)
+
+
+def loadBinaryControlPoints(dataResource, sx, sy):
+    '''
+    Loads the control points of ``dataResource`` from its binary file on disk (see
+    :func:`splines.binaryResource`), memory mapping the file rather than reading it.
+    Only the disk is looked at, the binary files are not Qt Resources.
+
+    :Return:
+        ``tuple`` or ``None``
+            ``(points, closed)`` as :func:`splines.unpackControlPoints` returns, or
+            ``None`` when there is no binary file (the ``json`` must be parsed).
+    '''
+    path = resourcePath(binaryResource(dataResource))
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return unpackControlPoints(mapped, sx, sy)
+        finally:
+            mapped.close()
+
+
+def convertJson(jsonPath):
+    '''
+    The offline converter: writes the binary file for the ``json`` file at
+    ``jsonPath`` next to it.
+
+    :Return:
+        ``str``
+            The path of the binary file that was written.
+    '''
+    with open(jsonPath) as f:
+        points, closed = rawControlPoints(f.read())
+
+    binPath = os.path.splitext(jsonPath)[0] + ".bin"
+    with open(binPath, "wb") as f:
+        f.write(packControlPoints(points, closed))
+    return binPath
+
+
+def cubicSegments(points, closed):
+    '''
+    Links the control points returned by :func:`splines.parseControlPoints` into cubic
+    Bezier segments, in the same order that
+    :func:`view.actors.SplineDrawer.parseResourceJson` feeds them to ``cubicTo``.
+
+    :Return:
+        ``list``
+            A ``list`` of ``(p0, c1, c2, p3)`` tuples of ``(x, y)`` tuples.
+    '''
+    if not closed:
+        raise RuntimeError("Only closed Bezier Paths from Blender are supported.")
+
+    segments = []
+    for idx in range(1, len(points)):
+        prev_co, _, prev_hR = points[idx - 1]
+        co, hL, _           = points[idx]
+        segments.append((prev_co, prev_hR, hL, co))
+
+    if points:
+        last_co, _, last_hR   = points[-1]
+        first_co, first_hL, _ = points[0]
+        segments.append((last_co, last_hR, first_hL, first_co))
+
+    return segments
+
+
+def evaluateCubic(segment, t):
+    '''
+    Evaluates the cubic Bezier ``segment`` at the parameter ``t`` in ``[0, 1]``.
+
+    :Return:
+        ``tuple``
+            The ``(x, y)`` point on the curve.
+    '''
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+    s  = 1.0 - t
+    b0 = s * s * s
+    b1 = 3.0 * s * s * t
+    b2 = 3.0 * s * t * t
+    b3 = t * t * t
+    return (b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3,
+            b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3)
+
+
+def segmentSubdivisions(segment, tolerance):
+    '''
+    Returns how many uniform steps the cubic Bezier ``segment`` must be split into so
+    that the chords stray at most ``tolerance`` from the curve.  A chord over a
+    parameter interval of length :math:`h` strays at most :math:`\\frac{h^2}{8} M`,
+    where :math:`M \\le 6 L` bounds the second derivative and :math:`L` is the largest
+    second difference of the control points, hence
+    :math:`n = \\left\\lceil \\sqrt{\\frac{3 L}{4 \\epsilon}} \\right\\rceil`.
+
+    :Return:
+        ``int``
+            The number of steps, at least ``1``.
+    '''
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+    L = max(math.hypot(x0 - 2.0 * x1 + x2, y0 - 2.0 * y1 + y2),
+            math.hypot(x1 - 2.0 * x2 + x3, y1 - 2.0 * y2 + y3))
+    return max(1, int(math.ceil(math.sqrt(0.75 * L / tolerance))))
+
+
+_BASES = {}
+''' The Bernstein weights of every parameter value, keyed by number of steps. '''
+
+
+def _basis(n):
+    weights = _BASES.get(n)
+    if weights is None:
+        weights = []
+        for i in range(n):
+            t = float(i) / n
+            s = 1.0 - t
+            weights.append((s * s * s, 3.0 * s * s * t, 3.0 * s * t * t, t * t * t))
+        _BASES[n] = weights
+    return weights
+
+
+def tessellate(segments, tolerance):
+    '''
+    Flattens the closed curve made of ``segments`` (see :func:`splines.cubicSegments`)
+    into a polygon that is within ``tolerance`` of the curve everywhere.  Each segment
+    is split into :func:`splines.segmentSubdivisions` steps, evaluated in one batch
+    with weights that are shared by every segment split into the same number of steps.
+
+    :Parameters:
+        ``segments`` (list)
+            The ``(p0, c1, c2, p3)`` cubic segments of a closed curve.
+
+        ``tolerance`` (float)
+            The largest distance allowed between the polygon and the curve.
+
+    :Return:
+        ``list``
+            The ``(x, y)`` vertices of the polygon.  Every vertex lies on the curve, the
+            last segment implicitly closes back to the first vertex.
+    '''
+    vertices = []
+    for segment in segments:
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+        for b0, b1, b2, b3 in _basis(segmentSubdivisions(segment, tolerance)):
+            vertices.append((b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3,
+                             b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3))
+    return vertices
+
+
+def loadControlPoints(dataResource, sx, sy):
+    '''
+    Reads the control points of the spline described by ``dataResource`` from disk,
+    from the binary file when there is one and the ``json`` otherwise.
+
+    :Return:
+        ``tuple``
+            ``(points, closed)``, see :func:`splines.parseControlPoints`.
+    '''
+    loaded = loadBinaryControlPoints(dataResource, sx, sy)
+    if loaded is not None:
+        return loaded
+
+    with open(resourcePath(dataResource)) as f:
+        return parseControlPoints(f.read(), sx, sy)
+
+
+def convexHull(points):
+    '''
+    Computes the convex hull of ``points`` with Andrew's monotone chain algorithm.
+
+    :Parameters:
+        ``points`` (list)
+            The ``(x, y)`` points, e.g. the vertices returned by
+            :func:`splines.tessellate`.
+
+    :Return:
+        ``list``
+            The ``(x, y)`` vertices of the hull without repeating the first, wound
+            consistently, with no three consecutive vertices collinear.
+    '''
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+
+    return lower[:-1] + upper[:-1]
+
+
+def boundingCircle(points):
+    '''
+    Computes a circle enclosing every one of ``points``, centered on their bounding
+    rectangle.  Not necessarily the smallest such circle, but close for the compact
+    shapes of the actors and only computed once.
+
+    :Return:
+        ``tuple``
+            ``(cx, cy, radius)``.
+    '''
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    cx = 0.5 * (min(xs) + max(xs))
+    cy = 0.5 * (min(ys) + max(ys))
+    radius = max(math.hypot(x - cx, y - cy) for x, y in points)
+    return cx, cy, radius
+
+
+HULL_TOLERANCE = 0.125
+''' The tessellation tolerance the convex hulls used for collisions are built from. '''
+
+
+def simplify(vertices, tolerance):
+    '''
+    Removes the vertices of the closed polygon ``vertices`` that are not needed to stay
+    within ``tolerance`` of it, with the Ramer-Douglas-Peucker algorithm.  The polygon is
+    split at its first vertex and the vertex farthest from it, and every half is
+    recursively split at the vertex farthest from its chord until none is farther than
+    ``tolerance``.
+
+    :Return:
+        ``list``
+            The ``(x, y)`` vertices that were kept, in their original order.
+    '''
+    n = len(vertices)
+    if n < 4:
+        return list(vertices)
+
+    x0, y0 = vertices[0]
+    far    = max(range(n), key=lambda i: (vertices[i][0] - x0) ** 2 +
+                                         (vertices[i][1] - y0) ** 2)
+    keep   = [False] * n
+    keep[0] = keep[far] = True
+    # Index n stands for vertex 0 again, closing the polygon
+    pending = [(0, far), (far, n)]
+    while pending:
+        first, last = pending.pop()
+        if last - first < 2:
+            continue
+
+        ax, ay = vertices[first]
+        bx, by = vertices[last % n]
+        dx     = bx - ax
+        dy     = by - ay
+        length = math.hypot(dx, dy)
+        worst  = -1.0
+        index  = None
+        for i in range(first + 1, last):
+            px, py = vertices[i]
+            if length > 0.0:
+                distance = abs(dx * (py - ay) - dy * (px - ax)) / length
+            else:
+                distance = math.hypot(px - ax, py - ay)
+            if distance > worst:
+                worst = distance
+                index = i
+
+        if worst > tolerance:
+            keep[index] = True
+            pending.append((first, index))
+            pending.append((index, last))
+
+    return [vertex for vertex, kept in zip(vertices, keep) if kept]
+
+
+def levelsOfDetail(segments, tolerances):
+    '''
+    Flattens the closed curve made of ``segments`` once for every one of
+    ``tolerances``: half of the tolerance is spent tessellating the curve (see
+    :func:`splines.tessellate`), the other half removing the vertices that are not
+    needed at that tolerance (see :func:`splines.simplify`).  Curves made of many short,
+    straight segments (like the Ghost) are only made coarser by the latter.
+
+    A level with as many vertices as the next finer one is dropped, since the finer one
+    is just as cheap and more accurate, so the number of vertices strictly decreases
+    from the finest level to the coarsest.
+
+    :Parameters:
+        ``tolerances`` (sequence)
+            The tolerances, coarsest (largest) first.
+
+    :Return:
+        ``list``
+            The ``(tolerance, vertices)`` of every level of detail, coarsest first.
+    '''
+    lods = []
+    for tolerance in sorted(tolerances):
+        vertices = simplify(tessellate(segments, 0.5 * tolerance), 0.5 * tolerance)
+        if lods and len(vertices) >= len(lods[0][1]):
+            continue
+        lods.insert(0, (tolerance, vertices))
+    return lods
+
+
+def collisionHull(segments):
+    '''
+    Returns the convex hull used for collisions with the closed curve made of
+    ``segments``, see :func:`splines.convexHull`.
+    '''
+    return convexHull(tessellate(segments, HULL_TOLERANCE))
+
+
+def shapeBounds(lods, hull):
+    '''
+    Returns the rectangle bounding every level of detail in ``lods`` (as returned by
+    :func:`splines.levelsOfDetail`) and the ``hull``.  This is the bounding rectangle
+    of the drawn actor, and the one its collisions are tested with.
+
+    :Return:
+        ``tuple``
+            The ``(left, top, right, bottom)`` of the shape.
+    '''
+    xs = [x for x, _ in hull]
+    ys = [y for _, y in hull]
+    for _, vertices in lods:
+        xs.extend(x for x, _ in vertices)
+        ys.extend(y for _, y in vertices)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def segmentShape(segments):
+    '''
+    Computes everything both :class:`view.actors.SplineDrawer` and
+    :func:`simulation.createHeadless` need from the closed curve made of ``segments``,
+    so that the game and the headless simulation agree exactly.
+
+    :Return:
+        ``tuple``
+            ``(lods, hull, bounds)``: the levels of detail for
+            :data:`constants.SPLINE_LOD_TOLERANCES` (see
+            :func:`splines.levelsOfDetail`), the hull (see
+            :func:`splines.collisionHull`) and their bounds (see
+            :func:`splines.shapeBounds`).
+    '''
+    lods = levelsOfDetail(segments, constants.SPLINE_LOD_TOLERANCES)
+    hull = collisionHull(segments)
+    return lods, hull, shapeBounds(lods, hull)
+
+
+def loadShape(dataResource, sx, sy):
+    '''
+    Reads the spline described by ``dataResource`` from disk and returns its
+    ``(lods, hull, bounds)``, see :func:`splines.segmentShape`.
+    '''
+    return segmentShape(cubicSegments(*loadControlPoints(dataResource, sx, sy)))
+
+
+if __name__ == "__main__":
+    for jsonPath in sys.argv[1:]:
+        print("Wrote {}".format(convertJson(jsonPath)))
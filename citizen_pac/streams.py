@@ -0,0 +1,69 @@
+'''
+Seeded random number streams, so that a game can be reproduced exactly.
+
+Every subsystem that needs randomness draws from its own named substream of one
+:class:`streams.RandomStreams`: the colors of the actors and Food draw from
+``"colors"``, the Food animation from ``"food"``, and every Ghost from
+``"ghost.<index>"``.  Each substream is seeded from the session seed and its name alone,
+so adding a Ghost or drawing one more color never changes what another subsystem draws.
+Two games started with the same seed (``python citizen_pac --seed N``) and given the
+same inputs are therefore in the same state at every tick.
+'''
+
+import hashlib
+import random
+
+
+def deriveSeed(seed, name):
+    '''
+    Derives the seed of the substream ``name`` from the session ``seed``.  Uses a hash
+    rather than Python's ``hash``, which differs between interpreter runs.
+
+    :Return:
+        ``int``
+            A 64 bit seed.
+    '''
+    digest = hashlib.sha256("{}:{}".format(seed, name).encode("utf-8")).hexdigest()
+    return int(digest[:16], 16)
+
+
+def newSeed():
+    ''' Returns a fresh 32 bit session seed from the operating system. '''
+    return random.SystemRandom().getrandbits(32)
+
+
+class RandomStreams(object):
+    '''
+    The random number streams of one game session.
+
+    :Parameters:
+        ``seed`` (int)
+            The session seed.  When ``None``, a fresh seed is drawn with
+            :func:`streams.newSeed` (and is available as ``seed``, so that the game can
+            be reproduced later).
+
+    :Attributes:
+        ``seed`` (int)
+            The session seed.
+    '''
+    def __init__(self, seed=None):
+        self.seed    = newSeed() if seed is None else int(seed)
+        self.streams = {}
+
+    def stream(self, name):
+        '''
+        Returns the substream ``name``, creating it on first use.
+
+        :Return:
+            :class:`random.Random`
+                The same instance every time it is requested with the same ``name``.
+        '''
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = random.Random(deriveSeed(self.seed, name))
+            self.streams[name] = rng
+        return rng
+
+    def ghost(self, index):
+        ''' Returns the substream of the Ghost at actor ``index``. '''
+        return self.stream("ghost.{}".format(index))
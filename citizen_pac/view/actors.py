@@ -9,14 +9,147 @@ The actors.
 # FILE VERSION: released 5/5/2017 @ 15:05
 
 import json
-import random
+import math
 import textwrap
+from array import array
 from PyQt4 import QtCore, QtGui
 
 import constants
+import splines
 from view.display import randomColor
 
 
+class ArcPathCache(object):
+    '''
+    A process-wide cache of the pie shaped paths painted by :class:`view.actors.Food`
+    and :class:`view.actors.FoodField`.  The sweep of every pellet only ever takes the
+    ``361`` integer values stepped by :func:`simulation.Simulation.animateFood`, and
+    every pellet has the same radius, so the paths are built once (centered at the
+    origin, starting at angle ``0``) and painting a pellet is a lookup plus a
+    translated and rotated draw.
+
+    Paths are kept for at most :data:`view.actors.ArcPathCache.MAX_RADII` radii at a
+    time (the outer and inner radius of the Food).  When a new radius is requested, the
+    paths of the least recently added radius are evicted.
+
+    :Attributes:
+        ``paths`` (dict)
+            The cached :class:`PyQt4.QtGui.QPainterPath` instances, keyed by
+            ``(radius, sweep)``.
+
+        ``radii`` (list)
+            The radii currently cached, in the order they were added.
+    '''
+    MAX_RADII = 2
+    ''' The number of distinct radii to keep paths for. '''
+
+    def __init__(self):
+        self.paths = {}
+        self.radii = []
+
+    def path(self, radius, sweep):
+        '''
+        Returns the closed arc path of the given ``radius`` swept ``sweep`` degrees
+        counter-clockwise from angle ``0``.  Rotate the painter by ``-startAngle`` to
+        start the sweep elsewhere.
+
+        :Parameters:
+            ``radius`` (float)
+                The radius of the circle the arc lies on.
+
+            ``sweep`` (float)
+                The sweep in degrees, rounded to the nearest integer.
+
+        :Return:
+            :class:`PyQt4.QtGui.QPainterPath`
+                The cached path.  Do not modify it.
+        '''
+        key  = (radius, int(round(sweep)))
+        path = self.paths.get(key)
+        if path is None:
+            if radius not in self.radii:
+                self.radii.append(radius)
+                if len(self.radii) > ArcPathCache.MAX_RADII:
+                    evicted    = self.radii.pop(0)
+                    self.paths = dict(
+                        (k, v) for k, v in self.paths.items() if k[0] != evicted
+                    )
+
+            rect = QtCore.QRectF(-radius, -radius, 2.0 * radius, 2.0 * radius)
+            path = QtGui.QPainterPath()
+            path.arcTo(rect, 0.0, key[1])
+            path.closeSubpath()
+            self.paths[key] = path
+        return path
+
+
+ARC_PATHS = ArcPathCache()
+''' The :class:`view.actors.ArcPathCache` shared by all Food. '''
+
+
+class SplineCache(object):
+    '''
+    A process-wide cache of the shapes built by :class:`view.actors.SplineDrawer`.
+    Every Ghost reads the same data file at the same scale, so reading the spline and
+    flattening it into polygons only needs to happen once per process rather than once
+    per actor.
+
+    :Attributes:
+        ``shapes`` (dict)
+            The cached ``(path, pathRect, poly, polyRect, lods, hull, hullPath)``
+            tuples, keyed by ``(dataResource, sx, sy)``.  See
+            :class:`view.actors.SplineDrawer` for what each of these are.
+    '''
+    def __init__(self):
+        self.shapes = {}
+
+    def shape(self, dataResource, sx, sy):
+        '''
+        Returns the shape of the spline in ``dataResource`` scaled by ``sx`` and ``sy``,
+        reading it with :func:`splines.loadControlPoints` the first time it is
+        requested.  The path, the polygons, the hull and their bounds are all built from
+        that one read, exactly like :func:`simulation.createHeadless` builds them.
+
+        :Return:
+            ``tuple``
+                ``(path, pathRect, poly, polyRect, lods, hull, hullPath)``.  These are
+                shared by every actor drawing the same spline, do not modify them.
+        '''
+        key   = (dataResource, sx, sy)
+        shape = self.shapes.get(key)
+        if shape is None:
+            segments = splines.cubicSegments(*splines.loadControlPoints(dataResource,
+                                                                        sx, sy))
+            path = QtGui.QPainterPath()
+            for p0, c1, c2, p3 in segments:
+                path.moveTo(p0[0], p0[1])
+                path.cubicTo(c1[0], c1[1], c2[0], c2[1], p3[0], p3[1])
+
+            # The levels of detail, the convex hull used for collisions and the bounds
+            # of both.  The finest level of detail is the polygon describing the path.
+            shapeLods, hull, bounds = splines.segmentShape(segments)
+            lods = []
+            for tolerance, vertices in shapeLods:
+                lods.append((tolerance,
+                             QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in vertices])))
+            poly = lods[-1][1]
+            left, top, right, bottom = bounds
+            polyRect = QtCore.QRectF(left, top, right - left, bottom - top)
+
+            hullPath = QtGui.QPainterPath()
+            hullPath.addPolygon(QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in hull]))
+            hullPath.closeSubpath()
+
+            shape            = (path, path.boundingRect(), poly, polyRect, lods, hull,
+                                hullPath)
+            self.shapes[key] = shape
+        return shape
+
+
+SPLINES = SplineCache()
+''' The :class:`view.actors.SplineCache` shared by CitizenPac and all Ghosts. '''
+
+
 class Actor(QtGui.QGraphicsItem):
     '''
     The primary base class for all Actors that are to be added to the scene for game
@@ -54,6 +187,11 @@ class Actor(QtGui.QGraphicsItem):
             The starting location :math:`c_y` of this Actor, saved so that the game can
             be reset.
 
+        ``simIndex`` (int)
+            The index of this Actor in the :class:`simulation.Simulation` of the
+            ``scene``, assigned by :func:`model.Scene.registerActor`.  While it is
+            ``None``, the ``moveFlags`` are stored on the Actor itself.
+
     The coordinate :math:`(c_x, c_y)` represents the **center** of the Actor's starting
     location, and should never change.  To acquire the *current* position of the actor,
     use the ``x()`` and ``y()`` methods respectively, these methods are inherited from
@@ -76,8 +214,26 @@ class Actor(QtGui.QGraphicsItem):
         self.cx        = cx
         self.cy        = cy
         self.scene     = scene
+        self.simIndex  = None
         self.moveFlags = constants.STATIONARY
 
+    @property
+    def moveFlags(self):
+        '''
+        The move flags of this Actor.  Once registered, they are stored in (and read
+        from) the ``moveFlags`` array of the :class:`simulation.Simulation`.
+        '''
+        if self.simIndex is None:
+            return self._moveFlags
+        return self.scene.simulation.moveFlags[self.simIndex]
+
+    @moveFlags.setter
+    def moveFlags(self, flags):
+        if self.simIndex is None:
+            self._moveFlags = flags
+        else:
+            self.scene.simulation.moveFlags[self.simIndex] = flags
+
     def boundingRect(self):
         '''
         Returns the bounding rectangle for this Actor.  This is used by the graphics
@@ -187,8 +343,10 @@ class Actor(QtGui.QGraphicsItem):
 
     def advance(self, phase):
         '''
-        Updates the current position of this Actor depending on the value of its current
-        move flags.
+        Updates the current position of this Actor to mirror the position computed by
+        :func:`simulation.Simulation.moveActor` from the value of its current move
+        flags.  Actors the simulation did not move (or wrap) since the last frame
+        return straight away, without querying their position.
 
         :Parameters:
             ``phase`` (int)
@@ -198,24 +356,19 @@ class Actor(QtGui.QGraphicsItem):
                 :class:`PyQt4.QtGui.QGraphicsItem`
         '''
         if phase == 1:
-            # Short-circuit if we are not supposed to move
-            if self.isStationary():
+            simulation = self.scene.simulation
+            if not simulation.actorMoved[self.simIndex]:
+                return
+            x, y = simulation.position(self.simIndex)
+            # Short-circuit if we did not move
+            if x == self.x() and y == self.y():
                 return
 
-            move = QtCore.QPointF(0.0, 0.0)
-            
-            if self.isMoveDirection(constants.MOVE_NORTH):
-                move = move + Actor.NORTH
-            if self.isMoveDirection(constants.MOVE_SOUTH):
-                move = move + Actor.SOUTH
-            if self.isMoveDirection(constants.MOVE_EAST):
-                move = move + Actor.EAST
-            if self.isMoveDirection(constants.MOVE_WEST):
-                move = move + Actor.WEST
-
-            # Using the computed move direction, update the position.
-            currPos = QtCore.QPointF(self.x(), self.y())
-            self.setPos(currPos + constants.gameSpeed * move)
+            # Both where we were and where we are now need to be repainted.  These are
+            # reported separately since wrapping can move us across the entire board.
+            self.scene.damage.addRect(self.sceneBoundingRect())
+            self.setPos(x, y)
+            self.scene.damage.addRect(self.sceneBoundingRect())
             self.update()
 
 
@@ -241,6 +394,10 @@ class Food(Actor):
         ``radius`` (float)
             The radius of the Food (should be :data:`constants.FOOD_RADIUS`).
 
+        ``startAngle`` (float)
+            Where the sweep of this Food begins from, drawn from the ``"food"`` stream of
+            the simulation when ``None``.
+
     :Attributes:
         ``outerRadius`` (float)
             The input ``radius``.
@@ -277,18 +434,21 @@ class Food(Actor):
         ``startAngle`` (float)
             A random number in the range ``[0, 360.0]`` representing where the sweep
             should begin from.
+
+        ``foodIndex`` (int)
+            The index of this Food in the :class:`simulation.Simulation` of the
+            ``scene``, assigned by :func:`model.Scene.registerActor` (or
+            :func:`view.actors.Food.bind`).  Food does not move, so ``simIndex`` (an
+            index of the moving actors) stays ``None``.
     '''
-    def __init__(self, scene, cx, cy, color, radius):
+    def __init__(self, scene, cx, cy, color, radius, startAngle=None):
         super(Food, self).__init__(scene, cx, cy)
+        self.foodIndex = None
 
         self.outerRadius = radius
         self.innerRadius = 0.5 * self.outerRadius
 
-        self.outerColor = color
-        red   = 255 - color.red()
-        green = 255 - color.green()
-        blue  = 255 - color.blue()
-        self.innerColor = QtGui.QColor(red, green, blue)
+        self.setColor(color)
 
         self.outerSweep = 360.0
         self.innerSweep = 0.0
@@ -297,7 +457,55 @@ class Food(Actor):
         self.outerBoundingRect = self.computeBoundingRect(self.outerRadius)
         self.innerBoundingRect = self.computeBoundingRect(self.innerRadius)
 
-        self.startAngle = random.random() * 360.0
+        if startAngle is None:
+            startAngle = scene.simulation.streams.stream("food").random() * 360.0
+        self.startAngle = startAngle
+
+    def setColor(self, color):
+        '''
+        Sets ``self.outerColor`` to ``color`` and ``self.innerColor`` to its inverse.
+
+        :Parameters:
+            ``color`` (:class:`PyQt4.QtGui.QColor`)
+                The color for the outer circle of this Food.
+        '''
+        self.outerColor = color
+        red   = 255 - color.red()
+        green = 255 - color.green()
+        blue  = 255 - color.blue()
+        self.innerColor = QtGui.QColor(red, green, blue)
+
+    def bind(self, index, cx, cy, color, startAngle):
+        '''
+        Turns this Food into the pellet at ``index``, so that a
+        :class:`view.actors.VirtualFood` can recycle it for another pellet rather than
+        creating a new item.  The bounding rectangles are centered at the origin and do
+        not change.
+
+        :Parameters:
+            ``index`` (int)
+                The index of the pellet in the :class:`simulation.Simulation`.
+
+            ``cx`` (float), ``cy`` (float)
+                The center of the pellet.
+
+            ``color`` (:class:`PyQt4.QtGui.QColor`)
+                The color for the outer circle of the pellet.
+
+            ``startAngle`` (float)
+                Where the sweep of the pellet begins from.
+        '''
+        simulation      = self.scene.simulation
+        self.foodIndex  = index
+        self.cx         = cx
+        self.cy         = cy
+        self.startAngle = startAngle
+        self.outerSweep = simulation.outerSweep
+        self.innerSweep = simulation.innerSweep
+        self.decreasing = simulation.decreasing
+        self.setColor(color)
+        self.setPos(cx, cy)
+        self.update()
 
     def computeBoundingRect(self, radius):
         '''
@@ -338,29 +546,30 @@ class Food(Actor):
 
     def paint(self, painter, option, widget):
         '''
-        Displays the food at its current sweep state.
+        Displays the food at its current sweep state.  The arc paths come from
+        :data:`view.actors.ARC_PATHS`, rotated so that the sweep begins at
+        ``self.startAngle``.
         '''
+        transform = painter.transform()
+        painter.rotate(-self.startAngle)
+
         # Paint the outer path first
-        outerPath = QtGui.QPainterPath()
-        outerPath.arcTo(self.outerBoundingRect, self.startAngle, self.outerSweep)
-        # outerPath.addEllipse(self.outerBoundingRect)
-        outerPath.closeSubpath()
         painter.setBrush(self.outerColor)
-        painter.drawPath(outerPath)
+        painter.drawPath(ARC_PATHS.path(self.outerRadius, self.outerSweep))
 
         # Paint the inner path second
-        innerPath = QtGui.QPainterPath()
-        innerPath.arcTo(self.innerBoundingRect, self.startAngle, self.innerSweep)
-        # innerPath.addEllipse(self.innerBoundingRect)
-        innerPath.closeSubpath()
         painter.setBrush(self.innerColor)
-        painter.drawPath(innerPath)
+        painter.drawPath(ARC_PATHS.path(self.innerRadius, self.innerSweep))
+
+        painter.setTransform(transform)
 
     def advance(self, phase):
         '''
-        Increases / decreases both radii depending on ``self.decreasing``.  When the
+        Mirrors the sweep animation of :func:`simulation.Simulation.animateFood`, which
+        increases / decreases both radii depending on ``self.decreasing``.  When the
         ``outerSweep`` reaches ``0.0``, ``decreasing`` is set to ``False``.  When
-        ``outerSweep`` reaches ``360.0``, ``decreasing`` is set to ``True``.
+        ``outerSweep`` reaches ``360.0``, ``decreasing`` is set to ``True``.  Since all
+        Food is created and reset at the same time, this state is shared by all Food.
 
         :Parameters:
             ``phase`` (int)
@@ -368,19 +577,16 @@ class Food(Actor):
                 applied at phase ``1``.
         '''
         if phase == 1:
-            # If decreasing, reduce outer radius and increase inner radius
-            if self.decreasing:
-                self.outerSweep -= 1.0
-                self.innerSweep += 1.0
-                if self.outerSweep == 0.0:
-                    self.decreasing = False
-            # Otherwise, reverse: increase outer radius and decrease inner radius
-            else:
-                self.outerSweep += 1.0
-                self.innerSweep -= 1.0
-                if self.outerSweep == 360.0:
-                    self.decreasing = True
+            simulation = self.scene.simulation
+            if self.outerSweep == simulation.outerSweep:
+                return
+
+            self.outerSweep = simulation.outerSweep
+            self.innerSweep = simulation.innerSweep
+            self.decreasing = simulation.decreasing
 
+            if self.isVisible():
+                self.scene.damage.addRect(self.sceneBoundingRect())
             self.update()
 
     def reset(self):
@@ -400,6 +606,364 @@ class Food(Actor):
         super(Food, self).reset()
 
 
+class FoodField(QtGui.QGraphicsItem):
+    '''
+    All of the Food in the game drawn by a single item.  Rather than one
+    :class:`view.actors.Food` per pellet (each with its own colors, rectangles,
+    animation state and Python ``paint`` / ``advance`` callbacks), the pellets are
+    stored in compact arrays and every visible pellet is painted in one ``paint`` call.
+
+    Which pellets have been eaten, and the sweep animation they all share, are read from
+    the :class:`simulation.Simulation` of the ``scene``.  Pellets are numbered in the
+    order they are added, which must be the order they are added to the simulation.
+
+    :Parameters:
+        ``scene`` (:class:`model.Scene`)
+            The Scene that this food is bound to.
+
+        ``radius`` (float)
+            The radius of every pellet (should be :data:`constants.FOOD_RADIUS`).
+
+    :Attributes:
+        ``outerRadius`` (float), ``innerRadius`` (float)
+            The radii of the outer and inner circles of every pellet.
+
+        ``outerBoundingRect`` (:class:`PyQt4.QtCore.QRectF`), ``innerBoundingRect``
+            The bounding rectangles of the outer and inner circles, centered at the
+            origin.
+
+        ``centerX``, ``centerY`` (:class:`array.array`)
+            The center of every pellet.
+
+        ``colors`` (:class:`array.array`)
+            The ``0xRRGGBB`` outer color of every pellet.  The inner color is its
+            inverse, exactly like :class:`view.actors.Food`.
+
+        ``startAngles`` (:class:`array.array`)
+            Where the sweep of every pellet begins from, in ``[0, 360.0]``.
+    '''
+    def __init__(self, scene, radius):
+        super(FoodField, self).__init__(scene=scene)
+        self.scene       = scene
+        self.outerRadius = radius
+        self.innerRadius = 0.5 * radius
+
+        self.outerBoundingRect = QtCore.QRectF(-self.outerRadius, -self.outerRadius,
+                                               2.0 * self.outerRadius, 2.0 * self.outerRadius)
+        self.innerBoundingRect = QtCore.QRectF(-self.innerRadius, -self.innerRadius,
+                                               2.0 * self.innerRadius, 2.0 * self.innerRadius)
+
+        self.centerX     = array('d')
+        self.centerY     = array('d')
+        self.colors      = array('L')
+        self.startAngles = array('f')
+        self.fieldRect   = QtCore.QRectF()
+        self.lastSweep   = None
+
+        # The viewport region covered by the visible uneaten pellets, which is what the
+        # sweep animation damages every frame.  Rebuilt when food is eaten / reset, or
+        # the view changes.
+        self.damageRegion    = None
+        self.damageTransform = None
+
+        # Only paint what was actually exposed rather than the entire field.
+        self.setFlag(QtGui.QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    def addFood(self, cx, cy, color):
+        '''
+        Adds a pellet centered at ``(cx, cy)``.
+
+        :Parameters:
+            ``cx`` (float), ``cy`` (float)
+                The center of the pellet, in scene coordinates.
+
+            ``color`` (:class:`PyQt4.QtGui.QColor`)
+                The color for the outer circle of the pellet.
+
+        :Return:
+            ``int``
+                The index of the new pellet.
+        '''
+        index = len(self.centerX)
+        self.centerX.append(cx)
+        self.centerY.append(cy)
+        self.colors.append(color.rgb() & 0xFFFFFF)
+        self.startAngles.append(self.scene.simulation.streams.stream("food").random() * 360.0)
+
+        self.prepareGeometryChange()
+        self.fieldRect = self.fieldRect.united(self.foodRect(index))
+        return index
+
+    def foodBounds(self):
+        '''
+        Returns the local ``(left, top, right, bottom)`` bounding rectangle shared by
+        every pellet, for :func:`simulation.Simulation.addFood`.
+        '''
+        r = self.outerRadius
+        return -r, -r, r, r
+
+    def foodRect(self, index):
+        ''' Returns the bounding rectangle of the pellet at ``index``. '''
+        return self.outerBoundingRect.translated(self.centerX[index], self.centerY[index])
+
+    def visibleFood(self, rect):
+        '''
+        Returns the indices of the pellets that have not been eaten and intersect
+        ``rect``, see :func:`simulation.Simulation.foodIn`.
+        '''
+        return self.scene.simulation.foodIn(rect.left(), rect.top(),
+                                            rect.right(), rect.bottom())
+
+    def foodEaten(self, index):
+        '''
+        Called by :func:`model.Scene.step` when the pellet at ``index`` was eaten, so
+        that it is repainted (i.e. erased).
+        '''
+        self.scene.damage.addRect(self.foodRect(index))
+        self.damageRegion = None
+
+    def reset(self):
+        ''' Called when all of the pellets become edible again. '''
+        self.damageRegion = None
+        self.lastSweep    = None
+        self.update()
+
+    def animationRegion(self, damage):
+        '''
+        Returns the viewport region covered by the uneaten pellets that are visible, for
+        ``damage`` (the :class:`view.display.DamageTracker` of the scene).  When those
+        pellets would cover more than the ``threshold`` of ``damage`` anyway, the
+        visible part of the field is returned as a single rectangle instead.  Cached
+        until a pellet is eaten / reset or the view changes.
+        '''
+        view      = damage.view
+        viewport  = view.viewport().rect()
+        transform = (view.viewportTransform(), viewport.size())
+        if self.damageRegion is None or self.damageTransform != transform:
+            visible = view.mapToScene(viewport).boundingRect()
+            pellets = self.visibleFood(visible)
+
+            # Every pellet covers the same area of the viewport
+            pellet = damage.viewportRect(self.outerBoundingRect)
+            area   = len(pellets) * pellet.width() * pellet.height()
+            if area > damage.threshold * viewport.width() * viewport.height():
+                region = QtGui.QRegion(
+                    damage.viewportRect(self.fieldRect.intersected(visible))
+                )
+            else:
+                region = QtGui.QRegion()
+                for i in pellets:
+                    rect   = damage.viewportRect(self.foodRect(i))
+                    region = region.united(QtGui.QRegion(rect))
+            self.damageRegion    = region
+            self.damageTransform = transform
+        return self.damageRegion
+
+    def boundingRect(self):
+        ''' The union of the bounding rectangles of every pellet. '''
+        return self.fieldRect
+
+    def paint(self, painter, option, widget):
+        '''
+        Displays every pellet that has not been eaten and was exposed, at the current
+        sweep state.
+        '''
+        simulation = self.scene.simulation
+        # Every pellet shares the same sweep, so the paths only need to be looked up once
+        outerPath  = ARC_PATHS.path(self.outerRadius, simulation.outerSweep)
+        innerPath  = ARC_PATHS.path(self.innerRadius, simulation.innerSweep)
+        transform  = painter.transform()
+
+        for i in self.visibleFood(option.exposedRect):
+            rgb = self.colors[i]
+            painter.setTransform(transform)
+            painter.translate(self.centerX[i], self.centerY[i])
+            painter.rotate(-self.startAngles[i])
+
+            painter.setBrush(QtGui.QColor(rgb))
+            painter.drawPath(outerPath)
+
+            painter.setBrush(QtGui.QColor(0xFFFFFF - rgb))
+            painter.drawPath(innerPath)
+
+        painter.setTransform(transform)
+
+    def advance(self, phase):
+        '''
+        The sweep animation is stepped by :func:`simulation.Simulation.animateFood`,
+        all this needs to do is schedule a repaint of the pellets at phase ``1`` when the
+        sweep changed.
+        '''
+        if phase == 1:
+            sweep = self.scene.simulation.outerSweep
+            if sweep == self.lastSweep:
+                return
+            self.lastSweep = sweep
+
+            damage = self.scene.damage
+            if damage.enabled:
+                damage.addRegion(self.animationRegion(damage))
+            self.update()
+
+
+class VirtualFood(object):
+    '''
+    All of the Food in the game, of which only the pellets near the visible part of the
+    scene are real :class:`view.actors.Food` items.  The pellets themselves are kept in
+    compact arrays (their centers, which and when they were eaten, in the
+    :class:`simulation.Simulation` of the ``scene``), and items are created for the
+    uneaten pellets that overlap the visible scene rectangle grown by ``margin``.  When
+    the view changes, or a pellet is eaten, items that are no longer needed are hidden
+    and kept in ``pool`` to be bound to the next pellet that needs one, so the number of
+    items is bounded by what fits on screen rather than by the size of the board.
+
+    Pellets are numbered in the order they are added, which must be the order they are
+    added to the simulation.
+
+    :Parameters:
+        ``scene`` (:class:`model.Scene`)
+            The Scene that this food is bound to.
+
+        ``radius`` (float)
+            The radius of every pellet (should be :data:`constants.FOOD_RADIUS`).
+
+        ``margin`` (float)
+            How far beyond the visible scene rectangle pellets still get an item (should
+            be :data:`constants.FOOD_VIEW_MARGIN`).
+
+    :Attributes:
+        ``colors`` (:class:`array.array`)
+            The ``0xAARRGGBB`` outer color of every pellet.
+
+        ``startAngles`` (:class:`array.array`)
+            Where the sweep of every pellet begins from, in ``[0, 360.0]``.  Drawn up
+            front, so that a pellet looks the same every time it gets an item.
+
+        ``items`` (dict)
+            The :class:`view.actors.Food` currently bound to a pellet, by pellet index.
+
+        ``pool`` (list)
+            The hidden :class:`view.actors.Food` items waiting to be bound again.
+
+        ``shownRect`` (:class:`PyQt4.QtCore.QRectF`)
+            The scene rectangle ``items`` were last laid out for, ``None`` when they need
+            to be laid out again.
+    '''
+    def __init__(self, scene, radius, margin):
+        self.scene       = scene
+        self.radius      = radius
+        self.margin      = margin
+        self.colors      = array('L')
+        self.startAngles = array('f')
+        self.items       = {}
+        self.pool        = []
+        self.shownRect   = None
+
+    def __len__(self):
+        return len(self.colors)
+
+    def addFood(self, cx, cy, color):
+        '''
+        Adds a pellet centered at ``(cx, cy)``.  No item is created for it until
+        :func:`view.actors.VirtualFood.layout` finds it near the visible scene rectangle.
+
+        :Parameters:
+            ``cx`` (float), ``cy`` (float)
+                The center of the pellet, in scene coordinates.
+
+            ``color`` (:class:`PyQt4.QtGui.QColor`)
+                The color for the outer circle of the pellet.
+
+        :Return:
+            ``int``
+                The index of the new pellet.
+        '''
+        index = len(self.colors)
+        self.colors.append(color.rgba())
+        self.startAngles.append(self.scene.simulation.streams.stream("food").random() * 360.0)
+        self.shownRect = None
+        return index
+
+    def foodBounds(self):
+        '''
+        Returns the local ``(left, top, right, bottom)`` bounding rectangle shared by
+        every pellet, for :func:`simulation.Simulation.addFood`.
+        '''
+        r = self.radius
+        return -r, -r, r, r
+
+    def visibleRect(self):
+        ''' The scene rectangle shown by the view of the scene, grown by ``margin``. '''
+        view = self.scene.view
+        rect = view.mapToScene(view.viewport().rect()).boundingRect()
+        return rect.adjusted(-self.margin, -self.margin, self.margin, self.margin)
+
+    def layout(self):
+        '''
+        Makes sure that exactly the uneaten pellets overlapping
+        :func:`view.actors.VirtualFood.visibleRect` have an item.  Nothing is done while
+        that rectangle is the same as the last time and no pellet became edible again,
+        so this is cheap to call every frame (see :func:`model.Scene.render`).
+        '''
+        rect = self.visibleRect()
+        if rect == self.shownRect:
+            return
+        self.shownRect = rect
+
+        wanted = self.scene.simulation.foodIn(rect.left(), rect.top(),
+                                              rect.right(), rect.bottom())
+        keep = set(wanted)
+        # Release first, so that the items can be bound to the pellets coming into view
+        for index in [i for i in self.items if i not in keep]:
+            self.release(index)
+        for index in wanted:
+            if index not in self.items:
+                self.acquire(index)
+
+    def acquire(self, index):
+        '''
+        Binds an item to the pellet at ``index``, taken from ``pool`` when there is one.
+        '''
+        simulation = self.scene.simulation
+        cx         = simulation.foodX[index]
+        cy         = simulation.foodY[index]
+        color      = QtGui.QColor.fromRgba(self.colors[index])
+        if self.pool:
+            item = self.pool.pop()
+            item.bind(index, cx, cy, color, self.startAngles[index])
+            item.setVisible(True)
+        else:
+            item = Food(self.scene, cx, cy, color, self.radius, self.startAngles[index])
+            item.bind(index, cx, cy, color, self.startAngles[index])
+        self.items[index] = item
+        self.scene.damage.addRect(item.sceneBoundingRect())
+
+    def release(self, index):
+        ''' Hides the item of the pellet at ``index`` and returns it to ``pool``. '''
+        item = self.items.pop(index)
+        self.scene.damage.addRect(item.sceneBoundingRect())
+        item.setVisible(False)
+        item.foodIndex = None
+        self.pool.append(item)
+
+    def foodEaten(self, index):
+        '''
+        Called by :func:`model.Scene.step` when the pellet at ``index`` was eaten, so that
+        its item (if it has one) is hidden and recycled.
+        '''
+        if index in self.items:
+            self.release(index)
+
+    def reset(self):
+        '''
+        Called when all of the pellets become edible again, the items are laid out again
+        on the next :func:`view.actors.VirtualFood.layout`.
+        '''
+        self.shownRect = None
+        for item in self.items.values():
+            item.reset()
+
+
 class SplineDrawer(Actor):
     '''
     **Do not edit this class.**
@@ -429,17 +993,31 @@ class SplineDrawer(Actor):
 
     :Attributes:
         ``path`` (:class:`PyQt4.QtGui.QPainterPath`)
-            The painter path as parsed by
-            :func:`view.actors.SplineDrawer.parseResourceJson`.
+            The cubic painter path of the spline, the same one
+            :func:`view.actors.SplineDrawer.parseResourceJson` builds.
 
         ``pathRect`` (:class:`PyQt4.QtCore.QRectF`)
             The bounding rectangle *for the painter path*.
 
         ``poly`` (:class:`PyQt4.QtCore.QPolygonF`)
-            The minimal polygon that describes the ``path``.
+            The polygon that describes the ``path``, the finest of the ``lods``.
 
         ``polyRect`` (:class:`PyQt4.QtCore.QRectF`)
-            The bounding rectangle *for the polygon*.
+            The bounding rectangle of every level of detail and the hull, see
+            :func:`splines.shapeBounds`.  The headless simulation uses the same
+            rectangle, so that collisions agree with the game.
+
+        ``lods`` (list)
+            The polygon levels of detail as ``(tolerance, polygon)`` tuples, coarsest
+            first, flattened to the :data:`constants.SPLINE_LOD_TOLERANCES` (see
+            :func:`splines.levelsOfDetail`).
+
+        ``hull`` (list)
+            The ``(x, y)`` vertices of the convex hull of the spline, which is what the
+            :class:`simulation.Simulation` tests collisions with.
+
+        ``hullPath`` (:class:`PyQt4.QtGui.QPainterPath`)
+            The same hull as a path, returned by :func:`view.actors.SplineDrawer.shape`.
 
     This class exists to take Bezier data points from Blender's representation and
     use Qt's representation instead.  A valid input data ``json`` looks like this:
@@ -584,19 +1162,46 @@ class SplineDrawer(Actor):
         # the resolution at which they are drawn makes replacing them with polygons
         # just as good, and takes a fraction of the time to render.
         #
-        # Splines are cubic polynomials...
-        self.path     = SplineDrawer.parseResourceJson(dataResource, sx, sy)
-        self.pathRect = self.path.boundingRect()  # Only compute this once.
+        # Splines are cubic polynomials...  Parsing them and extracting a usable
+        # polygon only happens for the first actor using this data file and scale,
+        # every other actor shares the result (see view.actors.SplineCache).
+        (self.path, self.pathRect, self.poly, self.polyRect, self.lods, self.hull,
+         self.hullPath) = SPLINES.shape(dataResource, sx, sy)
 
-        # Extract a usable polygon from the parsed spline drawing path
-        sub_poly  = self.path.toSubpathPolygons()
-        self.poly = QtGui.QPolygonF()
-        for sub in sub_poly:
-            for point in sub:
-                self.poly.append(point)
-        self.polyRect = self.poly.boundingRect()
+        self.color = randomColor(scene.simulation.streams.stream("colors"))
 
-        self.color = randomColor()
+    @classmethod
+    def parseResource(cls, dataResource, sx, sy):
+        '''
+        Returns the painter path of the spline in ``dataResource``, loaded from the
+        packed binary file on disk converted from the ``json`` (see :mod:`splines`) when
+        there is one.  Otherwise falls back to
+        :func:`view.actors.SplineDrawer.parseResourceJson`, which reads the ``json``
+        compiled into the Qt Resources.
+
+        :Parameters:
+            ``dataResource`` (str)
+                The Qt Resource descriptor of the ``json`` data.
+
+            ``sx`` (float)
+                The :math:`x` scaling factor :math:`s_x`.
+
+            ``sy`` (float)
+                The :math:`y` scaling factor :math:`s_y`.
+
+        :Return:
+            :class:`PyQt4.QtGui.QPainterPath`
+                The same path :func:`view.actors.SplineDrawer.parseResourceJson` builds.
+        '''
+        loaded = splines.loadBinaryControlPoints(dataResource, sx, sy)
+        if loaded is None:
+            return cls.parseResourceJson(dataResource, sx, sy)
+
+        painterPath = QtGui.QPainterPath()
+        for p0, c1, c2, p3 in splines.cubicSegments(*loaded):
+            painterPath.moveTo(p0[0], p0[1])
+            painterPath.cubicTo(c1[0], c1[1], c2[0], c2[1], p3[0], p3[1])
+        return painterPath
 
     @classmethod
     def parseResourceJson(cls, dataResource, sx, sy):
@@ -722,11 +1327,24 @@ class SplineDrawer(Actor):
 
         return painterPath
 
+    def levelOfDetail(self, scale):
+        '''
+        Returns the coarsest polygon in ``self.lods`` that stays within
+        :data:`constants.SPLINE_TOLERANCE` pixels of the spline when drawn at ``scale``
+        pixels per scene unit, or the finest one if none of them do.
+        '''
+        for tolerance, polygon in self.lods:
+            if tolerance * scale <= constants.SPLINE_TOLERANCE:
+                return polygon
+        return self.lods[-1][1]
+
     def paint(self, painter, option, widget):
         '''
-        Paints this spline.  Currently, since the actors in the game are small, the
-        polygon path is used instead of the cubic path.  If you desire to draw any of
-        the actors at a higher resolution, you should draw with ``self.path`` instead.
+        Paints this spline.  Currently, since the actors in the game are small, a
+        polygon is used instead of the cubic path: the level of detail that looks
+        smooth at the scale of the painter's world transform (see
+        :func:`view.actors.SplineDrawer.levelOfDetail`).  If you desire to draw any of
+        the actors exactly, you should draw with ``self.path`` instead.
         '''
         painter.setBrush(self.color)
         # If you wanted to draw a higher resolution spline, you should uncomment this
@@ -734,7 +1352,16 @@ class SplineDrawer(Actor):
         # instances in the framework are drawn, there is no benefit.  But for a larger
         # image you will definitely notice the difference!
         # painter.drawPath(self.path)
-        painter.drawPolygon(self.poly)
+        scale = math.sqrt(abs(painter.worldTransform().determinant()))
+        painter.drawPolygon(self.levelOfDetail(scale))
+
+    def shape(self):
+        '''
+        Returns the convex hull of this spline, so that ``collidesWithItem`` and hit
+        tests use the outline of the actor rather than its bounding rectangle.  The
+        hull is computed once per data file (see :class:`view.actors.SplineCache`).
+        '''
+        return self.hullPath
 
     def boundingRect(self):
         '''
@@ -773,19 +1400,17 @@ class GhostActor(SplineDrawer):
             The :math:`y` scaling factor :math:`s_y` of this Ghost, should be the value
             of ``-1.0 *`` :data:`constants.SPLINE_COORD_SCALE`.
 
-    :Attributes:
-        ``moveTimer`` (:class:`PyQt4.QtCore.QTimer`)
-            The timer to control when a ghost will randomly change its move pattern,
-            connected directly to :func:`view.actors.GhostActor.timerEvent` and
-            refreshes at the interval defined by
-            :data:`view.actors.GhostActor.GHOST_MOVE_TIME`.
-
-            That is, Ghosts change their direction independent of the game loop.
+    Ghosts randomly change their move pattern every
+    :data:`view.actors.GhostActor.GHOST_MOVE_TIME` milliseconds of *game* time.  The
+    timer lives on the :class:`scheduler.TimerWheel` of the scene's
+    :class:`simulation.Simulation` (see :func:`simulation.Simulation.addActor`), so
+    Ghosts change direction in step with the game loop rather than on their own
+    ``QTimer``.
     '''
-    DATA_FILE = ":/view/qt_configs/data/ghost_body.json"
+    DATA_FILE = splines.GHOST_DATA_FILE
     ''' The data file needed to instantiate a Ghost. '''
 
-    GHOST_MOVE_TIME = 1000
+    GHOST_MOVE_TIME = constants.GHOST_MOVE_TIME
     '''
     How frequently a GhostActor should randomly change its direction.  This time is
     specified in milliseconds, i.e. ``1000`` means **1 second**.
@@ -793,40 +1418,21 @@ class GhostActor(SplineDrawer):
 
     def __init__(self, scene, cx, cy, sx, sy):
         super(GhostActor, self).__init__(scene, cx, cy, GhostActor.DATA_FILE, sx, sy)
-        self.moveTimer = QtCore.QTimer()
-        self.moveTimer.timeout.connect(self.timerEvent)
-        self.moveTimer.start(GhostActor.GHOST_MOVE_TIME)
 
     def timerEvent(self):
         '''
         When called the ghost will randomly choose with probability
         :math:`p = \\frac{1}{2}` to either add or remove a direction from its
-        ``moveFlags``.
-        '''
-        # shuffle so there is no direction bias
-        dirs = [constants.MOVE_NORTH, constants.MOVE_SOUTH,
-                constants.MOVE_EAST,  constants.MOVE_WEST]
-        random.shuffle(dirs)
-
-        # Either try and remove a direction or add one
-        r1 = random.random()
-        if r1 < 0.5:
-            removed = False
-            for d in dirs:
-                if (self.moveFlags & d) == d:
-                    self.moveFlags &= ~d
-                    removed = True
-                    break
-
-            # If no directions could be removed, make sure that the moveFlags attribute
-            # is set to constants.STATIONARY for consistency
-            if not removed:
-                self.moveFlags = constants.STATIONARY
-        else:
-            for d in dirs:
-                if not (self.moveFlags & d) == d:
-                    self.moveFlags |= d
-                    break
+        ``moveFlags``, see :func:`simulation.randomDirectionChange`.  This is what the
+        scheduler calls (via :func:`simulation.Simulation.changeDirection`) every
+        :data:`view.actors.GhostActor.GHOST_MOVE_TIME` milliseconds of game time.
+
+        The direction is drawn from the seeded stream of this Ghost in the simulation,
+        so a Ghost that has not been registered (see :func:`model.Scene.registerActor`)
+        does not move.
+        '''
+        if self.simIndex is not None:
+            self.scene.simulation.changeDirection(self.simIndex)
 
 
 class CitizenPacActor(SplineDrawer):
@@ -853,7 +1459,7 @@ class CitizenPacActor(SplineDrawer):
             The :math:`y` scaling factor :math:`s_y` of this Ghost, should be the value
             of ``-1.0 *`` :data:`constants.SPLINE_COORD_SCALE`.
     '''
-    DATA_FILE = ":/view/qt_configs/data/bat_points.json"
+    DATA_FILE = splines.CITIZEN_PAC_DATA_FILE
     ''' The data file needed to instantiate a CitizenPac. '''
 
     def __init__(self, scene, cx, cy, sx, sy):
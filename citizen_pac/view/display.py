@@ -10,18 +10,24 @@ from PyQt4 import QtCore, QtGui
 from qt_configs import Ui_CitizenPacMainWindow
 
 
-def randomColor():
+def randomColor(rng=random):
     '''
     Returns a random color.
 
+    :Parameters:
+        ``rng`` (:class:`random.Random`)
+            The random number generator to draw from, e.g. the ``"colors"`` substream
+            of the game (see :class:`streams.RandomStreams`).  Defaults to the global
+            :mod:`random` module.
+
     :Return:
         :class:`PyQt4.QtGui.QColor`
             A random color generated by choosing a random integer in ``[0, 255]`` for the
             red, green, and blue channels.
     '''
-    r = random.randint(0, 255)
-    g = random.randint(0, 255)
-    b = random.randint(0, 255)
+    r = rng.randint(0, 255)
+    g = rng.randint(0, 255)
+    b = rng.randint(0, 255)
     return QtGui.QColor(r, g, b)
 
 
@@ -45,6 +51,18 @@ class CitizenPacMainWindow(QtGui.QMainWindow, Ui_CitizenPacMainWindow):
         self.setupUi(self)
         self.scene = None
 
+    def applyStyleSheet(self, styleSheet):
+        '''
+        Applies ``styleSheet`` to the stats bar (and everything in it) only, rather than
+        to the entire application.  Used when :data:`constants.STYLESHEET_SCOPE` is
+        ``"statsBar"``.
+
+        :Parameters:
+            ``styleSheet`` (str)
+                The stylesheet text, see :func:`view.stylesheet.loadStyleSheet`.
+        '''
+        self.statsBarContainerWidget.setStyleSheet(styleSheet)
+
     def attachScene(self, scene):
         '''
         We need the scene in order to determine what size we are trying to display in.
@@ -67,6 +85,136 @@ class CitizenPacMainWindow(QtGui.QMainWindow, Ui_CitizenPacMainWindow):
         '''
         newSize = self.scene.view.sceneRect()
         self.scene.view.fitInView(newSize, QtCore.Qt.KeepAspectRatio)
+        # The game timer is stopped while paused, so lay out the Food for the new view now
+        if self.scene.virtualFood is not None:
+            self.scene.virtualFood.layout()
+        # The view may only be repainting dirty regions, everything has moved.
+        self.scene.view.viewport().update()
+
+
+class PaintStartFilter(QtCore.QObject):
+    '''
+    Installed on the viewport of the game view while the frame-time overlay is shown,
+    to tell the :class:`model.Scene` when the view starts painting (it finishes with
+    :func:`model.Scene.drawForeground`).
+
+    :Attributes:
+        ``scene`` (:class:`model.Scene`)
+            The scene to notify.
+    '''
+    def __init__(self, scene, parent=None):
+        super(PaintStartFilter, self).__init__(parent)
+        self.scene = scene
+
+    def eventFilter(self, obj, event):
+        '''
+        Calls :func:`model.Scene.paintStarted` for every ``Paint`` event, never
+        filtering anything out.
+        '''
+        if event.type() == QtCore.QEvent.Paint:
+            self.scene.paintStarted()
+        return False
+
+
+class DamageTracker(object):
+    '''
+    Collects the regions of the scene that changed during a frame, and repaints only
+    those parts of the view.  Used when :data:`constants.DIRTY_REGION_UPDATES` is
+    ``True``, in which case the view is configured with
+    ``QGraphicsView.NoViewportUpdate`` so that repainting is entirely up to this class.
+
+    :Parameters:
+        ``view`` (:class:`PyQt4.QtGui.QGraphicsView`)
+            The view to repaint.
+
+        ``enabled`` (bool)
+            Whether or not damage should be tracked at all.
+
+        ``threshold`` (float)
+            When the damaged area exceeds this fraction of the viewport, the entire
+            viewport is repainted instead.
+
+    :Attributes:
+        ``rects`` (list)
+            The damaged :class:`PyQt4.QtCore.QRectF` in scene coordinates.
+
+        ``regions`` (list)
+            Damaged :class:`PyQt4.QtGui.QRegion` already in viewport coordinates.
+
+        ``full`` (bool)
+            Whether the entire viewport must be repainted.
+    '''
+    MARGIN = 2
+    ''' Extra pixels around every damaged rectangle, to account for antialiasing. '''
+
+    def __init__(self, view, enabled, threshold):
+        self.view      = view
+        self.enabled   = enabled
+        self.threshold = threshold
+        self.rects     = []
+        self.regions   = []
+        self.full      = False
+
+    def addRect(self, rect):
+        '''
+        Reports that ``rect`` (a :class:`PyQt4.QtCore.QRectF` in scene coordinates) needs
+        to be repainted.
+        '''
+        if self.enabled and not self.full:
+            self.rects.append(rect)
+
+    def addRegion(self, region):
+        '''
+        Reports that ``region`` (a :class:`PyQt4.QtGui.QRegion` in viewport coordinates)
+        needs to be repainted.
+        '''
+        if self.enabled and not self.full:
+            self.regions.append(region)
+
+    def invalidateAll(self):
+        ''' Reports that the entire viewport needs to be repainted. '''
+        self.full = True
+
+    def viewportRect(self, rect):
+        '''
+        Maps ``rect`` from scene coordinates to the (slightly enlarged) viewport
+        rectangle it covers.
+        '''
+        m      = DamageTracker.MARGIN
+        mapped = self.view.viewportTransform().mapRect(rect).toAlignedRect()
+        return mapped.adjusted(-m, -m, m, m)
+
+    def flush(self):
+        '''
+        Repaints everything that was reported since the last flush: the union of the
+        damaged regions, or the entire viewport when the damaged area exceeds the
+        ``threshold``.
+        '''
+        if not self.enabled:
+            return
+
+        viewport = self.view.viewport()
+        if self.full:
+            viewport.update()
+        elif self.rects or self.regions:
+            region = QtGui.QRegion()
+            for rect in self.rects:
+                region = region.united(QtGui.QRegion(self.viewportRect(rect)))
+            for other in self.regions:
+                region = region.united(other)
+
+            area = 0
+            for rect in region.rects():
+                area += rect.width() * rect.height()
+
+            if area > self.threshold * viewport.width() * viewport.height():
+                viewport.update()
+            else:
+                viewport.update(region)
+
+        self.rects   = []
+        self.regions = []
+        self.full    = False
 
 
 class GameStats(object):
@@ -102,6 +250,11 @@ class GameStats(object):
 
         ``scoreBoard`` (:class:`PyQt4.QtGui.QLCDNumber`)
             The LCD panel to display the game score on.
+
+        ``shown`` (dict)
+            The value every widget currently shows, by attribute name.  Setting a widget
+            to the value it already shows is skipped, so that it is not repainted for
+            nothing.
     '''
     def __init__(self, gameRunning, speedBoost, numLives, scoreBoard):
         self.gameRunning = gameRunning
@@ -109,6 +262,17 @@ class GameStats(object):
         self.speedBoost  = speedBoost
         self.numLives    = numLives
         self.scoreBoard  = scoreBoard
+        self.shown       = {}
+
+    def changed(self, widget, value):
+        '''
+        Returns whether or not ``widget`` shows something other than ``value``, and
+        remembers that it will show ``value`` from now on.
+        '''
+        if widget in self.shown and self.shown[widget] == value:
+            return False
+        self.shown[widget] = value
+        return True
 
     def setRunning(self, running):
         '''
@@ -118,7 +282,8 @@ class GameStats(object):
             ``running`` (bool)
                 The value to set checked to, ``True`` for checked, ``False`` otherwise.
         '''
-        self.gameRunning.setChecked(running)
+        if self.changed("gameRunning", running):
+            self.gameRunning.setChecked(running)
 
     def displayGameScore(self, score):
         '''
@@ -128,7 +293,8 @@ class GameStats(object):
             ``score`` (float)
                 The value to display on the game ``scoreBoard``.
         '''
-        self.scoreBoard.display(score)
+        if self.changed("scoreBoard", score):
+            self.scoreBoard.display(score)
 
     def displayGameSpeed(self, speed):
         '''
@@ -138,7 +304,8 @@ class GameStats(object):
             ``speed`` (float)
                 The value to display on the ``speedBoost`` progress bar.
         '''
-        self.speedBoost.setValue(speed)
+        if self.changed("speedBoost", speed):
+            self.speedBoost.setValue(speed)
 
     def setLives(self, val):
         '''
@@ -148,4 +315,5 @@ class GameStats(object):
             ``val`` (int)
                 The value to display on the game ``scoreBoard``.
         '''
-        self.numLives.display(float(val))
+        if self.changed("numLives", val):
+            self.numLives.display(float(val))
@@ -81,6 +81,22 @@ Breakdown
 
 You now have the relevant python module that will be imported by the UI toolkit.
 
+Binary Resource Bundles
+****************************************************************************************
+
+Importing the ``_rc.py`` modules is slow: Python has to load thousands of lines of
+escaped bytes, which are then copied into Qt.  So whenever they are regenerated, also
+rebuild the binary bundles ``citizen_pac.rcc`` and ``qdarkstyle/style.rcc``:
+
+.. code-block:: console
+
+    $ python build_rcc.py
+
+At startup, :func:`rcc_bundles.registerBundles` memory maps these with
+``QResource.registerResource`` and the ``_rc.py`` modules are never imported.  The
+resource paths stay exactly the same, and if a bundle is missing the ``_rc.py`` module
+is imported instead.
+
 .. _ui_toolkit:
 
 Qt UI Toolit
@@ -199,7 +215,11 @@ into the ``qdarkstyle`` subdirectory (that's the actual python package), move th
 No matter what, **make sure you distribute the license with this folder**!
 '''
 
-from qt_generated_ui import Ui_CitizenPacMainWindow
+# The resource bundles must be registered before the generated UI imports citizen_pac_rc
+from rcc_bundles import registerBundles
+registerBundles()
+
+from qt_generated_ui import Ui_CitizenPacMainWindow  # noqa: E402
 
 
 # Typically packagers will ``import`` all modules from their library in the ``__init__``
@@ -0,0 +1,108 @@
+'''
+Builds the binary ``.rcc`` resource bundles registered by :mod:`rcc_bundles`.
+
+The bundles contain exactly the same resource tree as the ``pyrcc4`` generated
+``citizen_pac_rc.py`` and ``qdarkstyle/pyqt_style_rc.py`` modules: the three byte
+sections of those modules (``qt_resource_data``, ``qt_resource_name`` and
+``qt_resource_struct``) are what ``rcc -binary`` writes after its header, so they are
+read out of the modules (without importing them, or ``PyQt4``) and written as
+
+.. code-block:: none
+
+   offset  type        contents
+   0       char[4]     "qres"
+   4       uint32      format version, 1
+   8       uint32      offset of the tree (qt_resource_struct)
+   12      uint32      offset of the data (qt_resource_data)
+   16      uint32      offset of the names (qt_resource_name)
+   20      ...         data, names, tree
+
+with every number big-endian.  Rebuild the bundles whenever the ``_rc.py`` modules are
+regenerated:
+
+.. code-block:: console
+
+    $ python build_rcc.py
+
+If Qt's own ``rcc`` is installed, ``rcc -binary citizen_pac.qrc -o citizen_pac.rcc``
+produces an equivalent bundle straight from the ``.qrc`` file.
+'''
+
+import ast
+import os
+import struct
+import sys
+
+QT_CONFIGS_DIR = os.path.abspath(os.path.dirname(__file__))
+''' The directory containing this file. '''
+
+BUNDLES = [
+    ("citizen_pac_rc.py", "citizen_pac.rcc"),
+    (os.path.join("qdarkstyle", "pyqt_style_rc.py"), os.path.join("qdarkstyle", "style.rcc"))
+]
+''' The ``(module, bundle)`` pairs to convert, relative to this directory. '''
+
+RCC_HEADER = struct.Struct(">4sIIII")
+''' The header of a binary ``.rcc`` file. '''
+
+
+def resourceSections(rcPath):
+    '''
+    Reads the ``qt_resource_data``, ``qt_resource_name`` and ``qt_resource_struct``
+    byte strings out of the ``pyrcc4`` generated module at ``rcPath``.
+
+    :Return:
+        ``dict``
+            The three sections as ``bytes``, keyed by name.
+    '''
+    with open(rcPath) as f:
+        tree = ast.parse(f.read(), rcPath)
+
+    sections = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and \
+                isinstance(node.targets[0], ast.Name) and \
+                node.targets[0].id.startswith("qt_resource_"):
+            value = ast.literal_eval(node.value)
+            # -py2 modules hold str literals, only ever containing \x escapes
+            if not isinstance(value, bytes):
+                value = value.encode("latin-1")
+            sections[node.targets[0].id] = value
+
+    for name in ("qt_resource_data", "qt_resource_name", "qt_resource_struct"):
+        if name not in sections:
+            raise RuntimeError("[{}] does not define {}.".format(rcPath, name))
+    return sections
+
+
+def buildRcc(rcPath, rccPath):
+    '''
+    Writes the binary bundle ``rccPath`` holding the resources of the module at
+    ``rcPath``.
+    '''
+    sections   = resourceSections(rcPath)
+    data       = sections["qt_resource_data"]
+    names      = sections["qt_resource_name"]
+    tree       = sections["qt_resource_struct"]
+    dataOffset = RCC_HEADER.size
+    nameOffset = dataOffset + len(data)
+    treeOffset = nameOffset + len(names)
+
+    with open(rccPath, "wb") as f:
+        f.write(RCC_HEADER.pack(b"qres", 1, treeOffset, dataOffset, nameOffset))
+        f.write(data)
+        f.write(names)
+        f.write(tree)
+
+
+def main():
+    for module, bundle in BUNDLES:
+        rcPath  = os.path.join(QT_CONFIGS_DIR, module)
+        rccPath = os.path.join(QT_CONFIGS_DIR, bundle)
+        buildRcc(rcPath, rccPath)
+        print("{} -> {} ({} bytes)".format(module, bundle, os.path.getsize(rccPath)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+'''
+Registers the binary ``.rcc`` resource bundles built by :mod:`build_rcc`.
+
+``QResource.registerResource`` memory maps a bundle rather than copying it, so
+registering the bundles is much cheaper than importing the ``pyrcc4`` generated
+``_rc.py`` modules, which Python has to unmarshal before their bytes are copied into
+Qt.  The resource paths (``:/view/qt_configs/...`` and ``:qdarkstyle/...``) are the same
+either way.
+
+Once a bundle has been registered, its ``_rc.py`` module is replaced in
+``sys.modules`` by an empty stand-in, so that the ``import citizen_pac_rc`` of the
+generated UI and the ``import qdarkstyle.pyqt_style_rc`` of ``qdarkstyle`` do not load
+the same resources a second time.  When a bundle is missing (or the environment
+variable ``CITIZEN_PAC_NO_RCC`` is set), nothing is replaced and those imports load the
+``_rc.py`` modules as before.
+'''
+
+import os
+import sys
+import types
+
+from PyQt4 import QtCore
+
+QT_CONFIGS_DIR = os.path.abspath(os.path.dirname(__file__))
+''' The directory the bundles are found in. '''
+
+BUNDLES = [
+    ("citizen_pac_rc", "citizen_pac.rcc"),
+    ("qdarkstyle.pyqt_style_rc", os.path.join("qdarkstyle", "style.rcc"))
+]
+''' The ``(module, bundle)`` pairs, the bundle replaces the module when registered. '''
+
+registered = []
+''' The modules whose bundles have been registered. '''
+
+
+def moduleNames(module):
+    '''
+    Returns every name ``module`` may be imported under: on its own, and (for Python
+    2 implicit relative imports) relative to the package containing this file.
+    '''
+    package = __name__.rpartition(".")[0]
+    if package:
+        return [module, "{}.{}".format(package, module)]
+    return [module]
+
+
+def registerBundles():
+    '''
+    Registers every bundle in :data:`rcc_bundles.BUNDLES` that exists, and replaces the
+    module it was built from.  Calling this more than once does nothing.
+
+    :Return:
+        ``list``
+            The names of the modules that were replaced by their bundles.
+    '''
+    if registered or os.environ.get("CITIZEN_PAC_NO_RCC"):
+        return registered
+
+    for module, bundle in BUNDLES:
+        # Never register the same resources twice
+        names = moduleNames(module)
+        if any(name in sys.modules for name in names):
+            continue
+
+        path = os.path.join(QT_CONFIGS_DIR, bundle)
+        if not os.path.isfile(path) or not QtCore.QResource.registerResource(path):
+            continue
+
+        standIn = types.ModuleType(module)
+        standIn.__doc__ = "Registered from {} by rcc_bundles.".format(bundle)
+        standIn.qInitResources    = lambda: None
+        standIn.qCleanupResources = lambda: None
+        for name in names:
+            sys.modules[name] = standIn
+        registered.append(module)
+
+    return registered
@@ -0,0 +1,85 @@
+'''
+Loads the ``qdarkstyle`` stylesheet, through an on-disk cache.
+
+``qdarkstyle.load_stylesheet`` imports the stylesheet resources and reads the ``QSS``
+through a ``QFile`` / ``QTextStream`` on every launch.  The final text only depends on
+the version of ``qdarkstyle`` and the platform (it appends a fix on macOS), so it is
+written to the user's cache directory the first time and read straight from there
+afterwards.
+'''
+
+import io
+import os
+import platform
+
+from qt_configs import qdarkstyle
+
+CACHE_VERSION = 1
+''' Bump to invalidate every cached stylesheet, e.g. when the cache format changes. '''
+
+try:
+    _text = unicode  # noqa: F821 (Python 2, converts a QString)
+except NameError:
+    _text = str
+
+
+def cacheDirectory():
+    '''
+    Returns the directory cached stylesheets are stored in: ``$XDG_CACHE_HOME`` (or
+    ``~/.cache``) followed by ``citizen_pac``.
+    '''
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"),
+                                                            ".cache")
+    return os.path.join(base, "citizen_pac")
+
+
+def cachePath():
+    '''
+    Returns the path of the cached stylesheet for this version of ``qdarkstyle`` on
+    this platform.
+    '''
+    name = "qdarkstyle-{}-{}-v{}.qss".format(qdarkstyle.__version__,
+                                             platform.system().lower() or "unknown",
+                                             CACHE_VERSION)
+    return os.path.join(cacheDirectory(), name)
+
+
+def loadStyleSheet():
+    '''
+    Returns the ``qdarkstyle`` stylesheet for ``PyQt4``, from the cache when possible.
+    Failing to read or write the cache is never an error, the stylesheet is simply
+    loaded from the resources instead.
+
+    :Return:
+        ``str``
+            The stylesheet text, exactly as ``qdarkstyle.load_stylesheet`` returns it.
+    '''
+    path = cachePath()
+    try:
+        with io.open(path, "r", encoding="utf-8") as f:
+            styleSheet = f.read()
+        if styleSheet:
+            return styleSheet
+    except (IOError, OSError):
+        pass
+
+    styleSheet = _text(qdarkstyle.load_stylesheet(pyside=False))
+    if not styleSheet:
+        return styleSheet
+
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Write to a temporary file first so that a concurrent launch never reads a
+        # partially written stylesheet.
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        with io.open(temporary, "w", encoding="utf-8") as f:
+            f.write(styleSheet)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temporary, path)
+    except (IOError, OSError):
+        pass
+
+    return styleSheet
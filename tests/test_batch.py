@@ -0,0 +1,72 @@
+'''
+A batch run must give the same results no matter how many worker processes play it,
+which relies on every game being fully determined by its job.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import batch  # noqa: E402
+import constants  # noqa: E402
+
+
+def makeJob(seed, policy="greedy", overrides=None):
+    ''' A job for :func:`batch.playGame` on the default board, stopped after 3000 ticks. '''
+    return {
+        "seed":      seed,
+        "overrides": overrides or {},
+        "policy":    policy,
+        "width":     batch.BOARD_SIZE[0],
+        "height":    batch.BOARD_SIZE[1],
+        "maxTicks":  3000
+    }
+
+
+def withoutTiming(result):
+    ''' ``result`` without the wall-clock ``seconds``, which never repeat exactly. '''
+    return dict((key, value) for key, value in result.items() if key != "seconds")
+
+
+class BatchTest(unittest.TestCase):
+    def tearDown(self):
+        constants.setGameSpeed(constants.GAME_SPEED_START)
+
+    def test_play_game_deterministic(self):
+        for policy in sorted(batch.POLICIES):
+            job   = makeJob(11, policy)
+            first = withoutTiming(batch.playGame(job))
+            self.assertEqual(withoutTiming(batch.playGame(job)), first)
+            self.assertIn(first["outcome"], ("won", "lost", "timeout"))
+            self.assertEqual(first["seed"], 11)
+
+    def test_seeds_differ(self):
+        self.assertNotEqual(withoutTiming(batch.playGame(makeJob(1))),
+                            withoutTiming(batch.playGame(makeJob(2))))
+
+    def test_overrides_restored(self):
+        numLives = constants.NUM_LIVES
+        result   = batch.playGame(makeJob(3, overrides={"NUM_LIVES": 1}))
+        self.assertLessEqual(result["livesLost"], 1)
+        self.assertEqual(constants.NUM_LIVES, numLives)
+
+    def test_processes_match_serial(self):
+        jobs = [makeJob(seed, policy) for seed in range(4)
+                for policy in sorted(batch.POLICIES)]
+        serial   = [withoutTiming(result) for result in batch.runBatch(jobs, 1)]
+        parallel = [withoutTiming(result) for result in batch.runBatch(jobs, 2)]
+        self.assertEqual(parallel, serial)
+        self.assertEqual([result["seed"] for result in serial],
+                         [job["seed"] for job in jobs])
+
+
+if __name__ == "__main__":
+    unittest.main()
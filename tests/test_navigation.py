@@ -0,0 +1,127 @@
+'''
+The Ghosts chase CitizenPac down the distance fields of a
+:class:`navigation.NavigationGrid`, which wraps around the edges of the board just like
+the actors do.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import constants  # noqa: E402
+from navigation import NavigationGrid, directionFlags  # noqa: E402
+
+COLS, ROWS = 5, 4
+''' The size of the grid every test uses. '''
+
+SPACING = 10.0
+''' The distance between the centers of neighboring cells, the first is at the origin. '''
+
+
+def toroidalDistance(a0, d0, a1, d1):
+    ''' The number of moves between two cells when diagonal moves are allowed. '''
+    da = abs(a0 - a1)
+    dd = abs(d0 - d1)
+    return max(min(da, COLS - da), min(dd, ROWS - dd))
+
+
+class NavigationGridTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = NavigationGrid(COLS, ROWS, SPACING, SPACING, 0.0, 0.0)
+
+    def center(self, a, d):
+        return a * SPACING, d * SPACING
+
+    def test_cells(self):
+        self.assertEqual(len(self.grid), COLS * ROWS)
+        self.assertEqual(self.grid.cell(0.0, 0.0), 0)
+        self.assertEqual(self.grid.cell(14.0, 6.0), 1 * ROWS + 1)
+        # Wraps around every edge
+        self.assertEqual(self.grid.cell(-SPACING, 0.0), (COLS - 1) * ROWS)
+        self.assertEqual(self.grid.cell(0.0, -SPACING), ROWS - 1)
+        self.assertEqual(self.grid.cell(COLS * SPACING, ROWS * SPACING), 0)
+
+    def test_distance_field(self):
+        for ta in range(COLS):
+            for td in range(ROWS):
+                field = self.grid.distanceField(ta * ROWS + td)
+                for a in range(COLS):
+                    for d in range(ROWS):
+                        self.assertEqual(field[a * ROWS + d],
+                                         toroidalDistance(a, d, ta, td))
+
+    def test_distance_field_cached(self):
+        first = self.grid.distanceField(3)
+        self.assertIs(self.grid.distanceField(3), first)
+        self.assertEqual(self.grid.searches, 1)
+        self.grid.distanceField(4)
+        self.assertEqual(self.grid.searches, 2)
+
+    def test_next_move(self):
+        target = self.center(2, 1)
+        field  = self.grid.distanceField(self.grid.cell(*target))
+        x, y   = self.center(0, 3)
+        self.assertEqual(self.grid.nextMove(field, x, y, target[0], target[1], 1.0),
+                         constants.MOVE_EAST | constants.MOVE_NORTH)
+        x, y   = self.center(2, 3)
+        self.assertEqual(self.grid.nextMove(field, x, y, target[0], target[1], 1.0),
+                         constants.MOVE_NORTH)
+
+    def test_next_move_wraps(self):
+        # The shortest way from the first column to the last is west, across the edge
+        target = self.center(COLS - 1, 0)
+        field  = self.grid.distanceField(self.grid.cell(*target))
+        self.assertEqual(self.grid.nextMove(field, 0.0, 0.0, target[0], target[1], 1.0),
+                         constants.MOVE_WEST)
+        # And from the first row to the last is north
+        target = self.center(0, ROWS - 1)
+        field  = self.grid.distanceField(self.grid.cell(*target))
+        self.assertEqual(self.grid.nextMove(field, 0.0, 0.0, target[0], target[1], 1.0),
+                         constants.MOVE_NORTH)
+
+    def test_next_move_in_target_cell(self):
+        field = self.grid.distanceField(self.grid.cell(20.0, 10.0))
+        self.assertEqual(self.grid.nextMove(field, 18.0, 10.0, 21.0, 10.5, 1.0),
+                         constants.MOVE_EAST)
+        self.assertEqual(self.grid.nextMove(field, 20.5, 10.0, 21.0, 10.5, 1.0),
+                         constants.STATIONARY)
+
+    def test_following_the_field_arrives(self):
+        # Stepping along the moves reaches the target in as many moves as the field says
+        target = self.center(3, 2)
+        field  = self.grid.distanceField(self.grid.cell(*target))
+        x, y   = self.center(0, 0)
+        moves  = 0
+        while self.grid.cell(x, y) != self.grid.cell(*target):
+            flags = self.grid.nextMove(field, x, y, target[0], target[1], 1.0)
+            if flags & constants.MOVE_EAST == constants.MOVE_EAST:
+                x += SPACING
+            if flags & constants.MOVE_WEST == constants.MOVE_WEST:
+                x -= SPACING
+            if flags & constants.MOVE_SOUTH == constants.MOVE_SOUTH:
+                y += SPACING
+            if flags & constants.MOVE_NORTH == constants.MOVE_NORTH:
+                y -= SPACING
+            moves += 1
+            self.assertLessEqual(moves, len(self.grid))
+        self.assertEqual(moves, toroidalDistance(0, 0, 3, 2))
+
+
+class DirectionFlagsTest(unittest.TestCase):
+    def test_dead_zone(self):
+        self.assertEqual(directionFlags(0.5, -0.5, 1.0), constants.STATIONARY)
+        self.assertEqual(directionFlags(2.0, -0.5, 1.0), constants.MOVE_EAST)
+        self.assertEqual(directionFlags(-2.0, 2.0, 1.0),
+                         constants.MOVE_WEST | constants.MOVE_SOUTH)
+
+
+if __name__ == "__main__":
+    unittest.main()
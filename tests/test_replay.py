@@ -0,0 +1,152 @@
+'''
+A recorded game must play back exactly, headless, and replay files that cannot be read
+must be rejected with a :class:`replay.ReplayError`.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import batch  # noqa: E402
+import constants  # noqa: E402
+import replay  # noqa: E402
+import simulation  # noqa: E402
+from simulation import Simulation  # noqa: E402
+
+BOARD = (800.0, 740.0)
+''' The size of the board every test generates. '''
+
+SEED = 1234
+''' The seed of the recorded game. '''
+
+KEYFRAME_INTERVAL = 500
+''' The ticks between keyframes of the recorded game. '''
+
+SEEK_TICKS = [0, 1, 499, 500, 1234, 2999]
+''' The ticks the positions of the actors are compared on after seeking. '''
+
+
+def recordGame(path, seed, maxTicks=batch.MAX_TICKS):
+    '''
+    Plays a headless game with the greedy policy the way :func:`batch.playGame` does,
+    reporting every input to a :class:`replay.ReplayRecorder` like the
+    :class:`model.Scene` does.
+
+    :Return:
+        ``tuple``
+            ``(sim, positions)``: the simulation at the end of the game, and the
+            positions of the actors the first time every tick of ``SEEK_TICKS`` was
+            reached.
+    '''
+    constants.setGameSpeed(constants.GAME_SPEED_START)
+    sim       = simulation.createHeadless(BOARD[0], BOARD[1], seed)
+    rng       = sim.streams.stream("policy")
+    recorder  = replay.ReplayRecorder(path, sim, KEYFRAME_INTERVAL)
+    positions = {}
+    sim.running = True
+    recorder.setRunning(True)
+    try:
+        while sim.tick < maxTicks:
+            if sim.tick in SEEK_TICKS and sim.tick not in positions:
+                positions[sim.tick] = (list(sim.posX), list(sim.posY))
+            if sim.tick % batch.DECISION_TICKS == 0:
+                sim.moveFlags[sim.citizenPac] = batch.greedyPolicy(sim, rng)
+
+            recorder.beforeStep()
+            status = sim.step()
+            recorder.afterStep()
+            if status == Simulation.LOST_LIFE:
+                if sim.lives <= 0:
+                    break
+                sim.reset()
+                recorder.reset()
+                sim.moveFlags[sim.citizenPac] = batch.greedyPolicy(sim, rng)
+            elif status == Simulation.WON:
+                break
+    finally:
+        recorder.close()
+    return sim, positions
+
+
+class VarintTest(unittest.TestCase):
+    def test_round_trip(self):
+        for value in (0, 127, 128, 2 ** 32):
+            out = bytearray()
+            replay.encodeVarint(value, out)
+            self.assertEqual(replay.decodeVarint(out, 0), (value, len(out)))
+
+    def test_lengths(self):
+        for value, length in ((0, 1), (127, 1), (128, 2), (2 ** 32, 5)):
+            out = bytearray()
+            replay.encodeVarint(value, out)
+            self.assertEqual(len(out), length)
+
+    def test_truncated(self):
+        out = bytearray()
+        replay.encodeVarint(2 ** 32, out)
+        with self.assertRaises(replay.ReplayError):
+            replay.decodeVarint(out[:-1], 0)
+
+    def test_negative(self):
+        with self.assertRaises(ValueError):
+            replay.encodeVarint(-1, bytearray())
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path      = os.path.join(self.directory, "game.cprp")
+        self.saved     = dict((name, getattr(constants, name))
+                              for name in replay.REPLAY_CONSTANTS)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(constants, name, value)
+        constants.setGameSpeed(constants.GAME_SPEED_START)
+        shutil.rmtree(self.directory)
+
+    def writeFile(self, data):
+        with open(self.path, "wb") as f:
+            f.write(bytes(data))
+
+    def test_verify_round_trip(self):
+        sim, positions = recordGame(self.path, SEED)
+        final = replay._normalize(replay.captureKeyframe(sim))
+        self.assertGreater(sim.tick, max(SEEK_TICKS))
+
+        played = replay.loadReplay(self.path)
+        self.assertEqual(played.verify(), [])
+        self.assertEqual(played.simulation.tick, sim.tick)
+        self.assertEqual(replay._normalize(replay.captureKeyframe(played.simulation)),
+                         final)
+
+        for tick in reversed(SEEK_TICKS):
+            self.assertEqual(played.seek(tick), tick)
+            self.assertEqual((list(played.simulation.posX), list(played.simulation.posY)),
+                             positions[tick])
+
+    def test_bad_magic(self):
+        self.writeFile(b"NOPE" + bytearray([replay.FORMAT_VERSION]))
+        with self.assertRaises(replay.ReplayError):
+            replay.loadReplay(self.path)
+
+    def test_bad_version(self):
+        data = bytearray(replay.MAGIC)
+        replay.encodeVarint(replay.FORMAT_VERSION + 1, data)
+        self.writeFile(data)
+        with self.assertRaises(replay.ReplayError):
+            replay.loadReplay(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+'''
+The :class:`scheduler.TimerWheel` decides when the Ghosts change direction and the Food
+animates, so timers must fire on their tick, in a deterministic order, and survive being
+cancelled and restored.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+from scheduler import TimerWheel  # noqa: E402
+
+
+class TimerWheelTest(unittest.TestCase):
+    def setUp(self):
+        self.wheel = TimerWheel(size=8)
+        self.fired = []
+
+    def record(self, name):
+        self.fired.append((self.wheel.tick, name))
+
+    def advance(self, numTicks):
+        for _ in range(numTicks):
+            self.wheel.advance()
+
+    def test_schedule_fires_once(self):
+        self.wheel.schedule(3, self.record, "a")
+        self.wheel.schedule(0, self.record, "b")
+        self.advance(10)
+        self.assertEqual(self.fired, [(1, "b"), (3, "a")])
+
+    def test_every(self):
+        self.wheel.every(3, self.record, "a")
+        self.advance(10)
+        self.assertEqual(self.fired, [(3, "a"), (6, "a"), (9, "a")])
+
+    def test_same_tick_in_registration_order(self):
+        self.wheel.every(2, self.record, "a")
+        self.wheel.schedule(4, self.record, "b")
+        self.wheel.every(1, self.record, "c")
+        self.wheel.every(4, self.record, "d")
+        self.advance(4)
+        self.assertEqual(self.fired, [
+            (1, "c"),
+            (2, "a"), (2, "c"),
+            (3, "c"),
+            (4, "a"), (4, "b"), (4, "c"), (4, "d")
+        ])
+
+    def test_beyond_the_wheel(self):
+        # Due after more ticks than the wheel has slots, and sharing a slot
+        self.wheel.schedule(20, self.record, "late")
+        self.wheel.every(4, self.record, "often")
+        self.advance(20)
+        self.assertEqual([entry for entry in self.fired if entry[1] == "late"],
+                         [(20, "late")])
+        self.assertEqual(len(self.fired), 6)
+
+    def test_cancel(self):
+        a = self.wheel.every(2, self.record, "a")
+        b = self.wheel.schedule(5, self.record, "b")
+        self.wheel.every(3, self.record, "c")
+        self.advance(4)
+        self.wheel.cancel(a)
+        self.wheel.cancel(b)
+        self.advance(6)
+        self.assertEqual(self.fired, [(2, "a"), (3, "c"), (4, "a"), (6, "c"), (9, "c")])
+        self.assertFalse(a.active)
+
+    def test_cancel_from_callback(self):
+        timers = []
+
+        def cancelOther():
+            self.record("cancel")
+            self.wheel.cancel(timers[1])
+
+        timers.append(self.wheel.every(2, cancelOther))
+        timers.append(self.wheel.every(2, self.record, "b"))
+        self.advance(4)
+        self.assertEqual(self.fired, [(2, "cancel"), (4, "cancel")])
+
+    def test_restore(self):
+        a = self.wheel.every(3, self.record, "a")
+        b = self.wheel.schedule(7, self.record, "b")
+        self.advance(4)
+        saved    = (self.wheel.tick, a.due, b.due)
+        numFired = len(self.fired)
+        self.advance(8)
+        expected = self.fired[numFired:]
+
+        del self.fired[:]
+        tick, a.due, b.due = saved
+        b.active = True
+        self.wheel.restore(tick, [a, b])
+        self.advance(8)
+        self.assertEqual(self.fired, expected)
+
+    def test_restore_drops_inactive(self):
+        a = self.wheel.every(1, self.record, "a")
+        self.wheel.cancel(a)
+        self.wheel.restore(0, [a])
+        self.advance(3)
+        self.assertEqual(self.fired, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
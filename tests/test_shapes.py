@@ -0,0 +1,116 @@
+'''
+The shapes of the actors must be the same in the game and in the headless simulation
+(:func:`simulation.createHeadless`), otherwise replays and batch runs would not play
+out like the interactive game at the margins of a collision.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import constants  # noqa: E402
+import simulation  # noqa: E402
+import splines  # noqa: E402
+
+try:
+    from PyQt4 import QtGui
+except ImportError:
+    QtGui = None
+
+BOARD = (800.0, 740.0)
+''' The size of the board every test generates. '''
+
+
+class SceneController(object):
+    '''
+    Stands in for the :class:`controller.CitizenPac` the :class:`model.Scene` reports
+    game events to.
+    '''
+    def errorOut(self):
+        raise RuntimeError("The scene could not be generated.")
+
+
+class HeadlessShapesTest(unittest.TestCase):
+    def test_headless_uses_spline_shapes(self):
+        sx  = constants.SPLINE_COORD_SCALE
+        sy  = -constants.SPLINE_COORD_SCALE
+        sim = simulation.createHeadless(*BOARD)
+        _, pacHull, pacBounds     = splines.loadShape(splines.CITIZEN_PAC_DATA_FILE, sx, sy)
+        _, ghostHull, ghostBounds = splines.loadShape(splines.GHOST_DATA_FILE, sx, sy)
+
+        self.assertEqual(tuple(sim.bounds[sim.citizenPac]), tuple(pacBounds))
+        for index in sim.ghosts:
+            self.assertEqual(tuple(sim.bounds[index]), tuple(ghostBounds))
+
+        r = constants.FOOD_RADIUS
+        self.assertEqual(tuple(sim.foodBounds), (-r, -r, r, r))
+
+    def test_bounds_contain_every_level_of_detail(self):
+        for dataResource in (splines.CITIZEN_PAC_DATA_FILE, splines.GHOST_DATA_FILE):
+            lods, hull, bounds = splines.loadShape(dataResource,
+                                                   constants.SPLINE_COORD_SCALE,
+                                                   -constants.SPLINE_COORD_SCALE)
+            left, top, right, bottom = bounds
+            for _, vertices in lods + [(None, hull)]:
+                for x, y in vertices:
+                    self.assertTrue(left <= x <= right and top <= y <= bottom)
+
+
+@unittest.skipIf(QtGui is None, "PyQt4 is not installed")
+class SceneShapesTest(unittest.TestCase):
+    '''
+    Generates a :class:`model.Scene` with one :class:`view.actors.Food` item per pellet
+    and compares what it registered with :func:`simulation.createHeadless`.
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    def setUp(self):
+        self.saved = (constants.BATCHED_FOOD, constants.VIRTUALIZE_FOOD)
+        constants.BATCHED_FOOD    = False
+        constants.VIRTUALIZE_FOOD = False
+
+    def tearDown(self):
+        constants.BATCHED_FOOD, constants.VIRTUALIZE_FOOD = self.saved
+
+    def assertBoundsEqual(self, first, second):
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            self.assertAlmostEqual(a, b, places=9)
+
+    def test_scene_and_headless_bounds_are_equal(self):
+        from model import Scene, localBounds
+
+        width, height = BOARD
+        view  = QtGui.QGraphicsView()
+        scene = Scene(SceneController(), view)
+        view.setScene(scene)
+        scene.setSceneRect(-0.5 * width, -0.5 * height, width, height)
+        scene.generate(width, height)
+        headless = simulation.createHeadless(width, height)
+
+        actors = [scene.citizenPac] + scene.ghosts
+        self.assertEqual(len(actors), len(headless.bounds))
+        for actor in actors:
+            self.assertBoundsEqual(localBounds(actor), headless.bounds[actor.simIndex])
+            self.assertBoundsEqual(scene.simulation.bounds[actor.simIndex],
+                                   headless.bounds[actor.simIndex])
+            self.assertEqual(scene.simulation.hulls[actor.simIndex],
+                             headless.hulls[actor.simIndex])
+
+        self.assertTrue(scene.food)
+        for food in scene.food:
+            self.assertBoundsEqual(localBounds(food), headless.foodBounds)
+
+
+if __name__ == "__main__":
+    unittest.main()
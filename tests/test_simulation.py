@@ -0,0 +1,304 @@
+'''
+The headless :class:`simulation.Simulation` is what the game, replays and batch runs all
+step, so it must be deterministic for a seed and restore exactly from a snapshot.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import batch  # noqa: E402
+import constants  # noqa: E402
+import simulation  # noqa: E402
+from simulation import Simulation  # noqa: E402
+
+BOARD = (800.0, 740.0)
+''' The size of the board every test generates. '''
+
+SEED = 42
+''' The seed of every generated game. '''
+
+BOX = (-10.0, -10.0, 10.0, 10.0)
+''' The bounds of the actors of the hand-built boards. '''
+
+
+def playTicks(sim, numTicks):
+    '''
+    Steps ``sim`` ``numTicks`` times with CitizenPac heading north-east, resetting the
+    board whenever a life is lost.
+
+    :Return:
+        ``list``
+            The status and snapshot after every step.
+    '''
+    steps = []
+    for _ in range(numTicks):
+        sim.moveFlags[sim.citizenPac] = constants.MOVE_NORTH | constants.MOVE_EAST
+        status = sim.step()
+        if status == Simulation.LOST_LIFE:
+            sim.reset()
+        steps.append((status, sim.snapshot()))
+    return steps
+
+
+def runningHeadless(seed=SEED):
+    ''' A running :func:`simulation.createHeadless` game on ``BOARD``. '''
+    sim = simulation.createHeadless(BOARD[0], BOARD[1], seed)
+    sim.running = True
+    return sim
+
+
+class SimulationTest(unittest.TestCase):
+    def setUp(self):
+        self.fullGameMode = constants.FULL_GAME_MODE
+        constants.FULL_GAME_MODE = True
+        constants.setGameSpeed(constants.GAME_SPEED_START)
+
+    def tearDown(self):
+        constants.FULL_GAME_MODE = self.fullGameMode
+
+    def test_same_seed_same_steps(self):
+        self.assertEqual(playTicks(runningHeadless(), 1000),
+                         playTicks(runningHeadless(), 1000))
+
+    def test_different_seed_different_ghosts(self):
+        self.assertNotEqual(playTicks(runningHeadless(SEED), 200),
+                            playTicks(runningHeadless(SEED + 1), 200))
+
+    def test_restore_replays_steps(self):
+        sim = runningHeadless()
+        playTicks(sim, 300)
+        state    = sim.snapshot()
+        expected = playTicks(sim, 500)
+
+        sim.restore(state)
+        self.assertEqual(sim.snapshot(), state)
+        self.assertEqual(playTicks(sim, 500), expected)
+
+        # A simulation populated the same way continues identically as well
+        other = runningHeadless()
+        other.restore(state)
+        self.assertEqual(playTicks(other, 500), expected)
+
+    def test_lost_life(self):
+        sim = Simulation(200.0, 200.0, SEED)
+        sim.addActor(0.0, 0.0, BOX, isCitizenPac=True)
+        sim.addActor(5.0, 0.0, BOX)
+        sim.running = True
+        lives = sim.lives
+        tick  = sim.tick
+        self.assertEqual(sim.step(), Simulation.LOST_LIFE)
+        self.assertEqual(sim.lives, lives - 1)
+        # Nothing else happens on that step
+        self.assertEqual(sim.tick, tick)
+
+    def test_won(self):
+        sim = Simulation(200.0, 200.0, SEED)
+        sim.addActor(0.0, 0.0, BOX, isCitizenPac=True)
+        sim.addFood(0.0, 0.0, (-1.0, -1.0, 1.0, 1.0))
+        sim.addFood(50.0, 50.0, (-1.0, -1.0, 1.0, 1.0))
+        sim.running = True
+        self.assertEqual(sim.step(), Simulation.CONTINUE)
+        self.assertEqual(sim.eatenThisStep, [0])
+
+        sim.posX[sim.citizenPac] = 50.0
+        sim.posY[sim.citizenPac] = 50.0
+        self.assertEqual(sim.step(), Simulation.WON)
+        self.assertEqual(sim.eatenThisStep, [1])
+
+    def test_paused_does_not_collide(self):
+        sim = Simulation(200.0, 200.0, SEED)
+        sim.addActor(0.0, 0.0, BOX, isCitizenPac=True)
+        sim.addActor(5.0, 0.0, BOX)
+        self.assertEqual(sim.step(), Simulation.CONTINUE)
+
+    def test_reset_clears_eaten(self):
+        sim = runningHeadless()
+        rng = sim.streams.stream("policy")
+        while sim.foodEaten < 5 and sim.tick < 5000:
+            sim.moveFlags[sim.citizenPac] = batch.greedyPolicy(sim, rng)
+            if sim.step() == Simulation.LOST_LIFE:
+                sim.reset()
+        self.assertEqual(sim.foodEaten, 5, "CitizenPac should have eaten some Food.")
+        self.assertTrue(any(sim.isEaten(i) for i in range(sim.numFood())))
+        lives = sim.lives
+        tick  = sim.tick
+
+        sim.reset()
+        self.assertEqual(sim.foodEaten, 0)
+        self.assertFalse(any(sim.isEaten(i) for i in range(sim.numFood())))
+        self.assertEqual(list(sim.posX), list(sim.startX))
+        self.assertEqual(list(sim.posY), list(sim.startY))
+        self.assertEqual(set(sim.moveFlags), set([constants.STATIONARY]))
+        self.assertEqual(sim.lives, lives)
+        self.assertEqual(sim.tick, tick)
+
+
+def overlapping(sim, left, top, right, bottom):
+    ''' Every Food whose ``foodBounds`` overlap the rectangle, by brute force. '''
+    l, t, r, b = sim.foodBounds
+    return [i for i in range(sim.numFood())
+            if sim.foodX[i] + l < right and left < sim.foodX[i] + r and
+            sim.foodY[i] + t < bottom and top < sim.foodY[i] + b]
+
+
+def queryBoxes(width, height, size, step):
+    '''
+    Yields ``size`` by ``size`` rectangles centered every ``step`` across the board and
+    a bit beyond its edges, where an actor is just before it is wrapped around.
+    '''
+    half_width  = 0.5 * width
+    half_height = 0.5 * height
+    x = -half_width - size
+    while x <= half_width + size:
+        y = -half_height - size
+        while y <= half_height + size:
+            yield x - 0.5 * size, y - 0.5 * size, x + 0.5 * size, y + 0.5 * size
+            y += step
+        x += step
+
+
+class FoodLatticeTest(unittest.TestCase):
+    def checkBox(self, sim, box):
+        expected   = overlapping(sim, *box)
+        candidates = sim.foodIndex.candidates(box[0], box[1], box[2], box[3],
+                                              sim.foodBounds)
+        self.assertEqual(len(set(candidates)), len(candidates))
+        self.assertTrue(set(expected) <= set(candidates),
+                        "Food missing from the candidates of {}".format(box))
+        self.assertEqual(sim.foodIn(*box), expected)
+
+    def test_default_board(self):
+        sim = simulation.createHeadless(BOARD[0], BOARD[1], SEED)
+        self.assertIsNotNone(sim.foodIndex)
+        for box in queryBoxes(BOARD[0], BOARD[1], 30.0, 7.0):
+            self.checkBox(sim, box)
+
+    def test_edges(self):
+        # An uneven board, queried with boxes straddling every edge and corner
+        width, height = 333.0, 217.0
+        sim = simulation.createHeadless(width, height, SEED)
+        self.assertIsNotNone(sim.foodIndex)
+        for x in (-0.5 * width, 0.0, 0.5 * width):
+            for y in (-0.5 * height, 0.0, 0.5 * height):
+                for size in (1.0, 20.0, 45.0):
+                    self.checkBox(sim, (x - size, y - size, x + size, y + size))
+        for box in queryBoxes(width, height, 45.0, 11.0):
+            self.checkBox(sim, box)
+
+    def test_lattice_matches_centers(self):
+        sim = simulation.createHeadless(*BOARD)
+        self.assertEqual(len(sim.foodIndex), sim.numFood())
+        self.assertEqual([sim.foodIndex.center(i) for i in range(sim.numFood())],
+                         simulation.foodCenters(*BOARD))
+
+
+class EatenStateTest(unittest.TestCase):
+    def setUp(self):
+        # 13 Food in a row, so that the last byte of the bitset is only partly used
+        self.sim = Simulation(400.0, 100.0, SEED)
+        self.sim.addActor(0.0, 0.0, BOX, isCitizenPac=True)
+        for i in range(13):
+            self.sim.addFood(-180.0 + 30.0 * i, 0.0, (-1.0, -1.0, 1.0, 1.0))
+        self.sim.running = True
+
+    def eat(self, indices):
+        ''' Moves CitizenPac onto every Food of ``indices`` in turn. '''
+        for i in indices:
+            self.sim.posX[self.sim.citizenPac] = self.sim.foodX[i]
+            self.sim.step()
+            self.assertIn(i, self.sim.eatenThisStep)
+
+    def assertConsistent(self):
+        sim = self.sim
+        self.assertEqual(len(sim.eatenBits), (sim.numFood() + 7) // 8)
+        self.assertEqual([i for i in range(sim.numFood()) if sim.isEaten(i)],
+                         sorted(sim.eaten))
+        self.assertEqual(sum(bin(byte).count("1") for byte in sim.eatenBits),
+                         sim.foodEaten)
+
+    def test_eaten_bits_agree(self):
+        self.assertConsistent()
+        self.eat([12, 0, 7, 8])
+        self.assertEqual(list(self.sim.eaten), [12, 0, 7, 8])
+        self.assertConsistent()
+        self.assertEqual(self.sim.foodIn(-200.0, -50.0, 200.0, 50.0),
+                         [1, 2, 3, 4, 5, 6, 9, 10, 11])
+
+    def test_reset(self):
+        self.eat([3, 11, 12])
+        self.sim.reset()
+        self.assertEqual(self.sim.foodEaten, 0)
+        self.assertEqual(self.sim.eatenBits, bytearray(2))
+        self.assertConsistent()
+
+        # Everything can be eaten again
+        self.eat([3, 11])
+        self.assertConsistent()
+
+    def test_restore(self):
+        self.eat([1, 9])
+        state = self.sim.snapshot()
+        self.eat([2, 10])
+        self.sim.restore(state)
+        self.assertEqual(list(self.sim.eaten), [1, 9])
+        self.assertConsistent()
+
+
+class WrapActorsTest(unittest.TestCase):
+    WIDTH  = 200.0
+    HEIGHT = 100.0
+
+    def board(self, positions):
+        sim = Simulation(self.WIDTH, self.HEIGHT, SEED)
+        for i, (x, y) in enumerate(positions):
+            sim.addActor(x, y, BOX, isCitizenPac=i == 0)
+        return sim
+
+    def checkPositions(self, positions):
+        batched    = self.board(positions)
+        individual = self.board(positions)
+        wrapped    = batched.wrapActors()
+
+        expected = []
+        for i in range(len(positions)):
+            before = individual.position(i)
+            individual.wrapActor(i, self.WIDTH, self.HEIGHT)
+            if individual.position(i) != before:
+                expected.append(i)
+        self.assertEqual(list(batched.posX), list(individual.posX))
+        self.assertEqual(list(batched.posY), list(individual.posY))
+        self.assertEqual(wrapped, expected)
+
+    def test_inside(self):
+        # Exactly on the edges is still inside
+        positions = [(0.0, 0.0), (-100.0, -50.0), (100.0, 50.0), (100.0, -50.0)]
+        self.checkPositions(positions)
+        self.assertEqual(self.board(positions).wrapActors(), [])
+
+    def test_straddling_every_edge(self):
+        offsets = (-0.5, 0.0, 0.5)
+        for x in (-100.0, 0.0, 100.0):
+            for y in (-50.0, 0.0, 50.0):
+                positions = [(0.0, 0.0)]
+                for ox in offsets:
+                    for oy in offsets:
+                        positions.append((x + ox, y + oy))
+                self.checkPositions(positions)
+
+    def test_single_actor_past_each_edge(self):
+        for position in ((-100.5, 0.0), (100.5, 0.0), (0.0, -50.5), (0.0, 50.5),
+                         (-100.5, -50.5), (100.5, 50.5)):
+            self.checkPositions([(0.0, 0.0), (10.0, 10.0), position])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+'''
+The levels of detail of the splines drawn by :class:`view.actors.SplineDrawer`.
+
+Run from the repository root with::
+
+    python -m pytest tests
+'''
+
+import math
+import os
+import sys
+import unittest
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "citizen_pac")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+import constants  # noqa: E402
+import splines  # noqa: E402
+
+DATA_FILES = (splines.CITIZEN_PAC_DATA_FILE, splines.GHOST_DATA_FILE)
+''' The splines of CitizenPac and the Ghosts. '''
+
+
+def loadSegments(dataResource):
+    return splines.cubicSegments(*splines.loadControlPoints(
+        dataResource, constants.SPLINE_COORD_SCALE, -constants.SPLINE_COORD_SCALE
+    ))
+
+
+def distanceToPolygon(x, y, vertices):
+    ''' The distance from ``(x, y)`` to the closest edge of the closed ``vertices``. '''
+    best = float("inf")
+    for i in range(len(vertices)):
+        ax, ay = vertices[i]
+        bx, by = vertices[(i + 1) % len(vertices)]
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+        t      = 0.0 if length == 0.0 else ((x - ax) * dx + (y - ay) * dy) / length
+        t      = max(0.0, min(1.0, t))
+        best   = min(best, math.hypot(ax + t * dx - x, ay + t * dy - y))
+    return best
+
+
+class LevelsOfDetailTest(unittest.TestCase):
+    def test_vertex_counts_strictly_decrease(self):
+        for dataResource in DATA_FILES:
+            lods   = splines.levelsOfDetail(loadSegments(dataResource),
+                                            constants.SPLINE_LOD_TOLERANCES)
+            counts = [len(vertices) for _, vertices in lods]
+            self.assertGreater(len(counts), 1, dataResource)
+            for coarser, finer in zip(counts, counts[1:]):
+                self.assertLess(coarser, finer, (dataResource, counts))
+
+    def test_ghost_is_reduced(self):
+        segments = loadSegments(splines.GHOST_DATA_FILE)
+        lods     = splines.levelsOfDetail(segments, constants.SPLINE_LOD_TOLERANCES)
+        coarsest = lods[0][1]
+        self.assertLess(len(coarsest), len(segments))
+
+    def test_levels_stay_within_tolerance(self):
+        for dataResource in DATA_FILES:
+            segments = loadSegments(dataResource)
+            for tolerance, vertices in splines.levelsOfDetail(
+                    segments, constants.SPLINE_LOD_TOLERANCES):
+                for segment in segments:
+                    for i in range(17):
+                        x, y = splines.evaluateCubic(segment, i / 16.0)
+                        self.assertLessEqual(distanceToPolygon(x, y, vertices),
+                                             tolerance + 1e-9)
+
+    def test_simplify_keeps_corners(self):
+        square = [(0.0, 0.0), (1.0, 0.0), (2.0, 0.0), (2.0, 1.0), (2.0, 2.0),
+                  (1.0, 2.0), (0.0, 2.0), (0.0, 1.0)]
+        self.assertEqual(sorted(splines.simplify(square, 0.01)),
+                         [(0.0, 0.0), (0.0, 2.0), (2.0, 0.0), (2.0, 2.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()